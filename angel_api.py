@@ -1,23 +1,51 @@
-from SmartApi import SmartConnect
 import pyotp
-from datetime import datetime
-import time
+from datetime import datetime, timedelta
+from instrument_master import InstrumentMaster
+from fetch_executor import get_executor
+from session_manager import SessionManager, SESSION_FILE
+from strike_ladder import StrikeLadder, nearest_expiry
+from data_provider import MarketDataProvider
+from option_model import ChainSnapshot
 
-class AngelOneAPI:
+# Nifty 50 index token on NSE
+NIFTY_TOKEN = "99926000"
+
+# Max tokens the market data endpoint accepts per request
+MARKET_DATA_BATCH_SIZE = 50
+
+class AngelOneAPI(MarketDataProvider):
     """Angel One SmartAPI integration for fetching Nifty options data"""
     
-    def __init__(self, api_key, client_id, password, totp_secret):
+    def __init__(self, api_key, client_id, password, totp_secret, session_file=SESSION_FILE):
         self.api_key = api_key
         self.client_id = client_id
         self.password = password
         self.totp_secret = totp_secret
-        self.smart_api = None
-        self.auth_token = None
-        self.feed_token = None
+        
+        # Persisted session (JWT + refresh token) on one pooled SmartConnect client
+        self.session = SessionManager(api_key, client_id, session_file)
+        self.smart_api = self.session.smart_api
+        
+        # Instrument master for local token lookups (refreshed daily)
+        self.instruments = InstrumentMaster()
+        self.ladder = None
+        
+        # Shared rate-limited executor for all API calls on this session
+        self.executor = get_executor()
         
         # Login to Angel One
         self._login()
     
+    @property
+    def auth_token(self):
+        tokens = self.session.tokens
+        return tokens['jwtToken'] if tokens else None
+    
+    @property
+    def feed_token(self):
+        tokens = self.session.tokens
+        return tokens['feedToken'] if tokens else None
+    
     def _generate_totp(self):
         """Generate TOTP automatically from secret"""
         try:
@@ -30,12 +58,14 @@ class AngelOneAPI:
             return None
     
     def _login(self):
-        """Login to Angel One SmartAPI"""
+        """Login to Angel One SmartAPI (skipped if a saved session is valid)"""
         try:
             print("Logging into Angel One...")
             
-            # Initialize SmartAPI
-            self.smart_api = SmartConnect(api_key=self.api_key)
+            # Reuse the saved session instead of a full TOTP login
+            if self.session.restore():
+                print(f"✓ Client: {self.client_id}")
+                return True
             
             # Generate TOTP automatically
             totp = self._generate_totp()
@@ -44,15 +74,9 @@ class AngelOneAPI:
                 return False
             
             # Login
-            data = self.smart_api.generateSession(
-                clientCode=self.client_id,
-                password=self.password,
-                totp=totp
-            )
+            data = self.session.login(self.password, totp)
             
             if data['status']:
-                self.auth_token = data['data']['jwtToken']
-                self.feed_token = data['data']['feedToken']
                 print("✓ Angel One login successful")
                 print(f"✓ Client: {self.client_id}")
                 return True
@@ -64,29 +88,78 @@ class AngelOneAPI:
             print(f"❌ Login error: {str(e)}")
             return False
     
+    def reconnect(self):
+        """Recover the session after errors: renew with the refresh token, full login only if that fails"""
+        if self.session.renew():
+            return True
+        
+        print("⚠ Saved session rejected, logging in again...")
+        self.session.clear()
+        return self._login()
+    
+    def get_quotes(self, exchange_tokens, mode="FULL"):
+        """
+        Fetch market data for many tokens with the batched market data endpoint
+        
+        Args:
+            exchange_tokens: Dict of exchange -> list of tokens, e.g. {"NFO": ["43568"]}
+            mode: "LTP", "OHLC" or "FULL" (FULL includes volume and OI)
+        
+        Returns:
+            Dict of (exchange, token) -> quote dict (missing tokens are left out)
+        """
+        # Fail loudly on an SDK without the endpoint instead of every batch failing quietly
+        market_data = getattr(self.smart_api, 'getMarketData', None)
+        if market_data is None:
+            raise RuntimeError("smartapi-python has no getMarketData (added in 1.3.6); "
+                               "install the version pinned in requirements.txt")
+        
+        self.session.ensure_fresh()
+        
+        pairs = [(exchange, str(token)) for exchange, tokens in exchange_tokens.items() for token in tokens]
+        quotes = {}
+        
+        # Split into batches and fetch them concurrently within the rate limit
+        futures = []
+        for start in range(0, len(pairs), MARKET_DATA_BATCH_SIZE):
+            batch = {}
+            for exchange, token in pairs[start:start + MARKET_DATA_BATCH_SIZE]:
+                batch.setdefault(exchange, []).append(token)
+            futures.append(self.executor.submit('getMarketData', market_data, mode, batch))
+        
+        for future in futures:
+            try:
+                response = future.result()
+            except Exception as e:
+                print(f"Error fetching market data: {str(e)}")
+                continue
+            
+            if not response or not response.get('status') or not response.get('data'):
+                print(f"⚠ Market data request failed: {(response or {}).get('message', 'No data')}")
+                continue
+            
+            for quote in response['data'].get('fetched', []):
+                quotes[(quote['exchange'], str(quote['symbolToken']))] = quote
+        
+        return quotes
+    
     def get_nifty_spot_price(self):
         """Get current Nifty 50 spot price"""
-        try:
-            # Nifty 50 token for NSE
-            nifty_token = "99926000"
-            
-            ltp_data = self.smart_api.ltpData(
-                exchange="NSE",
-                tradingsymbol="Nifty 50",
-                symboltoken=nifty_token
-            )
-            
-            if ltp_data and ltp_data['status']:
-                spot_price = float(ltp_data['data']['ltp'])
-                print(f"✓ Nifty Spot: ₹{spot_price:.2f}")
-                return spot_price
-            else:
-                print("⚠ Could not fetch Nifty spot price")
-                return None
-                
-        except Exception as e:
-            print(f"Error fetching Nifty spot: {str(e)}")
-            return None
+        quote = self.get_quotes({"NSE": [NIFTY_TOKEN]}, mode="LTP").get(("NSE", NIFTY_TOKEN))
+        
+        if quote:
+            spot_price = float(quote['ltp'])
+            print(f"✓ Nifty Spot: ₹{spot_price:.2f}")
+            return spot_price
+        
+        print("⚠ Could not fetch Nifty spot price")
+        return None
+    
+    def get_spot(self):
+        return self.get_nifty_spot_price()
+    
+    def get_chain(self):
+        return self.get_option_chain()
     
     def get_atm_strike(self, spot_price):
         """Calculate ATM strike (rounded to nearest 50)"""
@@ -108,26 +181,32 @@ class AngelOneAPI:
             return None
     
     def get_weekly_expiry(self):
-        """Get nearest weekly expiry for Nifty"""
-        from datetime import datetime, timedelta
-        
-        today = datetime.now()
+        """Get nearest weekly expiry for Nifty from the instrument master"""
+        expiry_str = nearest_expiry(self.instruments, "NIFTY")
         
-        # Nifty weekly expiry is on Thursday
-        days_until_thursday = (3 - today.weekday()) % 7
-        if days_until_thursday == 0 and today.hour >= 15:
-            days_until_thursday = 7
-        
-        expiry_date = today + timedelta(days=days_until_thursday)
-        expiry_str = expiry_date.strftime("%d-%b-%Y")
+        if not expiry_str:
+            # Master unavailable - fall back to the Thursday rule
+            today = datetime.now()
+            days_until_thursday = (3 - today.weekday()) % 7
+            if days_until_thursday == 0 and today.hour >= 15:
+                days_until_thursday = 7
+            
+            expiry_str = (today + timedelta(days=days_until_thursday)).strftime("%d-%b-%Y")
+            print("⚠ Instrument master has no expiries, assuming Thursday expiry")
         
         print(f"✓ Weekly Expiry: {expiry_str}")
         return expiry_str
     
+    def get_ladder(self, atm_strike, strikes_each_side=5):
+        """Get the session's strike ladder, rebuilding it only when ATM leaves it or the day/expiry rolls"""
+        if not self.ladder or not self.ladder.is_current() or not self.ladder.covers(atm_strike, strikes_each_side):
+            self.ladder = StrikeLadder(self.instruments, atm_strike, self.get_weekly_expiry())
+        return self.ladder
+    
     def get_option_chain(self):
         """Fetch option chain data for Nifty weekly options (ATM ± 5 strikes)"""
         try:
-            # Get Nifty spot price
+            # Get Nifty spot price to locate the ATM strike
             spot_price = self.get_nifty_spot_price()
             if not spot_price:
                 return None
@@ -136,90 +215,37 @@ class AngelOneAPI:
             atm_strike = self.get_atm_strike(spot_price)
             print(f"✓ ATM Strike: {atm_strike}")
             
-            # Get weekly expiry
-            weekly_expiry = self.get_weekly_expiry()
-            
-            # Get strikes to scan (ATM ± 5)
-            strikes_to_scan = [atm_strike + (i * 50) for i in range(-5, 6)]
-            
-            # Fetch option prices
-            options = []
-            
-            for strike in strikes_to_scan:
-                # Call option
-                ce_symbol = self._get_option_symbol(strike, "CE", weekly_expiry)
-                if ce_symbol:
-                    try:
-                        # Search for token
-                        search_result = self.smart_api.searchScrip("NFO", ce_symbol)
-                        
-                        if search_result and search_result['status'] and search_result['data']:
-                            token = search_result['data'][0]['symboltoken']
-                            
-                            # Get LTP
-                            ltp_data = self.smart_api.ltpData(
-                                exchange="NFO",
-                                tradingsymbol=ce_symbol,
-                                symboltoken=token
-                            )
-                            
-                            if ltp_data and ltp_data['status']:
-                                ltp = float(ltp_data['data']['ltp'])
-                                if ltp > 0:
-                                    options.append({
-                                        'strike': strike,
-                                        'type': 'CE',
-                                        'ltp': ltp,
-                                        'volume': 0,
-                                        'oi': 0,
-                                        'expiry': weekly_expiry,
-                                        'symbol': ce_symbol
-                                    })
-                    except Exception as e:
-                        pass
-                
-                # Put option
-                pe_symbol = self._get_option_symbol(strike, "PE", weekly_expiry)
-                if pe_symbol:
-                    try:
-                        search_result = self.smart_api.searchScrip("NFO", pe_symbol)
-                        
-                        if search_result and search_result['status'] and search_result['data']:
-                            token = search_result['data'][0]['symboltoken']
-                            
-                            ltp_data = self.smart_api.ltpData(
-                                exchange="NFO",
-                                tradingsymbol=pe_symbol,
-                                symboltoken=token
-                            )
-                            
-                            if ltp_data and ltp_data['status']:
-                                ltp = float(ltp_data['data']['ltp'])
-                                if ltp > 0:
-                                    options.append({
-                                        'strike': strike,
-                                        'type': 'PE',
-                                        'ltp': ltp,
-                                        'volume': 0,
-                                        'oi': 0,
-                                        'expiry': weekly_expiry,
-                                        'symbol': pe_symbol
-                                    })
-                    except Exception as e:
-                        pass
+            # Slice ATM ± 5 from the precomputed ladder (no network calls)
+            ladder = self.get_ladder(atm_strike)
+            weekly_expiry = ladder.expiry
+            contracts = {token: (strike, option_type, symbol) for strike, option_type, token, symbol in ladder.window(atm_strike, 5)}
+            
+            if not contracts:
+                print(f"⚠ No contracts found for expiry {weekly_expiry}")
+                return None
+            
+            # Fetch spot and the whole ladder in one batched snapshot
+            quotes = self.get_quotes({"NSE": [NIFTY_TOKEN], "NFO": list(contracts)}, mode="FULL")
+            timestamp = datetime.now().isoformat()
+            
+            spot_quote = quotes.get(("NSE", NIFTY_TOKEN))
+            if spot_quote:
+                spot_price = float(spot_quote['ltp'])
+            
+            chain = ChainSnapshot(spot_price, atm_strike, weekly_expiry, timestamp)
+            
+            for token, (strike, option_type, symbol) in contracts.items():
+                quote = quotes.get(("NFO", token))
+                if not quote:
+                    continue
                 
-                # Small delay to avoid rate limiting
-                time.sleep(0.1)
-            
-            if len(options) > 0:
-                print(f"✓ Fetched {len(options)} options successfully")
-                return {
-                    'spot_price': spot_price,
-                    'atm_strike': atm_strike,
-                    'expiry': weekly_expiry,
-                    'options': options,
-                    'timestamp': datetime.now().isoformat()
-                }
+                ltp = float(quote.get('ltp', 0))
+                if ltp > 0:
+                    chain.append(strike, option_type, ltp, quote.get('tradeVolume', 0), quote.get('opnInterest', 0), symbol)
+            
+            if len(chain) > 0:
+                print(f"✓ Fetched {len(chain)} options successfully")
+                return chain
             else:
                 print("⚠ No option data found")
                 return None
@@ -1,7 +1,8 @@
 import os
 from datetime import datetime, timedelta
-import time
 from angel_api import AngelOneAPI
+from strike_ladder import nearest_expiry
+from candle_cache import CandleCache, fetch_candles
 import json
 
 class StrategyBacktest:
@@ -16,29 +17,25 @@ class StrategyBacktest:
         self.losing_trades = 0
         self.open_positions = {}
         
+        # Past sessions' candles never change: reruns are served from disk
+        self.candle_cache = CandleCache()
+        
     def get_historical_candles(self, symbol, token, from_date, to_date, interval="FIVE_MINUTE"):
-        """Fetch historical candle data from Angel One"""
+        """Fetch historical candle data from Angel One (through the candle cache)"""
         try:
-            params = {
-                "exchange": "NFO",
-                "symboltoken": token,
-                "interval": interval,
-                "fromdate": from_date.strftime("%Y-%m-%d %H:%M"),
-                "todate": to_date.strftime("%Y-%m-%d %H:%M")
-            }
+            def fetch(gap_from, gap_to):
+                print(f"  Fetching {symbol} data...")
+                return fetch_candles(self.angel, "NFO", token, interval, gap_from, gap_to)
             
-            print(f"  Fetching {symbol} data...")
-            data = self.angel.smart_api.getCandleData(params)
+            candles = self.candle_cache.get_candles("NFO", token, interval, from_date, to_date, fetch)
             
-            if data and data.get('status'):
-                candles = data.get('data', [])
-                if candles:
-                    print(f"  ✓ Got {len(candles)} candles for {symbol}")
-                    return candles
-                else:
-                    print(f"  ⚠ No candle data for {symbol}")
-            else:
+            if candles is None:
                 print(f"  ⚠ API returned no data for {symbol}")
+            elif candles:
+                print(f"  ✓ Got {len(candles)} candles for {symbol}")
+                return candles
+            else:
+                print(f"  ⚠ No candle data for {symbol}")
             
             return None
                 
@@ -56,19 +53,14 @@ class StrategyBacktest:
             from_date = date.replace(hour=9, minute=15)
             to_date = date.replace(hour=15, minute=30)
             
-            params = {
-                "exchange": "NSE",
-                "symboltoken": nifty_token,
-                "interval": "FIVE_MINUTE",
-                "fromdate": from_date.strftime("%Y-%m-%d %H:%M"),
-                "todate": to_date.strftime("%Y-%m-%d %H:%M")
-            }
-            
-            data = self.angel.smart_api.getCandleData(params)
+            candles = self.candle_cache.get_candles(
+                "NSE", nifty_token, "FIVE_MINUTE", from_date, to_date,
+                lambda gap_from, gap_to: fetch_candles(self.angel, "NSE", nifty_token, "FIVE_MINUTE", gap_from, gap_to)
+            )
             
-            if data and data.get('status') and data.get('data'):
+            if candles:
                 # Get first candle's close price
-                first_candle = data['data'][0]
+                first_candle = candles[0]
                 spot_price = float(first_candle[4])  # Close price
                 return spot_price
             
@@ -106,6 +98,46 @@ class StrategyBacktest:
         
         return trade
     
+    def _evaluate_candles(self, symbol, candles, current_capital):
+        """Apply the 2% drop/rise rule to a day of candles, returning updated capital"""
+        if not candles or len(candles) < 2:
+            return current_capital
+        
+        # Analyze price movements
+        entry_price = float(candles[0][4])  # First candle close
+        high_price = max([float(c[2]) for c in candles])  # Highest high
+        low_price = min([float(c[3]) for c in candles])  # Lowest low
+        exit_price = float(candles[-1][4])  # Last candle close
+        
+        print(f"  Entry: ₹{entry_price:.2f}")
+        print(f"  High:  ₹{high_price:.2f}")
+        print(f"  Low:   ₹{low_price:.2f}")
+        print(f"  Exit:  ₹{exit_price:.2f}")
+        
+        # Check if strategy would have triggered
+        price_change = ((exit_price - entry_price) / entry_price) * 100
+        
+        if abs(price_change) >= 2.0:
+            # Simulate trade
+            quantity = 50  # 1 lot
+            
+            if price_change <= -2.0:
+                # BUY signal (price dropped)
+                trade = self.simulate_trade(entry_price, exit_price, quantity, "BUY", symbol)
+                print(f"\n  🎯 BUY SIGNAL (Price dropped {abs(price_change):.2f}%)")
+            else:
+                # SELL signal (price rose)
+                trade = self.simulate_trade(entry_price, exit_price, quantity, "SELL", symbol)
+                print(f"\n  🎯 SELL SIGNAL (Price rose {price_change:.2f}%)")
+            
+            current_capital += trade['profit']
+            print(f"  P&L: ₹{trade['profit']:,.2f} ({trade['profit_percent']:.2f}%)")
+            print(f"  Capital: ₹{current_capital:,.2f}")
+        else:
+            print(f"  ⚪ No signal (Price change: {price_change:.2f}%)")
+        
+        return current_capital
+    
     def run_simple_backtest(self, days_back=7, initial_capital=100000):
         """
         Run a simplified backtest using recent data
@@ -157,125 +189,53 @@ class StrategyBacktest:
         # Test with ATM and ATM±1 strikes only (to reduce API calls)
         strikes_to_test = [atm_strike - 50, atm_strike, atm_strike + 50]
         
-        # Get expiry
-        expiry_date = test_date + timedelta(days=(3 - test_date.weekday()) % 7)
-        if expiry_date == test_date and test_date.hour >= 15:
-            expiry_date += timedelta(days=7)
-        expiry_str = expiry_date.strftime("%d-%b-%Y")
+        # Get expiry listed in the instrument master (handles holiday-shifted expiries)
+        expiry_str = nearest_expiry(self.angel.instruments, "NIFTY", now=test_date.replace(hour=9, minute=15))
+        if not expiry_str:
+            expiry_date = test_date + timedelta(days=(3 - test_date.weekday()) % 7)
+            expiry_str = expiry_date.strftime("%d-%b-%Y")
         
         print(f"✓ Testing Expiry: {expiry_str}\n")
         print("="*60)
         
-        # Test each strike
+        from_time = test_date.replace(hour=9, minute=15)
+        to_time = test_date.replace(hour=15, minute=30)
+        
+        # Look up tokens and fetch all candles concurrently (rate limited by the executor)
+        jobs = []
         for strike in strikes_to_test:
-            print(f"\n📊 Testing Strike: {strike}")
-            print("-" * 40)
-            
-            # Test CE option
-            ce_symbol = self.angel._get_option_symbol(strike, "CE", expiry_str)
-            print(f"\n  Testing {ce_symbol}...")
-            
-            # Search for token
-            try:
-                search_result = self.angel.smart_api.searchScrip("NFO", ce_symbol)
+            for option_type in ("CE", "PE"):
+                symbol = self.angel._get_option_symbol(strike, option_type, expiry_str)
+                contract = self.angel.instruments.lookup("NIFTY", expiry_str, strike, option_type)
+                future = None
                 
-                if search_result and search_result.get('status') and search_result.get('data'):
-                    token = search_result['data'][0]['symboltoken']
-                    
-                    # Get historical data
-                    from_time = test_date.replace(hour=9, minute=15)
-                    to_time = test_date.replace(hour=15, minute=30)
-                    
-                    candles = self.get_historical_candles(ce_symbol, token, from_time, to_time)
-                    
-                    if candles and len(candles) >= 2:
-                        # Analyze price movements
-                        entry_price = float(candles[0][4])  # First candle close
-                        high_price = max([float(c[2]) for c in candles])  # Highest high
-                        low_price = min([float(c[3]) for c in candles])  # Lowest low
-                        exit_price = float(candles[-1][4])  # Last candle close
-                        
-                        print(f"  Entry: ₹{entry_price:.2f}")
-                        print(f"  High:  ₹{high_price:.2f}")
-                        print(f"  Low:   ₹{low_price:.2f}")
-                        print(f"  Exit:  ₹{exit_price:.2f}")
-                        
-                        # Check if strategy would have triggered
-                        price_change = ((exit_price - entry_price) / entry_price) * 100
-                        
-                        if abs(price_change) >= 2.0:
-                            # Simulate trade
-                            quantity = 50  # 1 lot
-                            
-                            if price_change <= -2.0:
-                                # BUY signal (price dropped)
-                                trade = self.simulate_trade(entry_price, exit_price, quantity, "BUY", ce_symbol)
-                                print(f"\n  🎯 BUY SIGNAL (Price dropped {abs(price_change):.2f}%)")
-                            else:
-                                # SELL signal (price rose)
-                                trade = self.simulate_trade(entry_price, exit_price, quantity, "SELL", ce_symbol)
-                                print(f"\n  🎯 SELL SIGNAL (Price rose {price_change:.2f}%)")
-                            
-                            current_capital += trade['profit']
-                            print(f"  P&L: ₹{trade['profit']:,.2f} ({trade['profit_percent']:.2f}%)")
-                            print(f"  Capital: ₹{current_capital:,.2f}")
-                        else:
-                            print(f"  ⚪ No signal (Price change: {price_change:.2f}%)")
-                    
-                    time.sleep(1)  # Rate limiting
-                    
-            except Exception as e:
-                print(f"  ❌ Error: {str(e)}")
+                if contract:
+                    symbol = contract['symbol']
+                    future = self.angel.executor.run(
+                        self.get_historical_candles, symbol, contract['token'], from_time, to_time
+                    )
+                
+                jobs.append((strike, option_type, symbol, future))
+        
+        # Test each strike
+        for strike, option_type, symbol, future in jobs:
+            if option_type == "CE":
+                print(f"\n📊 Testing Strike: {strike}")
+                print("-" * 40)
             
-            # Test PE option
-            pe_symbol = self.angel._get_option_symbol(strike, "PE", expiry_str)
-            print(f"\n  Testing {pe_symbol}...")
+            print(f"\n  Testing {symbol}...")
+            
+            if not future:
+                continue
             
             try:
-                search_result = self.angel.smart_api.searchScrip("NFO", pe_symbol)
-                
-                if search_result and search_result.get('status') and search_result.get('data'):
-                    token = search_result['data'][0]['symboltoken']
-                    
-                    from_time = test_date.replace(hour=9, minute=15)
-                    to_time = test_date.replace(hour=15, minute=30)
-                    
-                    candles = self.get_historical_candles(pe_symbol, token, from_time, to_time)
-                    
-                    if candles and len(candles) >= 2:
-                        entry_price = float(candles[0][4])
-                        high_price = max([float(c[2]) for c in candles])
-                        low_price = min([float(c[3]) for c in candles])
-                        exit_price = float(candles[-1][4])
-                        
-                        print(f"  Entry: ₹{entry_price:.2f}")
-                        print(f"  High:  ₹{high_price:.2f}")
-                        print(f"  Low:   ₹{low_price:.2f}")
-                        print(f"  Exit:  ₹{exit_price:.2f}")
-                        
-                        price_change = ((exit_price - entry_price) / entry_price) * 100
-                        
-                        if abs(price_change) >= 2.0:
-                            quantity = 50
-                            
-                            if price_change <= -2.0:
-                                trade = self.simulate_trade(entry_price, exit_price, quantity, "BUY", pe_symbol)
-                                print(f"\n  🎯 BUY SIGNAL (Price dropped {abs(price_change):.2f}%)")
-                            else:
-                                trade = self.simulate_trade(entry_price, exit_price, quantity, "SELL", pe_symbol)
-                                print(f"\n  🎯 SELL SIGNAL (Price rose {price_change:.2f}%)")
-                            
-                            current_capital += trade['profit']
-                            print(f"  P&L: ₹{trade['profit']:,.2f} ({trade['profit_percent']:.2f}%)")
-                            print(f"  Capital: ₹{current_capital:,.2f}")
-                        else:
-                            print(f"  ⚪ No signal (Price change: {price_change:.2f}%)")
-                    
-                    time.sleep(1)
-                    
+                candles = future.result()
+                current_capital = self._evaluate_candles(symbol, candles, current_capital)
             except Exception as e:
                 print(f"  ❌ Error: {str(e)}")
         
+        print(f"\n📦 Candle cache: {self.candle_cache.hits} requests served from cache, {self.candle_cache.fetches} ranges fetched")
+        
         # Print final results
         self.print_results(initial_capital, current_capital)
     
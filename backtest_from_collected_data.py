@@ -1,32 +1,24 @@
 import json
+from collections import deque
 from datetime import datetime
+from snapshot_log import SNAPSHOT_DIR, iter_snapshots
 
 class SimpleBacktest:
     """Backtest strategy using collected historical data"""
     
-    def __init__(self, data_file="options_historical_data.json"):
+    def __init__(self, data_file=SNAPSHOT_DIR):
+        # data_file: snapshot log directory, tick store directory or JSON file
         self.data_file = data_file
         self.trades = []
         self.total_profit = 0
         self.total_loss = 0
         self.winning_trades = 0
         self.losing_trades = 0
-        
-        self.load_data()
+        self.snapshots_processed = 0
     
     def load_data(self):
-        """Load collected historical data"""
-        try:
-            with open(self.data_file, 'r') as f:
-                self.historical_data = json.load(f)
-            print(f"✓ Loaded {len(self.historical_data)} snapshots")
-        except FileNotFoundError:
-            print(f"❌ Data file not found: {self.data_file}")
-            print("💡 Run data_collector.py first to collect data!")
-            self.historical_data = []
-        except Exception as e:
-            print(f"❌ Error loading data: {str(e)}")
-            self.historical_data = []
+        """Stream collected snapshots one at a time (nothing is loaded up front)"""
+        return iter_snapshots(self.data_file)
     
     def find_option(self, snapshot, strike, option_type):
         """Find specific option in snapshot"""
@@ -66,108 +58,141 @@ class SimpleBacktest:
     def run_backtest(self, initial_capital=100000):
         """Run backtest on collected data"""
         
-        if len(self.historical_data) < 2:
-            print("❌ Not enough data to backtest!")
-            print("💡 Need at least 2 snapshots. Run data_collector.py during market hours.")
-            return
-        
         print("\n" + "="*60)
         print("🔬 BACKTESTING WITH COLLECTED DATA")
         print("="*60)
-        print(f"📊 Snapshots: {len(self.historical_data)}")
+        print(f"📂 Data: {self.data_file}")
         print(f"💰 Initial Capital: ₹{initial_capital:,.2f}")
         print(f"📈 Strategy: Buy on 2% drop, Sell on 2% rise")
         print("="*60 + "\n")
         
         current_capital = initial_capital
         
-        # Compare consecutive snapshots
-        for i in range(len(self.historical_data) - 1):
-            prev_snapshot = self.historical_data[i]
-            curr_snapshot = self.historical_data[i + 1]
+        # Sliding window of (prev, curr, next) snapshots: memory stays constant
+        window = deque(maxlen=3)
+        
+        # Only reading the data is guarded; errors in the evaluation surface as they are
+        snapshots = None
+        while True:
+            try:
+                if snapshots is None:
+                    snapshots = self.load_data()
+                snapshot = next(snapshots)
+            except StopIteration:
+                break
+            except FileNotFoundError:
+                print(f"❌ Data file not found: {self.data_file}")
+                print("💡 Run data_collector.py first to collect data!")
+                return
+            except Exception as e:
+                print(f"❌ Error loading data: {str(e)}")
+                return
             
-            prev_time = prev_snapshot.get('collected_at', 'Unknown')
-            curr_time = curr_snapshot.get('collected_at', 'Unknown')
+            window.append(snapshot)
+            self.snapshots_processed += 1
             
-            print(f"\n📅 Comparing: {prev_time} → {curr_time}")
-            print("-" * 60)
+            if len(window) == 3:
+                current_capital = self.evaluate_pair(window[0], window[1], window[2], current_capital)
+        
+        if self.snapshots_processed < 2:
+            print("❌ Not enough data to backtest!")
+            print("💡 Need at least 2 snapshots. Run data_collector.py during market hours.")
+            return
+        
+        # Last pair has no snapshot after it
+        current_capital = self.evaluate_pair(window[-2], window[-1], None, current_capital)
+        
+        print(f"\n📊 Snapshots: {self.snapshots_processed}")
+        
+        # Print results
+        self.print_results(initial_capital, current_capital)
+    
+    def evaluate_pair(self, prev_snapshot, curr_snapshot, next_snapshot, current_capital):
+        """
+        Check every option between two consecutive snapshots for signals
+        
+        Trades exit at the next snapshot's price (None for the last pair).
+        Returns the updated capital.
+        """
+        prev_time = prev_snapshot.get('collected_at', 'Unknown')
+        curr_time = curr_snapshot.get('collected_at', 'Unknown')
+        
+        print(f"\n📅 Comparing: {prev_time} → {curr_time}")
+        print("-" * 60)
+        
+        # Check each option for signals
+        for prev_option in prev_snapshot.get('options', []):
+            strike = prev_option['strike']
+            option_type = prev_option['type']
+            prev_ltp = prev_option['ltp']
             
-            # Check each option for signals
-            for prev_option in prev_snapshot.get('options', []):
-                strike = prev_option['strike']
-                option_type = prev_option['type']
-                prev_ltp = prev_option['ltp']
-                
-                # Find same option in current snapshot
-                curr_option = self.find_option(curr_snapshot, strike, option_type)
-                
-                if not curr_option:
-                    continue
-                
-                curr_ltp = curr_option['ltp']
+            # Find same option in current snapshot
+            curr_option = self.find_option(curr_snapshot, strike, option_type)
+            
+            if not curr_option:
+                continue
+            
+            curr_ltp = curr_option['ltp']
+            
+            # Calculate price change
+            if prev_ltp > 0:
+                price_change = ((curr_ltp - prev_ltp) / prev_ltp) * 100
+            else:
+                continue
+            
+            symbol = f"{option_type} {strike}"
+            
+            # Check strategy conditions
+            if price_change <= -2.0:
+                # BUY signal
+                quantity = 50
                 
-                # Calculate price change
-                if prev_ltp > 0:
-                    price_change = ((curr_ltp - prev_ltp) / prev_ltp) * 100
+                # Simulate holding till next snapshot
+                if next_snapshot:
+                    next_option = self.find_option(next_snapshot, strike, option_type)
+                    
+                    if next_option:
+                        exit_price = next_option['ltp']
+                    else:
+                        exit_price = curr_ltp * 1.01  # Assume 1% profit
                 else:
-                    continue
+                    exit_price = curr_ltp * 1.01
                 
-                symbol = f"{option_type} {strike}"
+                trade = self.simulate_trade(curr_ltp, exit_price, quantity, "BUY", symbol)
                 
-                # Check strategy conditions
-                if price_change <= -2.0:
-                    # BUY signal
-                    quantity = 50
-                    
-                    # Simulate holding till next snapshot
-                    if i + 2 < len(self.historical_data):
-                        next_snapshot = self.historical_data[i + 2]
-                        next_option = self.find_option(next_snapshot, strike, option_type)
-                        
-                        if next_option:
-                            exit_price = next_option['ltp']
-                        else:
-                            exit_price = curr_ltp * 1.01  # Assume 1% profit
-                    else:
-                        exit_price = curr_ltp * 1.01
-                    
-                    trade = self.simulate_trade(curr_ltp, exit_price, quantity, "BUY", symbol)
-                    
-                    print(f"  🎯 BUY {symbol}")
-                    print(f"     Price dropped: {abs(price_change):.2f}%")
-                    print(f"     Entry: ₹{curr_ltp:.2f} → Exit: ₹{exit_price:.2f}")
-                    print(f"     P&L: ₹{trade['profit']:,.2f} ({trade['profit_percent']:.2f}%)")
-                    
-                    current_capital += trade['profit']
-                    print(f"     Capital: ₹{current_capital:,.2f}")
+                print(f"  🎯 BUY {symbol}")
+                print(f"     Price dropped: {abs(price_change):.2f}%")
+                print(f"     Entry: ₹{curr_ltp:.2f} → Exit: ₹{exit_price:.2f}")
+                print(f"     P&L: ₹{trade['profit']:,.2f} ({trade['profit_percent']:.2f}%)")
                 
-                elif price_change >= 2.0:
-                    # SELL signal
-                    quantity = 50
+                current_capital += trade['profit']
+                print(f"     Capital: ₹{current_capital:,.2f}")
+            
+            elif price_change >= 2.0:
+                # SELL signal
+                quantity = 50
+                
+                if next_snapshot:
+                    next_option = self.find_option(next_snapshot, strike, option_type)
                     
-                    if i + 2 < len(self.historical_data):
-                        next_snapshot = self.historical_data[i + 2]
-                        next_option = self.find_option(next_snapshot, strike, option_type)
-                        
-                        if next_option:
-                            exit_price = next_option['ltp']
-                        else:
-                            exit_price = curr_ltp * 0.99
+                    if next_option:
+                        exit_price = next_option['ltp']
                     else:
                         exit_price = curr_ltp * 0.99
-                    
-                    trade = self.simulate_trade(curr_ltp, exit_price, quantity, "SELL", symbol)
-                    
-                    print(f"  🎯 SELL {symbol}")
-                    print(f"     Price rose: {price_change:.2f}%")
-                    print(f"     Entry: ₹{curr_ltp:.2f} → Exit: ₹{exit_price:.2f}")
-                    print(f"     P&L: ₹{trade['profit']:,.2f} ({trade['profit_percent']:.2f}%)")
-                    
-                    current_capital += trade['profit']
-                    print(f"     Capital: ₹{current_capital:,.2f}")
+                else:
+                    exit_price = curr_ltp * 0.99
+                
+                trade = self.simulate_trade(curr_ltp, exit_price, quantity, "SELL", symbol)
+                
+                print(f"  🎯 SELL {symbol}")
+                print(f"     Price rose: {price_change:.2f}%")
+                print(f"     Entry: ₹{curr_ltp:.2f} → Exit: ₹{exit_price:.2f}")
+                print(f"     P&L: ₹{trade['profit']:,.2f} ({trade['profit_percent']:.2f}%)")
+                
+                current_capital += trade['profit']
+                print(f"     Capital: ₹{current_capital:,.2f}")
         
-        # Print results
-        self.print_results(initial_capital, current_capital)
+        return current_capital
     
     def print_results(self, initial_capital, final_capital):
         """Print backtest results"""
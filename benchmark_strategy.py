@@ -0,0 +1,84 @@
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+from strategy import StrategyEngine
+from vector_strategy import VectorStrategyEngine
+import numpy as np
+
+
+class SignalRecorder:
+    """Notifier that keeps every message, minus the wall-clock time line"""
+    
+    def __init__(self):
+        self.messages = []
+    
+    def send_message(self, message):
+        self.messages.append("\n".join(line for line in message.splitlines() if not line.startswith("Time:")))
+        return True
+
+
+def generate_chain(options, snapshots, seed=42):
+    """Random-walk LTPs for `options` contracts (half CE, half PE) over `snapshots` scans"""
+    rng = np.random.default_rng(seed)
+    strikes = np.repeat(np.arange(options // 2) * 50 + 20000, 2)
+    sides = np.tile(np.array(["CE", "PE"]), options // 2)
+    
+    start = rng.uniform(60, 140, strikes.size)
+    steps = rng.normal(0, 2.0, (snapshots, strikes.size))
+    prices = np.round(np.maximum(start + np.cumsum(steps, axis=0), 0.05), 2)
+    
+    # Some contracts without a trade in some scans
+    prices[rng.random(prices.shape) < 0.01] = 0
+    return strikes, sides, prices
+
+
+def run_scalar(strikes, sides, prices):
+    """Feed the chain as option dicts through StrategyEngine"""
+    recorder = SignalRecorder()
+    engine = StrategyEngine(recorder)
+    strike_list = strikes.tolist()
+    side_list = sides.tolist()
+    chains = [
+        {'options': [{'strike': strike, 'type': side, 'ltp': ltp} for strike, side, ltp in zip(strike_list, side_list, row)]}
+        for row in prices.tolist()
+    ]
+    
+    started = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        for chain in chains:
+            engine.process_options(chain)
+    return time.perf_counter() - started, recorder.messages
+
+
+def run_vector(strikes, sides, prices):
+    """Feed the chain as arrays through VectorStrategyEngine"""
+    recorder = SignalRecorder()
+    engine = VectorStrategyEngine(recorder)
+    
+    started = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        for row in prices:
+            engine.process_arrays(strikes, sides, row)
+    return time.perf_counter() - started, recorder.messages
+
+
+def main():
+    """Benchmark: python benchmark_strategy.py [snapshots]"""
+    snapshots = int(sys.argv[1]) if len(sys.argv) > 1 else 375
+    
+    print(f"{'Options':>8} {'Scalar':>10} {'Vector':>10} {'Speedup':>8} {'Signals':>8}  Match")
+    for options in (100, 1000, 10000):
+        strikes, sides, prices = generate_chain(options, snapshots)
+        scalar_time, scalar_signals = run_scalar(strikes, sides, prices)
+        vector_time, vector_signals = run_vector(strikes, sides, prices)
+        
+        match = "✅" if scalar_signals == vector_signals else "❌"
+        print(f"{options:>8} {scalar_time:>9.3f}s {vector_time:>9.3f}s {scalar_time / vector_time:>7.1f}x "
+              f"{len(scalar_signals):>8}  {match}")
+    
+    print(f"\n({snapshots} snapshots per run)")
+
+
+if __name__ == "__main__":
+    main()
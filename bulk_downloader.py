@@ -0,0 +1,236 @@
+import os
+import json
+import argparse
+from concurrent.futures import as_completed
+from datetime import datetime, timedelta
+from angel_api import AngelOneAPI, NIFTY_TOKEN
+from candle_cache import CandleCache, CANDLE_CACHE_FILE, fetch_candles
+from strike_ladder import STRIKE_STEP
+
+CHECKPOINT_FILE = "bulk_download_checkpoint.jsonl"
+
+# Longest range getCandleData returns per request, in days, for each interval
+MAX_DAYS_PER_REQUEST = {
+    'ONE_MINUTE': 30,
+    'THREE_MINUTE': 60,
+    'FIVE_MINUTE': 100,
+    'TEN_MINUTE': 100,
+    'FIFTEEN_MINUTE': 200,
+    'THIRTY_MINUTE': 200,
+    'ONE_HOUR': 400,
+    'ONE_DAY': 2000,
+}
+
+
+class BulkDownloader:
+    """
+    Downloads option candles for every listed expiry and strike near ATM
+
+    Plans one job per (expiry, strike, side, date chunk) from the instrument
+    master, runs them on the shared executor (so getCandleData's rate limits
+    apply) and writes the candles into the candle cache that backtests read.
+    Finished jobs are appended to a checkpoint file, so an interrupted run
+    picks up where it stopped.
+    """
+    
+    def __init__(self, angel_api, cache_file=CANDLE_CACHE_FILE, checkpoint_file=CHECKPOINT_FILE):
+        self.angel = angel_api
+        self.cache = CandleCache(cache_file)
+        self.checkpoint_file = checkpoint_file
+    
+    def load_checkpoint(self):
+        """Keys of jobs finished by earlier runs"""
+        done = set()
+        if not os.path.exists(self.checkpoint_file):
+            return done
+        
+        with open(self.checkpoint_file, 'r') as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)['key'])
+                except (ValueError, KeyError):
+                    # Partial line from an interrupted write
+                    continue
+        return done
+    
+    def spot_by_day(self, start, end):
+        """Nifty daily closes for the window {date: close}, via the candle cache"""
+        candles = self.cache.get_candles(
+            "NSE", NIFTY_TOKEN, "ONE_DAY", start, end,
+            lambda gap_from, gap_to: fetch_candles(self.angel, "NSE", NIFTY_TOKEN, "ONE_DAY", gap_from, gap_to)
+        ) or []
+        return {datetime.fromisoformat(candle[0][:10]).date(): float(candle[4]) for candle in candles}
+    
+    def plan(self, days_back=90, strikes_each_side=10, interval="FIVE_MINUTE", max_expiries=None, underlying="NIFTY"):
+        """
+        Build the job list
+
+        Each listed expiry is covered from the start of the window to its expiry
+        (or today), for every strike within ATM ± strikes_each_side of any
+        day's close in that range.
+        """
+        today = datetime.now().date()
+        window_start = today - timedelta(days=days_back)
+        
+        spots = self.spot_by_day(
+            datetime.combine(window_start, datetime.min.time()).replace(hour=9, minute=15),
+            datetime.combine(today, datetime.min.time()).replace(hour=15, minute=30)
+        )
+        if not spots:
+            # No index history: centre every expiry on the current spot
+            spot_price = self.angel.get_nifty_spot_price()
+            if not spot_price:
+                print("❌ Cannot plan without a Nifty spot price")
+                return []
+            spots = {today: spot_price}
+        
+        chunk_days = MAX_DAYS_PER_REQUEST.get(interval, 30)
+        expiries = [expiry for expiry in self.angel.instruments.get_expiries(underlying) if expiry >= window_start]
+        if max_expiries:
+            expiries = expiries[:max_expiries]
+        
+        jobs = []
+        for expiry_date in expiries:
+            expiry = expiry_date.strftime("%d-%b-%Y")
+            last_day = min(expiry_date, today)
+            
+            # Every strike that was near the money on some day of the contract's range
+            closes = [close for day, close in spots.items() if window_start <= day <= last_day] or list(spots.values())
+            strikes = set()
+            for close in closes:
+                atm = round(close / STRIKE_STEP) * STRIKE_STEP
+                strikes.update(atm + (i * STRIKE_STEP) for i in range(-strikes_each_side, strikes_each_side + 1))
+            
+            for strike in sorted(strikes):
+                for option_type in ("CE", "PE"):
+                    contract = self.angel.instruments.lookup(underlying, expiry, strike, option_type)
+                    if not contract:
+                        continue
+                    
+                    chunk_start = window_start
+                    while chunk_start <= last_day:
+                        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), last_day)
+                        from_date = datetime.combine(chunk_start, datetime.min.time()).replace(hour=9, minute=15)
+                        to_date = datetime.combine(chunk_end, datetime.min.time()).replace(hour=15, minute=30)
+                        
+                        jobs.append({
+                            'key': f"{contract['token']}:{interval}:{from_date:%Y-%m-%d}:{to_date:%Y-%m-%d}",
+                            'expiry': expiry,
+                            'strike': strike,
+                            'type': option_type,
+                            'token': contract['token'],
+                            'symbol': contract['symbol'],
+                            'interval': interval,
+                            'from': from_date,
+                            'to': to_date
+                        })
+                        chunk_start = chunk_end + timedelta(days=1)
+        
+        return jobs
+    
+    def _run_job(self, job):
+        """Fetch (only the uncached part of) one job; candle count, or None on failure"""
+        candles = self.cache.get_candles(
+            "NFO", job['token'], job['interval'], job['from'], job['to'],
+            lambda gap_from, gap_to: fetch_candles(self.angel, "NFO", job['token'], job['interval'], gap_from, gap_to)
+        )
+        return None if candles is None else len(candles)
+    
+    def run(self, jobs):
+        """Run the planned jobs concurrently, skipping those already checkpointed"""
+        done = self.load_checkpoint()
+        pending = [job for job in jobs if job['key'] not in done]
+        
+        print(f"📋 Jobs: {len(jobs)} planned, {len(jobs) - len(pending)} already done, {len(pending)} to run")
+        
+        completed = 0
+        failed = 0
+        candles_total = 0
+        today = datetime.now().date()
+        
+        with open(self.checkpoint_file, 'a') as checkpoint:
+            futures = {self.angel.executor.run(self._run_job, job): job for job in pending}
+            
+            try:
+                for future in as_completed(futures):
+                    job = futures[future]
+                    try:
+                        candles = future.result()
+                    except Exception as e:
+                        print(f"  ❌ {job['symbol']} {job['from']:%Y-%m-%d}: {str(e)}")
+                        candles = None
+                    
+                    if candles is None:
+                        failed += 1
+                        continue
+                    
+                    completed += 1
+                    candles_total += candles
+                    
+                    # Ranges reaching today aren't final; they run again next time
+                    if job['to'].date() < today:
+                        checkpoint.write(json.dumps({'key': job['key'], 'candles': candles}) + "\n")
+                        checkpoint.flush()
+                    
+                    if completed % 50 == 0:
+                        print(f"  ✓ {completed}/{len(pending)} jobs, {candles_total} candles")
+                        
+            except KeyboardInterrupt:
+                print("\n🛑 Interrupted; finished jobs are checkpointed, rerun to resume")
+                for future in futures:
+                    future.cancel()
+        
+        print(f"\n✅ Completed: {completed}, Failed: {failed}, Candles: {candles_total}")
+        print(f"📦 Candle cache: {self.cache.fetches} ranges fetched")
+        for endpoint, stats in self.angel.executor.stats().items():
+            print(f"📡 {endpoint}: {stats['calls']} calls, {stats['throttled_seconds']}s throttled")
+        
+        return completed, failed
+
+
+def main():
+    """Download option candles into the candle cache"""
+    parser = argparse.ArgumentParser(description="Bulk download Nifty option candles into the candle cache")
+    parser.add_argument("--days", type=int, default=90, help="days of history (default 90)")
+    parser.add_argument("--strikes", type=int, default=10, help="strikes each side of ATM (default 10)")
+    parser.add_argument("--interval", default="FIVE_MINUTE", choices=sorted(MAX_DAYS_PER_REQUEST))
+    parser.add_argument("--expiries", type=int, default=None, help="limit to the N nearest listed expiries")
+    parser.add_argument("--dry-run", action="store_true", help="plan and print the job count only")
+    args = parser.parse_args()
+    
+    # Get credentials
+    ANGEL_API_KEY = os.getenv('ANGEL_API_KEY')
+    ANGEL_CLIENT_ID = os.getenv('ANGEL_CLIENT_ID')
+    ANGEL_PASSWORD = os.getenv('ANGEL_PASSWORD')
+    ANGEL_TOTP_SECRET = os.getenv('ANGEL_TOTP_SECRET')
+    
+    if not all([ANGEL_API_KEY, ANGEL_CLIENT_ID, ANGEL_PASSWORD, ANGEL_TOTP_SECRET]):
+        print("❌ Missing Angel One credentials!")
+        return
+    
+    print("Connecting to Angel One...")
+    angel = AngelOneAPI(
+        api_key=ANGEL_API_KEY,
+        client_id=ANGEL_CLIENT_ID,
+        password=ANGEL_PASSWORD,
+        totp_secret=ANGEL_TOTP_SECRET
+    )
+    
+    downloader = BulkDownloader(angel)
+    jobs = downloader.plan(
+        days_back=args.days,
+        strikes_each_side=args.strikes,
+        interval=args.interval,
+        max_expiries=args.expiries
+    )
+    
+    expiries = len({job['expiry'] for job in jobs})
+    contracts = len({job['token'] for job in jobs})
+    print(f"🗓️  {expiries} expiries, {contracts} contracts, {len(jobs)} jobs ({args.interval})")
+    
+    if not args.dry_run:
+        downloader.run(jobs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import sqlite3
+import threading
+from datetime import datetime, timedelta, time as dt_time
+
+CANDLE_CACHE_FILE = "candle_cache.db"
+
+# Candle timestamps are stored as "YYYY-MM-DD HH:MM" (exchange local time)
+TS_FORMAT = "%Y-%m-%d %H:%M"
+
+# Gaps with no session minutes (nights, weekends) are never fetched
+SESSION_START = dt_time(9, 15)
+SESSION_END = dt_time(15, 30)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candles (
+    exchange TEXT NOT NULL,
+    token TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    raw_ts TEXT NOT NULL,
+    open REAL, high REAL, low REAL, close REAL, volume INTEGER,
+    PRIMARY KEY (exchange, token, interval, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    exchange TEXT NOT NULL,
+    token TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    start TEXT NOT NULL,
+    end TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_coverage ON coverage (exchange, token, interval, start);
+"""
+
+
+def _has_session(start, end):
+    """Check a range overlaps market hours on at least one weekday"""
+    day = start.date()
+    while day <= end.date():
+        if day.weekday() < 5:
+            session_start = datetime.combine(day, SESSION_START)
+            session_end = datetime.combine(day, SESSION_END)
+            if start <= session_end and end >= session_start:
+                return True
+        day += timedelta(days=1)
+    return False
+
+
+def fetch_candles(angel, exchange, token, interval, from_date, to_date):
+    """Call getCandleData for one range: list of candles, or None on failure"""
+    params = {
+        "exchange": exchange,
+        "symboltoken": token,
+        "interval": interval,
+        "fromdate": from_date.strftime("%Y-%m-%d %H:%M"),
+        "todate": to_date.strftime("%Y-%m-%d %H:%M")
+    }
+    
+    data = angel.executor.call('getCandleData', angel.smart_api.getCandleData, params)
+    
+    if data and data.get('status'):
+        return data.get('data') or []
+    return None
+
+
+class CandleCache:
+    """
+    Persistent cache for getCandleData, keyed by (exchange, token, interval, time range)
+
+    Fetched candles are stored per bar and the ranges already fetched are kept
+    as merged coverage intervals, so any request overlapping earlier ones only
+    fetches the missing pieces. Past sessions never change; today is never
+    marked as covered, so it's fetched again on every request.
+    """
+    
+    def __init__(self, db_file=CANDLE_CACHE_FILE):
+        self.db_file = db_file
+        # Shared by the backtest's fetch threads; every access holds the lock
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        
+        self.hits = 0  # Requests served without a fetch
+        self.fetches = 0  # Gaps fetched from the API
+    
+    def _covered(self, key, start, end):
+        """Coverage intervals overlapping [start, end], sorted"""
+        rows = self.conn.execute(
+            "SELECT start, end FROM coverage WHERE exchange = ? AND token = ? AND interval = ? "
+            "AND start <= ? AND end >= ? ORDER BY start",
+            (*key, end.strftime(TS_FORMAT), start.strftime(TS_FORMAT))
+        ).fetchall()
+        return [(datetime.strptime(a, TS_FORMAT), datetime.strptime(b, TS_FORMAT)) for a, b in rows]
+    
+    def missing_ranges(self, exchange, token, interval, start, end):
+        """Sub-ranges of [start, end] not yet fetched that contain market hours"""
+        key = (exchange, str(token), interval)
+        with self.lock:
+            covered = self._covered(key, start, end)
+        
+        gaps = []
+        cursor = start
+        for covered_start, covered_end in covered:
+            if covered_start > cursor:
+                gaps.append((cursor, covered_start))
+            cursor = max(cursor, covered_end)
+        if not covered or cursor < end:
+            gaps.append((cursor, end))
+        
+        return [(a, b) for a, b in gaps if _has_session(a, b)]
+    
+    def _mark_covered(self, key, start, end):
+        """Add [start, end] to the coverage, merging with overlapping intervals"""
+        for covered_start, covered_end in self._covered(key, start, end):
+            start = min(start, covered_start)
+            end = max(end, covered_end)
+        
+        self.conn.execute(
+            "DELETE FROM coverage WHERE exchange = ? AND token = ? AND interval = ? AND start <= ? AND end >= ?",
+            (*key, end.strftime(TS_FORMAT), start.strftime(TS_FORMAT))
+        )
+        self.conn.execute(
+            "INSERT INTO coverage (exchange, token, interval, start, end) VALUES (?, ?, ?, ?, ?)",
+            (*key, start.strftime(TS_FORMAT), end.strftime(TS_FORMAT))
+        )
+    
+    def store(self, exchange, token, interval, start, end, candles):
+        """Save fetched candles and mark the range covered (up to the start of today)"""
+        key = (exchange, str(token), interval)
+        rows = [
+            (*key, candle[0][:16].replace("T", " "), candle[0], *candle[1:6])
+            for candle in candles
+        ]
+        
+        today = datetime.combine(datetime.now().date(), dt_time(0, 0))
+        covered_end = min(end, today - timedelta(minutes=1))
+        
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO candles (exchange, token, interval, ts, raw_ts, open, high, low, close, volume) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            if covered_end >= start:
+                self._mark_covered(key, start, covered_end)
+    
+    def read(self, exchange, token, interval, start, end):
+        """Cached candles in [start, end] in getCandleData's format"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT raw_ts, open, high, low, close, volume FROM candles "
+                "WHERE exchange = ? AND token = ? AND interval = ? AND ts >= ? AND ts <= ? ORDER BY ts",
+                (exchange, str(token), interval, start.strftime(TS_FORMAT), end.strftime(TS_FORMAT))
+            ).fetchall()
+        return [list(row) for row in rows]
+    
+    def get_candles(self, exchange, token, interval, start, end, fetch):
+        """
+        Get candles for [start, end], fetching only the ranges not cached yet
+
+        Args:
+            fetch: fetch(from_dt, to_dt) -> list of candles, or None on failure
+
+        Returns:
+            List of candles, or None if a needed fetch failed
+        """
+        # Bars are per minute at most; seconds would leave slivers uncovered
+        start = start.replace(second=0, microsecond=0)
+        end = end.replace(second=0, microsecond=0)
+        
+        gaps = self.missing_ranges(exchange, token, interval, start, end)
+        with self.lock:
+            if not gaps:
+                self.hits += 1
+            self.fetches += len(gaps)
+        
+        for gap_start, gap_end in gaps:
+            candles = fetch(gap_start, gap_end)
+            if candles is None:
+                return None
+            self.store(exchange, token, interval, gap_start, gap_end, candles)
+        
+        return self.read(exchange, token, interval, start, end)
+    
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,132 @@
+import sys
+import time
+import threading
+from datetime import datetime
+from SmartApi.smartWebSocketV2 import SmartWebSocketV2
+from angel_api import NIFTY_TOKEN
+from strategy import StrategyEngine
+from strike_ladder import StrikeLadder, STRIKE_STEP
+from telegram_bot import RecordingNotifier
+from tick_stream import TickStreamer, LADDER_MODE
+from tick_replay_server import TickReplayServer
+
+# How long to wait for the streamer to work through the replay (seconds)
+TIMEOUT = 15
+
+
+class StandInInstruments:
+    """Instrument master stand-in: every strike listed, token = strike * 10 (+1 for PE)"""
+    
+    def lookup(self, underlying, expiry, strike, option_type):
+        return {'token': option_token(strike, option_type), 'symbol': f"{underlying}{strike}{option_type}"}
+
+
+class StandInAngel:
+    """Just what TickStreamer uses of AngelOneAPI, with no login or REST calls"""
+    
+    auth_token = "stand-in-jwt"
+    api_key = "stand-in-key"
+    client_id = "STANDIN"
+    feed_token = "stand-in-feed-token"
+    
+    def __init__(self, spot_price):
+        self.spot_price = spot_price
+        self.ladder = StrikeLadder(StandInInstruments(), spot_price, datetime.now().strftime("%d-%b-%Y"))
+    
+    def get_nifty_spot_price(self):
+        return self.spot_price
+    
+    def get_atm_strike(self, spot_price):
+        return round(spot_price / STRIKE_STEP) * STRIKE_STEP
+    
+    def get_ladder(self, atm_strike, strikes_each_side=5):
+        return self.ladder
+
+
+def option_token(strike, option_type):
+    return str(strike * 10 + (option_type == "PE"))
+
+
+def spot_tick(price):
+    return {'token': NIFTY_TOKEN, 'subscription_mode': SmartWebSocketV2.LTP_MODE,
+            'exchange_type': SmartWebSocketV2.NSE_CM, 'last_traded_price': int(price * 100)}
+
+
+def option_tick(strike, option_type, price, oi):
+    return {'token': option_token(strike, option_type), 'subscription_mode': LADDER_MODE,
+            'exchange_type': SmartWebSocketV2.NSE_FO, 'last_traded_price': int(price * 100),
+            'volume_trade_for_the_day': 1000, 'open_interest': oi}
+
+
+def scenario():
+    """
+    Ticks for: a CE qualify → entry → target at ATM 23500, then spot moving
+    ATM to 23600 and a PE on a newly subscribed strike qualify → entry → stop.
+    A tick for a strike that left the ladder comes last and must be ignored.
+    Returns the ticks and how many of them the strategy should see.
+    """
+    ticks = [spot_tick(23510)]
+    ticks += [option_tick(23500, "CE", price, 5000 + i) for i, price in enumerate((95, 90, 101, 116))]
+    ticks.append(spot_tick(23620))
+    ticks += [option_tick(23850, "PE", price, 7000 + i) for i, price in enumerate((90, 100.5, 88))]
+    ticks.append(option_tick(23250, "CE", 120, 9000))
+    return ticks, 7
+
+
+def check(name, passed, detail=""):
+    print(f"{'✅' if passed else '❌'} {name}{f': {detail}' if detail and not passed else ''}")
+    return passed
+
+
+def main():
+    """Stream a scripted session from a local replay server through TickStreamer and check the outcome"""
+    ticks, expected = scenario()
+    server = TickReplayServer(ticks)
+    url = server.start()
+    
+    notifier = RecordingNotifier()
+    strategy = StrategyEngine(notifier)
+    open_interest = []
+    strategy.add_diff_listener(lambda diff: open_interest.extend(diff.snapshot.ois))
+    
+    streamer = TickStreamer(StandInAngel(23510), strategy, ws_url=url)
+    thread = threading.Thread(target=streamer.run, daemon=True)
+    thread.start()
+    
+    deadline = time.monotonic() + TIMEOUT
+    while streamer.ticks_processed < expected and time.monotonic() < deadline:
+        time.sleep(0.05)
+    time.sleep(0.2)  # Let a stray extra tick show up if there is one
+    streamer.stop()
+    thread.join(5)
+    server.stop()
+    
+    print("\n" + "=" * 60)
+    print("📡 TICK STREAM CHECK")
+    print("=" * 60)
+    
+    headings = [message.splitlines()[0] for message in notifier.messages]
+    strikes = [line for message in notifier.messages for line in message.splitlines() if line.startswith("Strike:")]
+    old_ladder = {option_token(strike, option_type) for strike in range(23250, 23751, 50) for option_type in ("CE", "PE")}
+    new_ladder = {option_token(strike, option_type) for strike in range(23350, 23851, 50) for option_type in ("CE", "PE")}
+    ladder_requests = [(request['action'], set(request['params']['tokenList'][0]['tokens']))
+                       for request in server.requests if request['correlationID'] == "ladder"]
+    
+    results = [
+        check("Ticks processed", streamer.ticks_processed == expected, f"{streamer.ticks_processed}/{expected}"),
+        check("Feed token sent on connect", server.headers and server.headers[0].get('x-feed-token') == StandInAngel.feed_token),
+        check("Entries and exits", headings == ["🚀 ENTRY SIGNAL", "✅ TARGET HIT", "🚀 ENTRY SIGNAL", "❌ STOP LOSS HIT"], headings),
+        check("Traded strikes", strikes == ["Strike: 23500 CE"] * 2 + ["Strike: 23850 PE"] * 2, strikes),
+        check("Ladder subscribed for ATM 23500", ladder_requests[:1] == [(1, old_ladder)], ladder_requests[:1]),
+        check("ATM shift re-subscribes only the difference",
+              ladder_requests[1:] == [(0, old_ladder - new_ladder), (1, new_ladder - old_ladder)], ladder_requests[1:]),
+        check("Subscription follows ATM 23600", server.subscribed.get(LADDER_MODE) == new_ladder),
+        check("Open interest from SNAP_QUOTE packets", open_interest == [5000, 5001, 5002, 5003, 7000, 7001, 7002], open_interest)
+    ]
+    print("=" * 60)
+    
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 import os
-import json
 from datetime import datetime
 import time
 from angel_api import AngelOneAPI
+from snapshot_log import SnapshotLog, SNAPSHOT_DIR, count_snapshots
+from tick_store import TickStoreWriter, TICK_STORE_DIR
+from tick_db import TickDatabase
+from snapshot_codec import CodecWriter, CODEC_DIR
+from snapshot_writer import BackgroundWriter
 
 class OptionsDataCollector:
     """
@@ -10,24 +14,34 @@ class OptionsDataCollector:
     Run this during market hours to build your own historical database
     """
     
-    def __init__(self, angel_api):
+    def __init__(self, angel_api, data_dir=SNAPSHOT_DIR, tick_store_dir=TICK_STORE_DIR, codec_dir=CODEC_DIR, db_file=None):
         self.angel = angel_api
-        self.data_file = "options_historical_data.json"
-        self.load_existing_data()
-    
-    def load_existing_data(self):
-        """Load existing historical data"""
-        try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r') as f:
-                    self.historical_data = json.load(f)
-                print(f"✓ Loaded {len(self.historical_data)} existing records")
-            else:
-                self.historical_data = []
-                print("✓ Starting fresh data collection")
-        except Exception as e:
-            print(f"⚠ Error loading data: {str(e)}")
-            self.historical_data = []
+        self.data_dir = data_dir
+        
+        # Append-only per-day log; nothing is held in memory
+        self.log = SnapshotLog(data_dir)
+        
+        # Every snapshot goes to each writer (tick_store_dir=None to skip the columnar store)
+        self.writers = [self.log]
+        if tick_store_dir:
+            self.writers.append(TickStoreWriter(tick_store_dir))
+        
+        # Compact delta-encoded binary copy (codec_dir=None to skip)
+        if codec_dir:
+            self.writers.append(CodecWriter(codec_dir))
+        
+        # Optional SQLite database for ad-hoc queries (see tick_query.py)
+        if db_file:
+            self.writers.append(TickDatabase(db_file))
+        
+        # Writes happen on a background thread fed by a bounded queue
+        self.writer = BackgroundWriter(self.writers)
+        
+        total = count_snapshots(data_dir)
+        if total:
+            print(f"✓ Found {total} existing snapshots")
+        else:
+            print("✓ Starting fresh data collection")
     
     def collect_snapshot(self):
         """Collect current options data snapshot"""
@@ -41,15 +55,11 @@ class OptionsDataCollector:
                 # Add timestamp
                 option_data['collected_at'] = datetime.now().isoformat()
                 
-                # Save to historical data
-                self.historical_data.append(option_data)
+                # Hand off to the writer thread (serialization and disk I/O happen there)
+                if not self.writer.put(option_data):
+                    return False
                 
-                # Save to file
-                with open(self.data_file, 'w') as f:
-                    json.dump(self.historical_data, f, indent=2)
-                
-                print(f"✓ Saved snapshot with {len(option_data['options'])} options")
-                print(f"✓ Total snapshots: {len(self.historical_data)}")
+                print(f"✓ Queued snapshot with {len(option_data)} options")
                 
                 return True
             else:
@@ -73,32 +83,62 @@ class OptionsDataCollector:
         print("="*60)
         print(f"⏱️  Collection Interval: {interval_seconds} seconds")
         print(f"⏰ Duration: {duration_hours} hours")
-        print(f"💾 Saving to: {self.data_file}")
+        print(f"💾 Saving to: {', '.join(writer.location for writer in self.writers)}")
         print("="*60 + "\n")
         
         start_time = datetime.now()
         end_time = start_time.replace(hour=15, minute=30)  # Market close
         
         snapshots_collected = 0
+        missed_slots = 0
+        
+        # Collections are scheduled on a fixed monotonic grid, so a slow fetch
+        # doesn't push every later sample back
+        next_run = time.monotonic()
         
         try:
             while datetime.now() < end_time:
                 if self.collect_snapshot():
                     snapshots_collected += 1
                 
-                print(f"⏳ Next collection in {interval_seconds} seconds...")
+                next_run += interval_seconds
+                now = time.monotonic()
+                if now > next_run:
+                    # Overran one or more slots: skip them rather than bursting
+                    skipped = int((now - next_run) // interval_seconds) + 1
+                    missed_slots += skipped
+                    next_run += skipped * interval_seconds
+                    print(f"⚠ Collection overran, skipped {skipped} slot(s)")
+                
+                print(f"⏳ Next collection in {next_run - now:.1f} seconds...")
                 print(f"📈 Snapshots today: {snapshots_collected}")
                 
-                time.sleep(interval_seconds)
+                time.sleep(max(0, next_run - time.monotonic()))
                 
         except KeyboardInterrupt:
             print("\n\n🛑 Collection stopped by user")
+        finally:
+            print("💾 Writing queued snapshots...")
+            self.writer.close()
         
         print("\n" + "="*60)
         print("✅ DATA COLLECTION COMPLETED")
         print("="*60)
         print(f"📊 Total snapshots collected: {snapshots_collected}")
-        print(f"💾 Data saved to: {self.data_file}")
+        print(f"💾 Data saved to: {', '.join(writer.location for writer in self.writers)}")
+        if missed_slots:
+            print(f"⚠️  Missed collection slots: {missed_slots}")
+        
+        # Writer backpressure: a high-water mark near the queue size or any put
+        # wait means storage isn't keeping up with collection
+        stats = self.writer.stats()
+        print(f"🧵 Writer: {stats['written']} written in {stats['batches']} batches ({stats['write_seconds']}s), "
+              f"queue high-water {stats['high_water']}/{stats['queue_size']}, "
+              f"put wait {stats['put_wait_seconds']}s, {stats['dropped']} dropped, {stats['errors']} errors")
+        
+        # API usage through the shared rate-limited executor
+        for endpoint, stats in self.angel.executor.stats().items():
+            print(f"📡 {endpoint}: {stats['calls']} calls, {stats['throttled_seconds']}s throttled")
         print("="*60 + "\n")
 
 
@@ -125,7 +165,7 @@ def main():
     )
     
     # Initialize collector
-    collector = OptionsDataCollector(angel)
+    collector = OptionsDataCollector(angel, db_file=os.getenv('TICK_DB_FILE'))
     
     # Run collection (every 1 minute during market hours)
     collector.run_collection(
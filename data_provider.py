@@ -0,0 +1,121 @@
+import time
+from datetime import datetime
+from snapshot_log import SNAPSHOT_DIR, load_snapshots
+from option_model import ChainSnapshot
+
+
+class SystemClock:
+    """Wall clock used by the live scanner"""
+    
+    def now(self):
+        return datetime.now()
+    
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class SimulatedClock:
+    """
+    Clock driven by replayed data
+
+    Time moves to each replayed snapshot's timestamp. With a speed set, moving
+    forward waits (gap / speed) of wall time; with speed=None it never waits.
+    """
+    
+    def __init__(self, start=None, speed=None):
+        self.current = start or datetime.now()
+        self.speed = speed
+    
+    def now(self):
+        return self.current
+    
+    def sleep(self, seconds):
+        # Time advances with the replayed snapshots, not with the scan interval
+        pass
+    
+    def advance_to(self, moment):
+        if self.speed and moment > self.current:
+            time.sleep((moment - self.current).total_seconds() / self.speed)
+        self.current = moment
+
+
+class MarketDataProvider:
+    """
+    Interface shared by every market data source the scanner can run on
+
+    get_chain() returns a ChainSnapshot (see option_model.py; it also reads like
+    the old chain dict: 'spot_price', 'atm_strike', 'expiry', 'options',
+    'timestamp') or None on failure.
+    """
+    
+    exhausted = False  # True once a finite source (e.g. a replay) has no more data
+    
+    def get_spot(self):
+        raise NotImplementedError
+    
+    def get_chain(self):
+        raise NotImplementedError
+    
+    def reconnect(self):
+        """Recover after repeated failures; sources without a session have nothing to do"""
+        return True
+    
+    def stream(self, interval=60, clock=None):
+        """Yield option chains by polling get_chain() every interval seconds"""
+        clock = clock or SystemClock()
+        while not self.exhausted:
+            chain = self.get_chain()
+            if chain:
+                yield chain
+            clock.sleep(interval)
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Replays recorded option chain snapshots (a snapshot log directory or a JSON file)
+
+    Each get_chain() returns the next snapshot and moves the injected clock to
+    its timestamp, so the live loop can be load-tested and profiled offline.
+    speed: 1 = real time, N = N× faster, None = as fast as possible.
+    """
+    
+    def __init__(self, data_file=SNAPSHOT_DIR, speed=None, clock=None):
+        self.data_file = data_file
+        
+        self.snapshots = load_snapshots(data_file)
+        
+        self.position = 0
+        self.current = None
+        self.clock = clock or SimulatedClock(start=self._timestamp(self.snapshots[0]) if self.snapshots else None, speed=speed)
+    
+    def _timestamp(self, snapshot):
+        return datetime.fromisoformat(snapshot.get('collected_at') or snapshot['timestamp'])
+    
+    @property
+    def exhausted(self):
+        return self.position >= len(self.snapshots)
+    
+    def get_chain(self):
+        if self.exhausted:
+            return None
+        
+        snapshot = self.snapshots[self.position]
+        self.position += 1
+        
+        if isinstance(self.clock, SimulatedClock):
+            self.clock.advance_to(self._timestamp(snapshot))
+        
+        # Recorded data comes back as dicts; hand out the same model live providers do
+        if not isinstance(snapshot, ChainSnapshot):
+            snapshot = ChainSnapshot.from_dict(snapshot)
+        
+        self.current = snapshot
+        return snapshot
+    
+    def get_spot(self):
+        return self.current['spot_price'] if self.current else None
+    
+    def stream(self, interval=None, clock=None):
+        """Yield every recorded snapshot, paced by the replay clock"""
+        while not self.exhausted:
+            yield self.get_chain()
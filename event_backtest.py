@@ -0,0 +1,208 @@
+import os
+import sys
+import json
+import time
+import argparse
+from contextlib import redirect_stdout
+from datetime import datetime
+from data_provider import SimulatedClock
+from option_model import ChainSnapshot
+from scanner import is_trading_hours
+from snapshot_log import SNAPSHOT_DIR, iter_snapshots
+from strategy import StrategyEngine, StrategyParams
+from strategy_runner import load_params
+from telegram_bot import RecordingNotifier, PrefixedNotifier
+
+
+def snapshot_time(snapshot):
+    """When a snapshot was collected"""
+    return datetime.fromisoformat(snapshot.get('collected_at') or snapshot['timestamp'])
+
+
+def iter_history(path, trading_hours_only=True):
+    """
+    (time, snapshot) for every collected snapshot the live scanner would have seen
+
+    Streams from any collected format (see iter_snapshots); snapshots outside
+    trading hours are skipped, as the live scanner doesn't scan then.
+    """
+    for snapshot in iter_snapshots(path):
+        moment = snapshot_time(snapshot)
+        if trading_hours_only and not is_trading_hours(moment):
+            continue
+        yield moment, snapshot
+
+
+def load_history(path, trading_hours_only=True):
+    """iter_history() as a list of (time, ChainSnapshot), for running many backtests on one load"""
+    return [
+        (moment, snapshot if isinstance(snapshot, ChainSnapshot) else ChainSnapshot.from_dict(snapshot))
+        for moment, snapshot in iter_history(path, trading_hours_only)
+    ]
+
+
+def summarize(trades):
+    """P&L statistics for a list of closed trades (StrategyEngine trade dicts)"""
+    gross_profit = sum(trade['pnl'] for trade in trades if trade['pnl'] > 0)
+    gross_loss = -sum(trade['pnl'] for trade in trades if trade['pnl'] <= 0)
+    wins = sum(1 for trade in trades if trade['pnl'] > 0)
+    
+    # Largest fall of cumulative P&L from its running peak
+    equity = peak = max_drawdown = 0
+    for trade in trades:
+        equity += trade['pnl']
+        peak = max(peak, equity)
+        max_drawdown = max(max_drawdown, peak - equity)
+    
+    if gross_loss:
+        profit_factor = gross_profit / gross_loss
+    else:
+        profit_factor = float('inf') if gross_profit else 0
+    
+    return {
+        'trades': len(trades),
+        'wins': wins,
+        'losses': len(trades) - wins,
+        'win_rate': wins / len(trades) * 100 if trades else 0,
+        'net_pnl': gross_profit - gross_loss,
+        'gross_profit': gross_profit,
+        'gross_loss': gross_loss,
+        'profit_factor': profit_factor,
+        'max_drawdown': max_drawdown
+    }
+
+
+class BacktestRun:
+    """One strategy variant in a backtest: its engine, the alerts it sent and its closed trades"""
+    
+    def __init__(self, params, clock, engine_class=StrategyEngine, prefixed=False):
+        self.params = params
+        self.notifier = RecordingNotifier()
+        # Several variants are tagged with their name, as create_strategy does live
+        notifier = PrefixedNotifier(self.notifier, params.name) if prefixed else self.notifier
+        self.engine = engine_class(notifier, params, None, clock)
+        self.trades = []
+        self.engine.add_trade_listener(self.trades.append)
+    
+    def summary(self):
+        return summarize(self.trades)
+
+
+class EventBacktest:
+    """
+    Backtest that replays collected snapshots through the real StrategyEngine
+
+    Every snapshot is handed to an unmodified StrategyEngine, one per variant,
+    in recorded order. A simulated clock stands in for datetime.now() and a
+    RecordingNotifier for TelegramBot, so the trade log and alerts are the ones
+    the live scanner would have produced on the same data. Nothing waits on
+    wall time; the engines' console output is discarded unless verbose.
+    """
+    
+    def __init__(self, variants=None, engine_class=StrategyEngine, verbose=False):
+        self.variants = list(variants or [StrategyParams()])
+        self.engine_class = engine_class
+        self.verbose = verbose
+        self.snapshots_processed = 0
+    
+    def run(self, history):
+        """
+        Run every variant over history
+
+        Args:
+            history: (time, snapshot) pairs, oldest first (iter_history / load_history)
+
+        Returns:
+            List of BacktestRun, one per variant
+        """
+        clock = SimulatedClock()
+        prefixed = len(self.variants) > 1
+        runs = [BacktestRun(params, clock, self.engine_class, prefixed) for params in self.variants]
+        engines = [run.engine for run in runs]
+        self.snapshots_processed = 0
+        
+        with open(os.devnull, 'w') as devnull, redirect_stdout(sys.stdout if self.verbose else devnull):
+            for moment, snapshot in history:
+                clock.current = moment
+                for engine in engines:
+                    engine.process_options(snapshot)
+                self.snapshots_processed += 1
+        
+        return runs
+    
+    def print_results(self, runs, elapsed=None):
+        """Print a summary per variant"""
+        print("\n" + "=" * 60)
+        print("📊 EVENT BACKTEST RESULTS")
+        print("=" * 60)
+        print(f"Snapshots: {self.snapshots_processed}")
+        if elapsed:
+            print(f"Elapsed: {elapsed:.2f}s ({self.snapshots_processed / elapsed:,.0f} snapshots/sec)")
+        
+        for run in runs:
+            stats = run.summary()
+            print(f"\n🧪 {run.params.name}")
+            print(f"   Trades:        {stats['trades']} ({stats['wins']} won, {stats['losses']} lost)")
+            print(f"   Win rate:      {stats['win_rate']:.2f}%")
+            print(f"   Net P&L:       ₹{stats['net_pnl']:,.2f}")
+            print(f"   Profit factor: {stats['profit_factor']:.2f}")
+            print(f"   Max drawdown:  ₹{stats['max_drawdown']:,.2f}")
+            
+            position = run.engine.open_position
+            if position:
+                print(f"   Still open:    {position['option_key']} @ ₹{position['entry_price']:.2f} since {position['entry_time']}")
+            
+            for trade in run.trades:
+                print(f"     {trade['entry_time']} {trade['strike']} {trade['type']} ₹{trade['entry_price']:.2f} → "
+                      f"₹{trade['exit_price']:.2f} {trade['exit_type']} ₹{trade['pnl']:,.2f}")
+        
+        print("\n" + "=" * 60)
+    
+    def save_results(self, runs, filename=None):
+        """Write summaries, trade logs and alerts to JSON; returns the file name"""
+        filename = filename or f"event_backtest_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        results = {
+            'snapshots': self.snapshots_processed,
+            'strategies': [
+                {
+                    'params': run.params.to_dict(),
+                    'summary': run.summary(),
+                    'trades': run.trades,
+                    'alerts': run.notifier.messages
+                }
+                for run in runs
+            ]
+        }
+        
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        
+        print(f"💾 Results saved to: {filename}")
+        return filename
+
+
+def main():
+    """Backtest the live strategy (or the STRATEGY_CONFIG variants) on collected data"""
+    parser = argparse.ArgumentParser(description="Replay collected snapshots through StrategyEngine")
+    parser.add_argument("data", nargs="?", default=SNAPSHOT_DIR,
+                        help=f"snapshot log, tick store, .snap, .db or JSON file (default {SNAPSHOT_DIR})")
+    parser.add_argument("--config", default=os.getenv('STRATEGY_CONFIG'), help="path to a JSON file listing strategy variants")
+    parser.add_argument("--all-hours", action="store_true", help="also replay snapshots outside trading hours")
+    parser.add_argument("--output", default=None, help="results file (default event_backtest_<time>.json)")
+    parser.add_argument("--verbose", action="store_true", help="show the engines' console output")
+    args = parser.parse_args()
+    
+    variants = [params for params, _ in load_params(args.config)] if args.config else None
+    backtest = EventBacktest(variants, verbose=args.verbose)
+    
+    print(f"🔁 Backtesting {', '.join(params.name for params in backtest.variants)} on {args.data}")
+    started = time.perf_counter()
+    runs = backtest.run(iter_history(args.data, trading_hours_only=not args.all_hours))
+    elapsed = time.perf_counter() - started
+    
+    backtest.print_results(runs, elapsed)
+    backtest.save_results(runs, args.output)
+
+
+if __name__ == "__main__":
+    main()
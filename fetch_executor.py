@@ -0,0 +1,141 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# SmartAPI published rate limits: endpoint -> (requests per second, requests per minute)
+# None means the endpoint has no published limit for that window
+RATE_LIMITS = {
+    'generateSession': (1, None),
+    'generateToken': (1, None),
+    'getProfile': (3, None),
+    'searchScrip': (1, None),
+    'ltpData': (10, 500),
+    'getMarketData': (10, 500),
+    'getCandleData': (3, 180),
+}
+
+# Applied to unknown endpoints so nothing runs unthrottled
+DEFAULT_LIMIT = (1, None)
+
+MAX_WORKERS = 8
+
+
+class TokenBucket:
+    """Token bucket holding up to `capacity` tokens, refilled over `period` seconds"""
+    
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.rate = capacity / period  # Tokens per second
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+    
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def wait_time(self, now):
+        """Seconds until one token is available (0 if available now)"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+    
+    def consume(self):
+        self.tokens -= 1
+
+
+class RateLimiter:
+    """Per-endpoint limiter combining a per-second and a per-minute bucket"""
+    
+    def __init__(self, per_second, per_minute=None):
+        self.lock = threading.Lock()
+        self.buckets = [TokenBucket(per_second, 1.0)]
+        if per_minute:
+            self.buckets.append(TokenBucket(per_minute, 60.0))
+        
+        self.calls = 0
+        self.waited = 0.0  # Total seconds callers spent throttled
+    
+    def acquire(self):
+        """Block until a request is allowed by every bucket"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                wait = max(bucket.wait_time(now) for bucket in self.buckets)
+                if wait == 0:
+                    for bucket in self.buckets:
+                        bucket.consume()
+                    self.calls += 1
+                    return
+                self.waited += wait
+            time.sleep(wait)
+
+
+class FetchExecutor:
+    """
+    Thread pool that runs API calls at the maximum concurrency SmartAPI allows
+
+    Every call names its endpoint and waits on that endpoint's rate limiter
+    before running, so components sharing one session share one set of quotas.
+    """
+    
+    def __init__(self, max_workers=MAX_WORKERS, limits=RATE_LIMITS):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+        self.limits = dict(limits)
+        self.limiters = {}
+        self.lock = threading.Lock()
+    
+    def limiter(self, endpoint):
+        """Get (creating on first use) the rate limiter for an endpoint"""
+        with self.lock:
+            if endpoint not in self.limiters:
+                per_second, per_minute = self.limits.get(endpoint, DEFAULT_LIMIT)
+                self.limiters[endpoint] = RateLimiter(per_second, per_minute)
+            return self.limiters[endpoint]
+    
+    def call(self, endpoint, fn, *args, **kwargs):
+        """Run fn in the calling thread once the endpoint's limiter allows it"""
+        self.limiter(endpoint).acquire()
+        return fn(*args, **kwargs)
+    
+    def submit(self, endpoint, fn, *args, **kwargs):
+        """Run fn on the pool under the endpoint's limiter, returning a Future"""
+        return self.pool.submit(self.call, endpoint, fn, *args, **kwargs)
+    
+    def run(self, fn, *args, **kwargs):
+        """
+        Run fn on the pool without a limiter, returning a Future
+
+        For wrappers that make their API calls through call() themselves
+        (e.g. a cached candle fetch), so only real requests use up the quota.
+        """
+        return self.pool.submit(fn, *args, **kwargs)
+    
+    def map(self, endpoint, fn, items):
+        """Call fn(item) for every item concurrently, returning results in order"""
+        futures = [self.submit(endpoint, fn, item) for item in items]
+        return [future.result() for future in futures]
+    
+    def stats(self):
+        """Calls made and seconds spent throttled, per endpoint"""
+        with self.lock:
+            return {
+                endpoint: {'calls': limiter.calls, 'throttled_seconds': round(limiter.waited, 3)}
+                for endpoint, limiter in self.limiters.items()
+            }
+    
+    def shutdown(self, wait=True):
+        self.pool.shutdown(wait=wait)
+
+
+_shared_executor = None
+_shared_lock = threading.Lock()
+
+
+def get_executor():
+    """Get the process-wide executor shared by every component using the session"""
+    global _shared_executor
+    with _shared_lock:
+        if _shared_executor is None:
+            _shared_executor = FetchExecutor()
+        return _shared_executor
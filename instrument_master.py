@@ -0,0 +1,132 @@
+import os
+import json
+import time
+from datetime import datetime, date
+import requests
+
+SCRIP_MASTER_URL = "https://margincalculator.angelbroking.com/OpenAPI_File/files/OpenAPIScripMaster.json"
+SCRIP_MASTER_FILE = "OpenAPIScripMaster.json"
+RETRY_INTERVAL = 300  # Seconds between reload attempts after a failed load
+
+
+class InstrumentMaster:
+    """
+    Daily-loaded Angel One instrument master (scrip master JSON)
+
+    Indexes index options by (underlying, expiry, strike, type) so option
+    tokens can be looked up locally instead of calling searchScrip per option.
+    Expiries use the same "%d-%b-%Y" format as the rest of the scanner.
+    """
+    
+    def __init__(self, master_file=SCRIP_MASTER_FILE, url=SCRIP_MASTER_URL, underlyings=("NIFTY",)):
+        self.master_file = master_file
+        self.url = url  # None = only read the local file (tests / offline)
+        self.underlyings = set(underlyings)
+        self.loaded_on = None
+        self.last_attempt = None
+        
+        # (underlying, expiry, strike, type) -> {'token', 'symbol', 'lot_size'}
+        self.options = {}
+        
+        # underlying -> sorted list of expiry dates
+        self.expiries = {}
+    
+    def _file_is_current(self):
+        """Check if the local master file was downloaded today"""
+        if not os.path.exists(self.master_file):
+            return False
+        modified = datetime.fromtimestamp(os.path.getmtime(self.master_file)).date()
+        return modified == date.today()
+    
+    def _download(self):
+        """Download the scrip master JSON to the local file"""
+        print("Downloading Angel One instrument master...")
+        response = requests.get(self.url, timeout=60)
+        response.raise_for_status()
+        
+        tmp_file = f"{self.master_file}.tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(response.content)
+        os.replace(tmp_file, self.master_file)
+        print(f"✓ Instrument master saved to {self.master_file}")
+    
+    def load(self):
+        """Load (downloading first if stale) and index the instrument master"""
+        self.last_attempt = time.time()
+        
+        try:
+            if self.url and not self._file_is_current():
+                self._download()
+            
+            with open(self.master_file, 'r') as f:
+                instruments = json.load(f)
+        except Exception as e:
+            print(f"❌ Error loading instrument master: {str(e)}")
+            return False
+        
+        self._build_index(instruments)
+        self.loaded_on = date.today()
+        print(f"✓ Indexed {len(self.options)} option contracts")
+        return True
+    
+    def _build_index(self, instruments):
+        """Index option contracts for the configured underlyings"""
+        options = {}
+        expiries = {}
+        
+        for item in instruments:
+            if item.get('exch_seg') != 'NFO' or item.get('instrumenttype') != 'OPTIDX':
+                continue
+            
+            underlying = item.get('name')
+            if underlying not in self.underlyings:
+                continue
+            
+            symbol = item.get('symbol', '')
+            option_type = symbol[-2:]
+            if option_type not in ('CE', 'PE'):
+                continue
+            
+            try:
+                expiry_date = datetime.strptime(item['expiry'], "%d%b%Y").date()
+                strike = int(round(float(item['strike']) / 100))  # Strikes are stored in paise
+                lot_size = int(float(item.get('lotsize', 0)))
+            except (KeyError, ValueError):
+                continue
+            
+            expiry = expiry_date.strftime("%d-%b-%Y")
+            options[(underlying, expiry, strike, option_type)] = {
+                'token': item['token'],
+                'symbol': symbol,
+                'lot_size': lot_size
+            }
+            expiries.setdefault(underlying, set()).add(expiry_date)
+        
+        self.options = options
+        self.expiries = {name: sorted(dates) for name, dates in expiries.items()}
+    
+    def ensure_loaded(self):
+        """Load the master if it has not been loaded today"""
+        if self.loaded_on == date.today():
+            return True
+        
+        # Don't hammer the download URL on every lookup after a failure
+        if self.last_attempt and time.time() - self.last_attempt < RETRY_INTERVAL:
+            return bool(self.options)
+        
+        return self.load()
+    
+    def lookup(self, underlying, expiry, strike, option_type):
+        """
+        Get contract details for an option
+
+        Returns:
+            dict with 'token', 'symbol' and 'lot_size', or None if not listed
+        """
+        self.ensure_loaded()
+        return self.options.get((underlying, expiry, int(strike), option_type))
+    
+    def get_expiries(self, underlying="NIFTY"):
+        """Get all listed expiry dates for an underlying (sorted)"""
+        self.ensure_loaded()
+        return self.expiries.get(underlying, [])
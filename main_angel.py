@@ -1,9 +1,8 @@
 import os
-import time
-from datetime import datetime, time as dt_time
-import pytz
-from strategy import StrategyEngine
+from strategy_runner import create_strategy
+from strategy_state import STATE_DIR
 from telegram_bot import TelegramBot
+from scanner import run_scanner, is_trading_hours
 from angel_api import AngelOneAPI
 
 # Angel One Configuration
@@ -18,34 +17,30 @@ TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
 # Scanner Configuration
 SCAN_INTERVAL = 60  # 1 minute (change to 30 for faster scanning)
+SCAN_MODE = os.getenv('SCAN_MODE', 'poll')  # 'poll' or 'stream' (WebSocket ticks)
+STRATEGY_CONFIG = os.getenv('STRATEGY_CONFIG')  # Path to a JSON file listing strategy variants (optional)
+STRATEGY_STATE_DIR = os.getenv('STRATEGY_STATE_DIR', STATE_DIR)  # Engine state checkpoints, for warm restarts (empty = off)
 
-# Trading hours (IST)
-TRADING_START = dt_time(9, 30)
-TRADING_END = dt_time(15, 0)
-
-# Error tracking
-consecutive_errors = 0
-MAX_CONSECUTIVE_ERRORS = 5
-
-def is_trading_hours():
-    """Check if current time is within trading hours"""
-    ist = pytz.timezone('Asia/Kolkata')
-    now = datetime.now(ist).time()
+def run_stream(angel, strategy, telegram):
+    """Stream ticks over the SmartAPI WebSocket instead of polling"""
+    from tick_stream import TickStreamer
     
-    # Check if it's a weekday (Monday=0, Sunday=6)
-    if datetime.now(ist).weekday() >= 5:
-        return False
+    print("📡 Streaming mode: ticks are pushed to the strategy as they arrive")
+    streamer = TickStreamer(angel, strategy, active=is_trading_hours)
     
-    return TRADING_START <= now <= TRADING_END
+    try:
+        streamer.run()
+    except KeyboardInterrupt:
+        streamer.stop()
+        print("\n\n🛑 Scanner stopped by user")
+        telegram.send_message("🛑 Nifty Options Scanner has been stopped.")
 
 def main():
-    """Main scanner loop"""
-    global consecutive_errors
-    
+    """Start the scanner on Angel One data"""
     print("🚀 Nifty Options Scanner Started (Angel One)")
     print(f"📱 Telegram Bot: Connected")
     print(f"⏰ Trading Hours: 9:30 AM - 3:00 PM IST")
-    print(f"🔍 Scan Interval: {SCAN_INTERVAL} seconds")
+    print(f"🔍 Scan Interval: {SCAN_INTERVAL} seconds" if SCAN_MODE != 'stream' else "🔍 Scan Mode: WebSocket stream")
     print("-" * 50)
     
     # Check if all credentials are provided
@@ -73,71 +68,17 @@ def main():
         telegram.send_message(f"❌ Failed to connect to Angel One: {str(e)}")
         return
     
-    strategy = StrategyEngine(telegram)
+    strategy = create_strategy(telegram, STRATEGY_CONFIG, state_dir=STRATEGY_STATE_DIR)
     
     # Send startup notification
     startup_msg = "✅ Nifty Options Scanner is now LIVE! (Angel One)\n\n📊 Monitoring ATM ± 5 strikes\n⏰ Active during market hours (9:30 AM - 3:00 PM)"
     telegram.send_message(startup_msg)
     
-    while True:
-        try:
-            if is_trading_hours():
-                current_time = datetime.now(pytz.timezone('Asia/Kolkata'))
-                print(f"\n[{current_time.strftime('%H:%M:%S')}] Scanning options...")
-                
-                # Fetch option chain data
-                option_data = angel.get_option_chain()
-                
-                if option_data:
-                    # Reset error counter on success
-                    consecutive_errors = 0
-                    
-                    # Process data through strategy engine
-                    strategy.process_options(option_data)
-                else:
-                    consecutive_errors += 1
-                    print(f"⚠️ Failed to fetch option chain data (Error {consecutive_errors}/{MAX_CONSECUTIVE_ERRORS})")
-                    
-                    # If too many consecutive errors, try to re-login
-                    if consecutive_errors >= MAX_CONSECUTIVE_ERRORS:
-                        print("⚠️ Too many errors, re-logging to Angel One...")
-                        telegram.send_message("⚠️ Scanner experiencing issues. Attempting to reconnect...")
-                        try:
-                            angel = AngelOneAPI(
-                                api_key=ANGEL_API_KEY,
-                                client_id=ANGEL_CLIENT_ID,
-                                password=ANGEL_PASSWORD,
-                                totp_secret=ANGEL_TOTP_SECRET
-                            )
-                            consecutive_errors = 0
-                        except Exception as e:
-                            print(f"❌ Re-login failed: {str(e)}")
-                        time.sleep(10)
-            else:
-                current_time = datetime.now(pytz.timezone('Asia/Kolkata'))
-                
-                # Only print waiting message every 5 minutes
-                if current_time.minute % 5 == 0 and current_time.second < SCAN_INTERVAL:
-                    print(f"[{current_time.strftime('%H:%M:%S')}] Outside trading hours. Waiting...")
-            
-            # Wait before next scan
-            time.sleep(SCAN_INTERVAL)
-            
-        except KeyboardInterrupt:
-            print("\n\n🛑 Scanner stopped by user")
-            telegram.send_message("🛑 Nifty Options Scanner has been stopped.")
-            break
-        except Exception as e:
-            consecutive_errors += 1
-            print(f"❌ Unexpected error: {str(e)} (Error {consecutive_errors}/{MAX_CONSECUTIVE_ERRORS})")
-            
-            if consecutive_errors >= MAX_CONSECUTIVE_ERRORS:
-                error_msg = f"❌ Scanner encountered multiple errors. Last error: {str(e)}\n\nAttempting to recover..."
-                telegram.send_message(error_msg)
-                consecutive_errors = 0
-                time.sleep(10)
-            else:
-                time.sleep(SCAN_INTERVAL)
+    if SCAN_MODE == 'stream':
+        run_stream(angel, strategy, telegram)
+        return
+    
+    run_scanner(angel, strategy, telegram, scan_interval=SCAN_INTERVAL)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,50 @@
+import os
+import sys
+import time
+from strategy_runner import create_strategy
+from telegram_bot import NullNotifier
+from data_provider import ReplayProvider
+from scanner import run_scanner
+from snapshot_log import SNAPSHOT_DIR
+
+# Replay Configuration
+DATA_FILE = SNAPSHOT_DIR
+SPEED = None  # None = as fast as possible, 1 = real time, N = N× faster
+STRATEGY_CONFIG = os.getenv('STRATEGY_CONFIG')  # Path to a JSON file listing strategy variants (optional)
+
+def main():
+    """Replay recorded snapshots through the live scanner loop"""
+    data_file = sys.argv[1] if len(sys.argv) > 1 else DATA_FILE
+    speed = float(sys.argv[2]) if len(sys.argv) > 2 else SPEED
+    
+    print("🔁 Nifty Options Scanner - Replay Mode")
+    print(f"📂 Data: {data_file}")
+    print(f"⏩ Speed: {f'{speed:g}x' if speed else 'max'}")
+    print("-" * 50)
+    
+    try:
+        provider = ReplayProvider(data_file, speed=speed)
+    except FileNotFoundError:
+        print(f"❌ {data_file} not found! Run data_collector.py first.")
+        return
+    
+    notifier = NullNotifier()
+    strategy = create_strategy(notifier, STRATEGY_CONFIG, clock=provider.clock)
+    
+    started = time.perf_counter()
+    processed = run_scanner(provider, strategy, notifier, clock=provider.clock, verbose=False)
+    elapsed = time.perf_counter() - started
+    
+    print("\n" + "=" * 50)
+    print("📊 REPLAY SUMMARY")
+    print("=" * 50)
+    print(f"Snapshots replayed: {processed}/{len(provider.snapshots)}")
+    print(f"Elapsed: {elapsed:.2f}s")
+    if elapsed > 0:
+        print(f"Throughput: {processed / elapsed:.1f} snapshots/sec")
+    for engine in getattr(strategy, 'engines', [strategy]):
+        print(f"{engine.params.name}: {len(engine.qualified_options)} qualified, {len(engine.entered_options)} entered")
+    print("=" * 50)
+
+if __name__ == "__main__":
+    main()
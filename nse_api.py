@@ -1,5 +1,7 @@
 from datetime import datetime
 import time
+from data_provider import MarketDataProvider
+from option_model import ChainSnapshot
 
 try:
     from nsepython import *
@@ -11,7 +13,47 @@ except ImportError:
     import requests
     import json
 
-class NSEOptionChain:
+class OptionChainIndex:
+    """
+    NSE option chain payload parsed once into an index keyed by (expiry, strike)
+    
+    Extracting an ATM window is then a handful of dict lookups instead of a
+    scan over every record of every expiry.
+    """
+    
+    def __init__(self, payload):
+        records = payload.get('records', {})
+        
+        self.expiry_dates = records.get('expiryDates', [])
+        self.spot_price = records.get('underlyingValue')
+        self.records = {}
+        
+        for record in records.get('data', []):
+            self.records[(record.get('expiryDate'), record.get('strikePrice'))] = record
+    
+    def get_window(self, chain, atm_strike, strikes_each_side=5):
+        """Add the options for ATM ± strikes_each_side of the chain's expiry to a ChainSnapshot"""
+        expiry = chain.expiry
+        
+        for i in range(-strikes_each_side, strikes_each_side + 1):
+            strike = atm_strike + (i * 50)
+            record = self.records.get((expiry, strike))
+            if not record:
+                continue
+            
+            for option_type in ('CE', 'PE'):
+                data = record.get(option_type)
+                if not data:
+                    continue
+                
+                # NSE sends null for contracts that haven't traded; skip those, not the scan
+                ltp = data.get('lastPrice') or 0
+                if ltp > 0:
+                    chain.append(strike, option_type, ltp, data.get('totalTradedVolume') or 0, data.get('openInterest') or 0)
+        
+        return chain
+
+class NSEOptionChain(MarketDataProvider):
     """Fetches Nifty option chain data from NSE using nsepython library"""
     
     def __init__(self):
@@ -41,108 +83,89 @@ class NSEOptionChain:
         
         return None
     
+    def get_spot(self):
+        return self.get_nifty_spot_price()
+    
+    def get_chain(self):
+        return self.get_option_chain()
+    
+    def reconnect(self):
+        """Reinitialize after repeated failures"""
+        self.__init__()
+        return True
+    
     def get_atm_strike(self, spot_price):
         """Calculate ATM strike (rounded to nearest 50)"""
         return round(spot_price / 50) * 50
     
     def get_option_chain(self):
         """Fetch option chain data for Nifty weekly options (ATM ± 5 strikes)"""
+        chains = self.get_option_chains(num_expiries=1)
+        return chains[0] if chains else None
+    
+    def get_option_chains(self, num_expiries=1, strikes_each_side=5):
+        """
+        Fetch ATM ± strikes_each_side chains for the nearest expiries
+        
+        All expiries come from a single option chain request, and spot comes
+        from the payload's underlying value, so extra expiries cost no fetches.
+        
+        Returns:
+            List of ChainSnapshots (nearest expiry first), or None on failure
+        """
         try:
-            # Get Nifty spot price
-            spot_price = self.get_nifty_spot_price()
-            if not spot_price:
-                print("⚠ Could not fetch spot price")
-                return None
-            
-            # Calculate ATM strike
-            atm_strike = self.get_atm_strike(spot_price)
-            print(f"✓ ATM Strike: {atm_strike}")
-            
-            if self.use_nsepython:
-                # Using nsepython library to fetch option chain
-                try:
-                    # Fetch option chain data
-                    print("Fetching option chain from NSE...")
-                    option_chain_data = nse_optionchain_data("NIFTY")
-                    
-                    if not option_chain_data or 'records' not in option_chain_data:
-                        print("⚠ No option chain data received")
-                        return None
-                    
-                    # Get expiry dates
-                    expiry_dates = option_chain_data.get('records', {}).get('expiryDates', [])
-                    if not expiry_dates:
-                        print("⚠ No expiry dates found")
-                        return None
-                    
-                    # Use first expiry (nearest weekly)
-                    weekly_expiry = expiry_dates[0]
-                    print(f"✓ Weekly Expiry: {weekly_expiry}")
-                    
-                    # Get strikes to scan (ATM ± 5)
-                    strikes_to_scan = [atm_strike + (i * 50) for i in range(-5, 6)]
-                    
-                    # Parse option data
-                    options = []
-                    records = option_chain_data.get('records', {}).get('data', [])
-                    
-                    for record in records:
-                        try:
-                            strike = record.get('strikePrice')
-                            expiry = record.get('expiryDate')
-                            
-                            # Filter for weekly expiry and our strike range
-                            if expiry == weekly_expiry and strike in strikes_to_scan:
-                                # Call option
-                                if 'CE' in record:
-                                    ce_data = record['CE']
-                                    ltp = ce_data.get('lastPrice', 0)
-                                    if ltp > 0:
-                                        options.append({
-                                            'strike': strike,
-                                            'type': 'CE',
-                                            'ltp': ltp,
-                                            'volume': ce_data.get('totalTradedVolume', 0),
-                                            'oi': ce_data.get('openInterest', 0),
-                                            'expiry': expiry
-                                        })
-                                
-                                # Put option
-                                if 'PE' in record:
-                                    pe_data = record['PE']
-                                    ltp = pe_data.get('lastPrice', 0)
-                                    if ltp > 0:
-                                        options.append({
-                                            'strike': strike,
-                                            'type': 'PE',
-                                            'ltp': ltp,
-                                            'volume': pe_data.get('totalTradedVolume', 0),
-                                            'oi': pe_data.get('openInterest', 0),
-                                            'expiry': expiry
-                                        })
-                        except Exception as e:
-                            continue
-                    
-                    if len(options) > 0:
-                        print(f"✓ Fetched {len(options)} options successfully")
-                        return {
-                            'spot_price': spot_price,
-                            'atm_strike': atm_strike,
-                            'expiry': weekly_expiry,
-                            'options': options,
-                            'timestamp': datetime.now().isoformat()
-                        }
-                    else:
-                        print("⚠ No valid option data found")
-                        return None
-                        
-                except Exception as e:
-                    print(f"❌ Error fetching option chain: {str(e)}")
-                    return None
-            else:
+            if not self.use_nsepython:
                 # Fallback - generate dummy data for testing
+                spot_price = self.get_nifty_spot_price()
+                atm_strike = self.get_atm_strike(spot_price)
+                print(f"✓ ATM Strike: {atm_strike}")
                 print("⚠ Generating test data (install nsepython for real data)")
-                return self._generate_test_data(spot_price, atm_strike)
+                return [self._generate_test_data(spot_price, atm_strike)]
+            
+            try:
+                print("Fetching option chain from NSE...")
+                option_chain_data = nse_optionchain_data("NIFTY")
+                
+                if not option_chain_data or 'records' not in option_chain_data:
+                    print("⚠ No option chain data received")
+                    return None
+                
+                chain_index = OptionChainIndex(option_chain_data)
+                
+                if not chain_index.expiry_dates:
+                    print("⚠ No expiry dates found")
+                    return None
+                
+                # Spot from the payload saves a separate quote request
+                spot_price = chain_index.spot_price or self.get_nifty_spot_price()
+                if not spot_price:
+                    print("⚠ Could not fetch spot price")
+                    return None
+                print(f"✓ Nifty Spot: ₹{spot_price:.2f}")
+                
+                atm_strike = self.get_atm_strike(spot_price)
+                print(f"✓ ATM Strike: {atm_strike}")
+                
+                timestamp = datetime.now().isoformat()
+                chains = []
+                
+                for expiry in chain_index.expiry_dates[:num_expiries]:
+                    chain = chain_index.get_window(ChainSnapshot(spot_price, atm_strike, expiry, timestamp), atm_strike, strikes_each_side)
+                    if not len(chain):
+                        continue
+                    
+                    print(f"✓ Expiry {expiry}: fetched {len(chain)} options")
+                    chains.append(chain)
+                
+                if chains:
+                    return chains
+                
+                print("⚠ No valid option data found")
+                return None
+                
+            except Exception as e:
+                print(f"❌ Error fetching option chain: {str(e)}")
+                return None
                 
         except Exception as e:
             print(f"❌ Error in get_option_chain: {str(e)}")
@@ -155,7 +178,7 @@ class NSEOptionChain:
         print("⚠ WARNING: Using simulated data - NOT REAL MARKET DATA")
         print("⚠ Install nsepython for real trading: pip install nsepython")
         
-        options = []
+        chain = ChainSnapshot(spot_price, atm_strike, '23-Jan-2026', datetime.now().isoformat())
         strikes_to_scan = [atm_strike + (i * 50) for i in range(-5, 6)]
         
         for strike in strikes_to_scan:
@@ -163,28 +186,7 @@ class NSEOptionChain:
             ce_price = random.uniform(50, 150)
             pe_price = random.uniform(50, 150)
             
-            options.append({
-                'strike': strike,
-                'type': 'CE',
-                'ltp': round(ce_price, 2),
-                'volume': random.randint(1000, 50000),
-                'oi': random.randint(10000, 100000),
-                'expiry': '23-Jan-2026'
-            })
-            
-            options.append({
-                'strike': strike,
-                'type': 'PE',
-                'ltp': round(pe_price, 2),
-                'volume': random.randint(1000, 50000),
-                'oi': random.randint(10000, 100000),
-                'expiry': '23-Jan-2026'
-            })
+            chain.append(strike, 'CE', round(ce_price, 2), random.randint(1000, 50000), random.randint(10000, 100000))
+            chain.append(strike, 'PE', round(pe_price, 2), random.randint(1000, 50000), random.randint(10000, 100000))
         
-        return {
-            'spot_price': spot_price,
-            'atm_strike': atm_strike,
-            'expiry': '23-Jan-2026',
-            'options': options,
-            'timestamp': datetime.now().isoformat()
-        }
+        return chain
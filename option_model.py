@@ -0,0 +1,213 @@
+import json
+from array import array
+
+OPTION_FIELDS = ('strike', 'type', 'ltp', 'volume', 'oi', 'expiry', 'symbol')
+
+SNAPSHOT_FIELDS = ('spot_price', 'atm_strike', 'expiry', 'timestamp', 'collected_at')
+
+
+class Option:
+    """
+    One option quote as a slotted record
+
+    option.ltp is the fast path; option['ltp'] and option.get('symbol') keep
+    code written against the old option dicts working.
+    """
+    
+    __slots__ = OPTION_FIELDS
+    
+    def __init__(self, strike, option_type, ltp, volume=0, oi=0, expiry=None, symbol=None):
+        self.strike = strike
+        self.type = option_type
+        self.ltp = ltp
+        self.volume = volume
+        self.oi = oi
+        self.expiry = expiry
+        self.symbol = symbol
+    
+    def __getitem__(self, name):
+        if name not in OPTION_FIELDS:
+            raise KeyError(name)
+        return getattr(self, name)
+    
+    def get(self, name, default=None):
+        value = getattr(self, name, None) if name in OPTION_FIELDS else None
+        return default if value is None else value
+    
+    def __contains__(self, name):
+        return name in OPTION_FIELDS and getattr(self, name) is not None
+    
+    def to_dict(self):
+        return {name: getattr(self, name) for name in OPTION_FIELDS if getattr(self, name) is not None}
+    
+    def __repr__(self):
+        return f"Option({self.strike} {self.type} @ {self.ltp})"
+
+
+class ChainSnapshot:
+    """
+    One option chain scan stored as parallel arrays
+
+    strikes, types, ltps, volumes and ois hold one entry per option, so a scan
+    costs a few array appends instead of a dict per option. Options can be
+    looked up by (strike, side) and are only turned into Option records when
+    asked for. snapshot['options'], snapshot['spot_price'], .get() and
+    snapshot['collected_at'] = ... behave like the old chain dict for
+    existing consumers.
+    """
+    
+    __slots__ = SNAPSHOT_FIELDS + ('strikes', 'types', 'ltps', 'volumes', 'ois', 'symbols', '_options', '_index')
+    
+    def __init__(self, spot_price=None, atm_strike=None, expiry=None, timestamp=None, collected_at=None):
+        self.spot_price = spot_price
+        self.atm_strike = atm_strike
+        self.expiry = expiry
+        self.timestamp = timestamp
+        self.collected_at = collected_at
+        
+        self.strikes = array('i')
+        self.types = []
+        self.ltps = array('d')
+        self.volumes = array('q')
+        self.ois = array('q')
+        self.symbols = None  # Only kept when the provider has them
+        
+        self._options = None
+        self._index = None
+    
+    def append(self, strike, option_type, ltp, volume=0, oi=0, symbol=None):
+        """Add one option quote"""
+        if symbol is not None and self.symbols is None:
+            self.symbols = [None] * len(self.types)
+        
+        self.strikes.append(int(strike))
+        self.types.append(option_type)
+        self.ltps.append(ltp)
+        self.volumes.append(int(volume or 0))
+        self.ois.append(int(oi or 0))
+        if self.symbols is not None:
+            self.symbols.append(symbol)
+        
+        self._options = None
+        self._index = None
+    
+    def __len__(self):
+        return len(self.types)
+    
+    def option(self, i):
+        """Option record for the i-th quote"""
+        return Option(
+            self.strikes[i], self.types[i], self.ltps[i], self.volumes[i], self.ois[i],
+            self.expiry, self.symbols[i] if self.symbols is not None else None
+        )
+    
+    @property
+    def options(self):
+        """Every quote as an Option (built once, on first use)"""
+        if self._options is None:
+            self._options = [self.option(i) for i in range(len(self.types))]
+        return self._options
+    
+    def find(self, strike, option_type):
+        """Position of the (strike, side) quote, or None"""
+        if self._index is None:
+            self._index = {key: i for i, key in enumerate(zip(self.strikes, self.types))}
+        return self._index.get((strike, option_type))
+    
+    def get_option(self, strike, option_type):
+        """Option for (strike, side), or None if it isn't in the chain"""
+        i = self.find(strike, option_type)
+        return None if i is None else self.option(i)
+    
+    def rows(self):
+        """(strike, type, ltp, volume, oi) per quote, straight from the arrays"""
+        return zip(self.strikes, self.types, self.ltps, self.volumes, self.ois)
+    
+    # Compatibility with the chain dict
+    
+    def __getitem__(self, key):
+        if key == 'options':
+            return self.options
+        if key not in SNAPSHOT_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __setitem__(self, key, value):
+        if key not in SNAPSHOT_FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+    
+    def get(self, key, default=None):
+        if key != 'options' and key not in SNAPSHOT_FIELDS:
+            return default
+        value = self[key]
+        return default if value is None else value
+    
+    def __contains__(self, key):
+        return key == 'options' or (key in SNAPSHOT_FIELDS and getattr(self, key) is not None)
+    
+    def to_dict(self):
+        """The chain as a plain dict (same layout the providers used to return)"""
+        data = {
+            'spot_price': self.spot_price,
+            'atm_strike': self.atm_strike,
+            'expiry': self.expiry,
+            'options': [option.to_dict() for option in self.options],
+            'timestamp': self.timestamp
+        }
+        if self.collected_at is not None:
+            data['collected_at'] = self.collected_at
+        return data
+    
+    def to_json(self):
+        """Compact JSON of to_dict(), written straight from the arrays"""
+        expiry = json.dumps(self.expiry)
+        symbols = self.symbols or [None] * len(self.types)
+        
+        options = ",".join(
+            f'{{"strike":{strike},"type":"{option_type}","ltp":{ltp!r},"volume":{volume},"oi":{oi},"expiry":{expiry}'
+            + (f',"symbol":{json.dumps(symbol)}}}' if symbol is not None else "}")
+            for strike, option_type, ltp, volume, oi, symbol in zip(
+                self.strikes, self.types, self.ltps, self.volumes, self.ois, symbols
+            )
+        )
+        
+        header = json.dumps(
+            {'spot_price': self.spot_price, 'atm_strike': self.atm_strike, 'expiry': self.expiry},
+            separators=(',', ':')
+        )
+        trailer = f',"timestamp":{json.dumps(self.timestamp)}'
+        if self.collected_at is not None:
+            trailer += f',"collected_at":{json.dumps(self.collected_at)}'
+        return f'{header[:-1]},"options":[{options}]{trailer}}}'
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Build a snapshot from a chain dict (recorded data, older providers)"""
+        snapshot = cls(
+            data.get('spot_price'), data.get('atm_strike'), data.get('expiry'),
+            data.get('timestamp'), data.get('collected_at')
+        )
+        for option in data.get('options', []):
+            snapshot.append(
+                option['strike'], option['type'], option['ltp'],
+                option.get('volume'), option.get('oi'), option.get('symbol')
+            )
+            if snapshot.expiry is None:
+                snapshot.expiry = option.get('expiry')
+        return snapshot
+
+
+def iter_rows(snapshot):
+    """
+    (strike, type, ltp, volume, oi) for every option of a snapshot
+
+    Reads a ChainSnapshot's arrays directly, so writers serialize it without
+    building Option records or dicts; chain dicts are read field by field.
+    """
+    if isinstance(snapshot, ChainSnapshot):
+        return snapshot.rows()
+    return (
+        (option['strike'], option['type'], option['ltp'], option.get('volume') or 0, option.get('oi') or 0)
+        for option in snapshot['options']
+    )
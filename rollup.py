@@ -0,0 +1,266 @@
+import os
+import csv
+import json
+import shutil
+import argparse
+from datetime import datetime, timedelta
+from snapshot_log import SNAPSHOT_DIR, list_days, count_snapshots, read_snapshots
+from tick_store import TICK_STORE_DIR
+from snapshot_codec import CODEC_DIR
+
+ROLLUP_DIR = "rollups"
+STATE_FILE = "rollup_state.json"
+
+DEFAULT_INTERVALS = ("1m", "5m", "15m")
+
+BAR_COLUMNS = ["ts", "expiry", "strike", "type", "open", "high", "low", "close", "volume", "oi_open", "oi_close"]
+
+
+def interval_minutes(interval):
+    """Bar length in minutes for an interval name like '5m'"""
+    if not interval.endswith("m") or not interval[:-1].isdigit() or int(interval[:-1]) <= 0:
+        raise ValueError(f"Unsupported interval: {interval} (use e.g. 1m, 5m, 15m)")
+    return int(interval[:-1])
+
+
+def _bucket(timestamp, minutes):
+    """Start of the bar a timestamp falls in (bars are aligned to midnight, so 9:15 starts a 5m/15m bar)"""
+    timestamp = timestamp.replace(second=0, microsecond=0)
+    return timestamp - timedelta(minutes=(timestamp.hour * 60 + timestamp.minute) % minutes)
+
+
+def rollup_day(snapshots, intervals=DEFAULT_INTERVALS):
+    """
+    Aggregate one day's snapshots into per-option bars for each interval
+
+    Prices come from the LTP (open/high/low/close), OI is kept as the bar's
+    first and last reading, and bar volume is the growth of the cumulative
+    day volume over the bar. The first reading of an option only sets the
+    volume baseline; a drop in cumulative volume (feed reset) resets it.
+    Snapshots older than one already seen (clock changes, restarts) are
+    skipped so bars stay in order.
+
+    Returns:
+        {interval: [bar dict, ...]} sorted by time, expiry, strike, type
+    """
+    sizes = {interval: interval_minutes(interval) for interval in intervals}
+    bars = {interval: [] for interval in intervals}
+    open_bars = {interval: {} for interval in intervals}
+    last_volume = {}
+    last_timestamp = None
+    
+    for snapshot in snapshots:
+        timestamp = datetime.fromisoformat(snapshot.get('collected_at') or snapshot['timestamp'])
+        if last_timestamp and timestamp < last_timestamp:
+            continue
+        last_timestamp = timestamp
+        buckets = {interval: _bucket(timestamp, minutes) for interval, minutes in sizes.items()}
+        
+        for option in snapshot['options']:
+            ltp = option.get('ltp') or 0
+            if ltp <= 0:
+                continue
+            
+            key = (option.get('expiry') or snapshot.get('expiry') or "", int(option['strike']), option['type'])
+            volume = int(option.get('volume') or 0)
+            oi = int(option.get('oi') or 0)
+            
+            previous = last_volume.get(key)
+            traded = volume - previous if previous is not None and volume >= previous else 0
+            last_volume[key] = volume
+            
+            for interval, bucket in buckets.items():
+                bar = open_bars[interval].get(key)
+                if bar is not None and bar['ts'] != bucket:
+                    bars[interval].append(bar)
+                    bar = None
+                
+                if bar is None:
+                    open_bars[interval][key] = {
+                        'ts': bucket, 'expiry': key[0], 'strike': key[1], 'type': key[2],
+                        'open': ltp, 'high': ltp, 'low': ltp, 'close': ltp,
+                        'volume': traded, 'oi_open': oi, 'oi_close': oi
+                    }
+                else:
+                    bar['high'] = max(bar['high'], ltp)
+                    bar['low'] = min(bar['low'], ltp)
+                    bar['close'] = ltp
+                    bar['volume'] += traded
+                    bar['oi_close'] = oi
+    
+    for interval in intervals:
+        bars[interval].extend(open_bars[interval].values())
+        bars[interval].sort(key=lambda bar: (bar['ts'], bar['expiry'], bar['strike'], bar['type']))
+    return bars
+
+
+def write_bars(path, bars):
+    """Write bars as CSV, replacing the file atomically"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=BAR_COLUMNS)
+        writer.writeheader()
+        for bar in bars:
+            writer.writerow({**bar, 'ts': bar['ts'].strftime("%Y-%m-%d %H:%M")})
+    os.replace(tmp_path, path)
+
+
+def read_bars(day, interval="1m", directory=ROLLUP_DIR):
+    """Bars for one day and interval, as dicts with typed values"""
+    path = os.path.join(directory, interval, f"{day}.csv")
+    if not os.path.exists(path):
+        return []
+    
+    with open(path, 'r', newline='') as f:
+        return [
+            {
+                'ts': datetime.strptime(row['ts'], "%Y-%m-%d %H:%M"),
+                'expiry': row['expiry'],
+                'strike': int(row['strike']),
+                'type': row['type'],
+                'open': float(row['open']),
+                'high': float(row['high']),
+                'low': float(row['low']),
+                'close': float(row['close']),
+                'volume': int(row['volume']),
+                'oi_open': int(row['oi_open']),
+                'oi_close': int(row['oi_close'])
+            }
+            for row in csv.DictReader(f)
+        ]
+
+
+class Rollup:
+    """
+    Compacts the raw snapshot log into per-day bar files
+
+    Output goes to ROLLUP_DIR/<interval>/YYYY-MM-DD.csv. A state file records
+    how many snapshots each day had when it was rolled up, so a run only
+    processes days that are new or have grown since (in practice: today),
+    plus days missing a newly requested interval. The collector's copies of
+    the log (tick store, binary codec) are pruned along with it.
+    """
+    
+    def __init__(self, source=SNAPSHOT_DIR, directory=ROLLUP_DIR, intervals=DEFAULT_INTERVALS,
+                 tick_store_dir=TICK_STORE_DIR, codec_dir=CODEC_DIR):
+        self.source = source
+        self.directory = directory
+        self.tick_store_dir = tick_store_dir
+        self.codec_dir = codec_dir
+        self.intervals = list(intervals)
+        for interval in self.intervals:
+            interval_minutes(interval)
+            os.makedirs(os.path.join(directory, interval), exist_ok=True)
+        
+        self.state_path = os.path.join(directory, STATE_FILE)
+        self.state = self._load_state()
+    
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {'days': {}}
+        with open(self.state_path, 'r') as f:
+            return json.load(f)
+    
+    def _save_state(self):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+    
+    def pending_days(self, full=False):
+        """Days whose raw data has changed (or lacks an interval) since the last run"""
+        pending = []
+        for day in list_days(self.source):
+            done = self.state['days'].get(day)
+            if (full or not done
+                    or done['snapshots'] != count_snapshots(self.source, [day])
+                    or not set(self.intervals) <= set(done['intervals'])):
+                pending.append(day)
+        return pending
+    
+    def run(self, full=False):
+        """Roll up every pending day; returns the days processed"""
+        days = self.pending_days(full)
+        if not days:
+            print("✓ Rollups are up to date")
+            return []
+        
+        for day in days:
+            # Count before reading, so snapshots appended meanwhile are picked up next run
+            snapshots = count_snapshots(self.source, [day])
+            bars = rollup_day(read_snapshots(self.source, [day]), self.intervals)
+            
+            for interval, day_bars in bars.items():
+                write_bars(os.path.join(self.directory, interval, f"{day}.csv"), day_bars)
+            
+            done = self.state['days'].get(day, {}).get('intervals', []) if not full else []
+            self.state['days'][day] = {
+                'snapshots': snapshots,
+                'intervals': sorted(set(done) | set(self.intervals), key=interval_minutes)
+            }
+            self._save_state()
+            
+            counts = ", ".join(f"{interval}: {len(day_bars)}" for interval, day_bars in bars.items())
+            print(f"✓ {day}: {snapshots} snapshots → {counts} bars")
+        
+        return days
+    
+    def raw_paths(self, day):
+        """Every raw file or directory the collector wrote for a day"""
+        paths = [os.path.join(self.source, f"{day}{extension}") for extension in (".jsonl", ".idx")]
+        if self.tick_store_dir:
+            paths.append(os.path.join(self.tick_store_dir, day))
+        if self.codec_dir:
+            paths.append(os.path.join(self.codec_dir, f"{day}.snap"))
+        return paths
+    
+    def prune_raw(self, retention_days):
+        """
+        Delete raw snapshot days older than the retention window
+
+        Only days that are fully rolled up are removed; today is always kept.
+        The day goes from the log and from the tick store and codec copies.
+        """
+        cutoff = (datetime.now().date() - timedelta(days=retention_days)).isoformat()
+        pruned = []
+        
+        for day in list_days(self.source):
+            done = self.state['days'].get(day)
+            if day >= cutoff or not done or done['snapshots'] != count_snapshots(self.source, [day]):
+                continue
+            
+            for path in self.raw_paths(day):
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                elif os.path.exists(path):
+                    os.remove(path)
+            pruned.append(day)
+        
+        if pruned:
+            print(f"🗑️  Pruned {len(pruned)} raw day(s) older than {retention_days} days: {pruned[0]} … {pruned[-1]}")
+        return pruned
+
+
+def main():
+    """Roll the snapshot log up into bars, optionally pruning old raw days"""
+    parser = argparse.ArgumentParser(description="Compact raw snapshots into per-option OHLCV bars")
+    parser.add_argument("--source", default=SNAPSHOT_DIR, help=f"snapshot log directory (default {SNAPSHOT_DIR})")
+    parser.add_argument("--output", default=ROLLUP_DIR, help=f"rollup directory (default {ROLLUP_DIR})")
+    parser.add_argument("--intervals", default=",".join(DEFAULT_INTERVALS), help="comma-separated, e.g. 1m,5m,15m")
+    parser.add_argument("--retain-days", type=int, default=None,
+                        help="delete rolled-up raw days older than this (log, tick store and codec copies)")
+    parser.add_argument("--tick-store", default=TICK_STORE_DIR, help=f"tick store pruned with the log (default {TICK_STORE_DIR})")
+    parser.add_argument("--codec-dir", default=CODEC_DIR, help=f"codec store pruned with the log (default {CODEC_DIR})")
+    parser.add_argument("--full", action="store_true", help="rebuild every day, not just new data")
+    args = parser.parse_args()
+    
+    intervals = [interval.strip() for interval in args.intervals.split(",") if interval.strip()]
+    rollup = Rollup(args.source, args.output, intervals, args.tick_store, args.codec_dir)
+    rollup.run(full=args.full)
+    
+    if args.retain_days is not None:
+        rollup.prune_raw(args.retain_days)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+from datetime import datetime, time as dt_time
+import pytz
+from data_provider import SystemClock
+
+# Trading hours (IST)
+TRADING_START = dt_time(9, 30)
+TRADING_END = dt_time(15, 0)
+
+MAX_CONSECUTIVE_ERRORS = 5
+
+IST = pytz.timezone('Asia/Kolkata')
+
+
+def is_trading_hours(now=None):
+    """Check if current time is within trading hours"""
+    now = now or datetime.now(IST)
+    
+    # Check if it's a weekday (Monday=0, Sunday=6)
+    if now.weekday() >= 5:
+        return False
+    
+    return TRADING_START <= now.time() <= TRADING_END
+
+
+def run_scanner(provider, strategy, telegram, scan_interval=60, clock=None, verbose=True):
+    """
+    Main scanner loop, shared by every data provider
+
+    Runs until interrupted, or until a finite provider (e.g. a replay) is exhausted.
+
+    Returns:
+        Number of snapshots processed
+    """
+    clock = clock or SystemClock()
+    live = isinstance(clock, SystemClock)
+    consecutive_errors = 0
+    snapshots_processed = 0
+    
+    def now():
+        return datetime.now(IST) if live else clock.now()
+    
+    while True:
+        try:
+            if not live or is_trading_hours(now()):
+                if verbose:
+                    print(f"\n[{now().strftime('%H:%M:%S')}] Scanning options...")
+                
+                # Fetch option chain data
+                option_data = provider.get_chain()
+                
+                # Replays skip snapshots recorded outside trading hours
+                if option_data and not live and not is_trading_hours(now()):
+                    continue
+                
+                if option_data:
+                    # Reset error counter on success
+                    consecutive_errors = 0
+                    
+                    # Process data through strategy engine
+                    strategy.process_options(option_data)
+                    snapshots_processed += 1
+                elif provider.exhausted:
+                    break
+                else:
+                    consecutive_errors += 1
+                    print(f"⚠️ Failed to fetch option chain data (Error {consecutive_errors}/{MAX_CONSECUTIVE_ERRORS})")
+                    
+                    # If too many consecutive errors, try to recover the data source
+                    if consecutive_errors >= MAX_CONSECUTIVE_ERRORS:
+                        print("⚠️ Too many errors, reconnecting data source...")
+                        telegram.send_message("⚠️ Scanner experiencing issues. Attempting to reconnect...")
+                        try:
+                            if provider.reconnect():
+                                consecutive_errors = 0
+                        except Exception as e:
+                            print(f"❌ Reconnect failed: {str(e)}")
+                        clock.sleep(10)
+            else:
+                # Only print waiting message every 5 minutes
+                current_time = now()
+                if current_time.minute % 5 == 0 and current_time.second < scan_interval:
+                    print(f"[{current_time.strftime('%H:%M:%S')}] Outside trading hours. Waiting...")
+            
+            # Wait before next scan
+            clock.sleep(scan_interval)
+            
+        except KeyboardInterrupt:
+            print("\n\n🛑 Scanner stopped by user")
+            telegram.send_message("🛑 Nifty Options Scanner has been stopped.")
+            break
+        except Exception as e:
+            consecutive_errors += 1
+            print(f"❌ Unexpected error: {str(e)} (Error {consecutive_errors}/{MAX_CONSECUTIVE_ERRORS})")
+            
+            if consecutive_errors >= MAX_CONSECUTIVE_ERRORS:
+                error_msg = f"❌ Scanner encountered multiple errors. Last error: {str(e)}\n\nAttempting to recover..."
+                telegram.send_message(error_msg)
+                try:
+                    provider.reconnect()
+                except Exception as e:
+                    print(f"❌ Reconnect failed: {str(e)}")
+                consecutive_errors = 0
+                clock.sleep(10)
+            else:
+                clock.sleep(scan_interval)
+    
+    return snapshots_processed
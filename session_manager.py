@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import base64
+from datetime import datetime
+from SmartApi import SmartConnect
+from fetch_executor import get_executor
+
+SESSION_FILE = ".angel_session.json"
+
+# Renew the JWT this many seconds before it expires
+RENEW_BEFORE = 10 * 60
+
+# One pooled HTTP session, reused across renewals and error recovery
+HTTP_POOL = {'pool_connections': 4, 'pool_maxsize': 16, 'max_retries': 2}
+
+
+def _jwt_expiry(jwt_token):
+    """Read the expiry (epoch seconds) from a JWT without verifying it"""
+    try:
+        payload = jwt_token.replace("Bearer ", "").split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+    except Exception:
+        # Angel sessions end at midnight, use that if the token can't be read
+        end_of_day = datetime.now().replace(hour=23, minute=59, second=0, microsecond=0)
+        return int(end_of_day.timestamp())
+
+
+class SessionManager:
+    """
+    Persists the Angel One session locally and renews it with the refresh token
+
+    A restart or error recovery restores the saved JWT (or renews it) instead of
+    running a full generateSession with a new TOTP. The session file holds live
+    credentials, so it is only readable by the current user.
+    """
+
+    def __init__(self, api_key, client_id, session_file=SESSION_FILE):
+        self.api_key = api_key
+        self.client_id = client_id
+        self.session_file = session_file
+        self.executor = get_executor()
+        self.smart_api = SmartConnect(api_key=api_key, pool=HTTP_POOL)
+
+        # {'jwtToken', 'refreshToken', 'feedToken', 'expires_at'}
+        self.tokens = None
+
+    def _save(self):
+        """Write tokens to the session file with owner-only permissions"""
+        try:
+            fd = os.open(self.session_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'client_id': self.client_id, **self.tokens}, f)
+            os.chmod(self.session_file, 0o600)
+        except Exception as e:
+            print(f"⚠ Could not save session: {str(e)}")
+
+    def _load(self):
+        """Read saved tokens for this client, or None"""
+        try:
+            if not os.path.exists(self.session_file):
+                return None
+            with open(self.session_file, 'r') as f:
+                data = json.load(f)
+            if data.get('client_id') != self.client_id:
+                return None
+            return {key: data[key] for key in ('jwtToken', 'refreshToken', 'feedToken', 'expires_at')}
+        except Exception as e:
+            print(f"⚠ Could not read saved session: {str(e)}")
+            return None
+
+    def _apply(self, tokens):
+        """Install tokens on the shared SmartConnect client"""
+        self.tokens = tokens
+        self.smart_api.setAccessToken(tokens['jwtToken'].replace("Bearer ", ""))
+        self.smart_api.setRefreshToken(tokens['refreshToken'])
+        self.smart_api.setFeedToken(tokens['feedToken'])
+        self.smart_api.setUserId(self.client_id)
+
+    def _needs_renewal(self):
+        return self.tokens['expires_at'] - time.time() < RENEW_BEFORE
+
+    def login(self, password, totp):
+        """Full login with TOTP, returning the generateSession response"""
+        data = self.executor.call(
+            'generateSession',
+            self.smart_api.generateSession,
+            clientCode=self.client_id,
+            password=password,
+            totp=totp
+        )
+
+        if data and data.get('status'):
+            self._apply({
+                'jwtToken': data['data']['jwtToken'],
+                'refreshToken': data['data']['refreshToken'],
+                'feedToken': data['data']['feedToken'],
+                'expires_at': _jwt_expiry(data['data']['jwtToken'])
+            })
+            self._save()
+
+        return data
+
+    def renew(self):
+        """Get a fresh JWT with the refresh token (no TOTP needed)"""
+        if not self.tokens:
+            return False
+
+        try:
+            data = self.executor.call('generateToken', self.smart_api.generateToken, self.tokens['refreshToken'])
+        except Exception as e:
+            print(f"⚠ Session renewal failed: {str(e)}")
+            return False
+
+        if not data or not data.get('status'):
+            print(f"⚠ Session renewal failed: {(data or {}).get('message', 'Unknown error')}")
+            return False
+
+        self._apply({
+            'jwtToken': data['data']['jwtToken'],
+            'refreshToken': data['data'].get('refreshToken', self.tokens['refreshToken']),
+            'feedToken': data['data']['feedToken'],
+            'expires_at': _jwt_expiry(data['data']['jwtToken'])
+        })
+        self._save()
+        print("✓ Angel One session renewed")
+        return True
+
+    def restore(self):
+        """Reuse a saved session, renewing it if close to expiry"""
+        tokens = self._load()
+        if not tokens:
+            return False
+
+        self._apply(tokens)
+        if self._needs_renewal():
+            return self.renew()
+
+        print("✓ Reusing saved Angel One session")
+        return True
+
+    def ensure_fresh(self):
+        """Renew ahead of expiry; cheap to call before every request"""
+        if self.tokens and self._needs_renewal():
+            return self.renew()
+        return self.tokens is not None
+
+    def clear(self):
+        """Forget the saved session (e.g. after it was rejected)"""
+        self.tokens = None
+        try:
+            os.remove(self.session_file)
+        except FileNotFoundError:
+            pass
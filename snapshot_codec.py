@@ -0,0 +1,407 @@
+import io
+import os
+import struct
+from array import array
+from operator import add
+from datetime import datetime, timedelta
+from option_model import ChainSnapshot, iter_rows
+
+CODEC_DIR = "snapshots_bin"
+
+MAGIC = b"NSNP"
+VERSION = 2
+# Version 1 wrote the strike keys with every snapshot; still readable
+READABLE_VERSIONS = (1, 2)
+
+# Bytes read from a .snap file at a time while decoding
+CHUNK_SIZE = 1 << 20
+
+STRIKE_STEP = 50
+
+# Record tags
+HEADER = 0x48  # 'H': new base (start of day, or expiry / strike range change)
+SNAPSHOT = 0x53  # 'S'
+
+# Header: magic, version, day start (ms since EPOCH), base strike, strike step, expiry YYYYMMDD
+HEADER_FORMAT = struct.Struct("<4sBqiHi")
+
+# Naive timestamps are stored as milliseconds since this epoch (no timezone shift)
+EPOCH = datetime(1970, 1, 1)
+
+OPTION_TYPES = ("CE", "PE")
+
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def _unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+def _write_varint(out, value):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _to_ms(iso_timestamp):
+    return int((datetime.fromisoformat(iso_timestamp) - EPOCH) / timedelta(milliseconds=1))
+
+
+def _expiry_to_int(expiry):
+    return int(datetime.strptime(expiry, "%d-%b-%Y").strftime("%Y%m%d")) if expiry else 0
+
+
+def _int_to_expiry(value):
+    return datetime.strptime(str(value), "%Y%m%d").strftime("%d-%b-%Y") if value else None
+
+
+class SnapshotEncoder:
+    """
+    Streams option chain snapshots into the compact binary format
+
+    Each day starts with a fixed header (base strike, strike step, expiry, day
+    start). A snapshot record then holds:
+        varint     ms since the previous snapshot
+        varint     spot paise, zigzag delta from the previous snapshot
+        int16      ATM offset from the base, in strike steps
+        varint     option count * 2 + 1 if the strikes repeat the previous snapshot's
+        int16[n]   strike offset in steps * 2 + type (0 CE, 1 PE); left out when repeated
+        int32[n]   ltp paise delta from the same option's previous price
+        varint[2n] volume and OI, zigzag deltas from the previous snapshot
+    About 8 bytes per option against ~100 for the JSON it replaces.
+    """
+    
+    def __init__(self, f):
+        self.f = f
+        self.header = None
+        self._reset(None)
+    
+    def _reset(self, header):
+        self.header = header
+        self.last_ts = header[2] if header else 0
+        self.last_spot = 0
+        self.last_keys = None
+        # (strike, type) -> [ltp paise, volume, oi] from the previous snapshot
+        self.previous = {}
+    
+    def _fits(self, snapshot, ms, expiry):
+        if not self.header:
+            return False
+        _, _, day_start, base, step, header_expiry = self.header
+        if expiry != header_expiry or ms - day_start >= 86400000 or ms < self.last_ts:
+            return False
+        if isinstance(snapshot, ChainSnapshot):
+            strikes = snapshot.strikes
+        else:
+            strikes = [option['strike'] for option in snapshot['options']]
+        for strike in [snapshot['atm_strike'], *strikes]:
+            offset, remainder = divmod(int(strike) - base, step)
+            if remainder or not -16384 <= offset < 16384:
+                return False
+        return True
+    
+    def _write_header(self, snapshot, ms, expiry):
+        day_start = ms - (ms % 86400000)
+        header = (MAGIC, VERSION, day_start, int(snapshot['atm_strike']), STRIKE_STEP, expiry)
+        self.f.write(bytes([HEADER]) + HEADER_FORMAT.pack(*header))
+        self._reset(header)
+    
+    def write(self, snapshot):
+        """Encode one snapshot, starting a new header when the base no longer fits"""
+        ms = _to_ms(snapshot.get('collected_at') or snapshot['timestamp'])
+        expiry = _expiry_to_int(snapshot.get('expiry'))
+        if not self._fits(snapshot, ms, expiry):
+            self._write_header(snapshot, ms, expiry)
+        
+        base, step = self.header[3], self.header[4]
+        rows = list(iter_rows(snapshot))
+        
+        out = bytearray([SNAPSHOT])
+        _write_varint(out, ms - self.last_ts)
+        spot = int(round(snapshot['spot_price'] * 100))
+        _write_varint(out, _zigzag(spot - self.last_spot))
+        out += struct.pack("<h", (int(snapshot['atm_strike']) - base) // step)
+        
+        keys = []
+        deltas = array('i')
+        counters = bytearray()
+        current = {}
+        for strike, option_type, ltp, volume, oi in rows:
+            key = ((int(strike) - base) // step) * 2 + OPTION_TYPES.index(option_type)
+            ltp = int(round(ltp * 100))
+            volume = int(volume or 0)
+            oi = int(oi or 0)
+            last_ltp, last_volume, last_oi = self.previous.get(key, (0, 0, 0))
+            
+            keys.append(key)
+            deltas.append(ltp - last_ltp)
+            _write_varint(counters, _zigzag(volume - last_volume))
+            _write_varint(counters, _zigzag(oi - last_oi))
+            current[key] = (ltp, volume, oi)
+        
+        if keys == self.last_keys:
+            _write_varint(out, len(rows) * 2 + 1)
+        else:
+            _write_varint(out, len(rows) * 2)
+            out += array('h', keys).tobytes()
+        out += deltas.tobytes() + counters
+        self.f.write(out)
+        
+        self.last_ts = ms
+        self.last_spot = spot
+        self.last_keys = keys
+        self.previous.update(current)
+
+
+class SnapshotDecoder:
+    """
+    Streams snapshots back out of the binary format, oldest first
+
+    Reads the file CHUNK_SIZE bytes at a time and yields ChainSnapshots whose
+    arrays are filled column by column, without a dict or Option per quote. A
+    truncated last record (a write still in progress, or a crash) ends the
+    stream; `valid_end` is then the byte offset of the last complete record.
+    """
+    
+    def __init__(self, source, chunk_size=CHUNK_SIZE):
+        # A binary file object, or bytes (e.g. a .snap file's contents)
+        self.f = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+        self.chunk_size = chunk_size
+        self.view = None
+        self.valid_end = 0
+        self._reset(None)
+    
+    def _reset(self, header):
+        self.header = header
+        self.last_ts = header[2] if header else 0
+        self.last_spot = 0
+        self.previous = {}
+        self.labels = {}
+        
+        # The previous snapshot as parallel lists; while the strike set doesn't
+        # change, deltas are applied list-wise instead of per option
+        self.last_keys = None
+        self.last_columns = None
+        self.last_labels = None
+    
+    def delta_state(self):
+        """Every option's last (ltp, volume, oi), keyed like the encoder's state"""
+        previous = dict(self.previous)
+        if self.last_keys:
+            previous.update(zip(self.last_keys, zip(*self.last_columns)))
+        return previous
+    
+    def _label(self, key):
+        """(strike, type) for a packed key, cached per header"""
+        if key not in self.labels:
+            base, step = self.header[3], self.header[4]
+            self.labels[key] = (base + (key >> 1) * step, OPTION_TYPES[key & 1])
+        return self.labels[key]
+    
+    def __iter__(self):
+        data = b""
+        offset = 0  # File position of data[0]
+        pos = 0
+        while True:
+            try:
+                tag = data[pos]
+                if tag == HEADER:
+                    header = HEADER_FORMAT.unpack_from(data, pos + 1)
+                    if header[0] != MAGIC or header[1] not in READABLE_VERSIONS:
+                        raise ValueError(f"Unsupported snapshot format at byte {offset + pos}")
+                    self._reset(header)
+                    self.expiry = _int_to_expiry(header[5])
+                    pos += 1 + HEADER_FORMAT.size
+                    self.valid_end = offset + pos
+                    continue
+                
+                if tag != SNAPSHOT or not self.header:
+                    raise ValueError(f"Corrupt snapshot record at byte {offset + pos}")
+                
+                snapshot, pos = self._decode_snapshot(data, pos + 1)
+            except (IndexError, struct.error):
+                # The record runs past what has been read: read on, or stop at a truncated tail
+                chunk = self.f.read(self.chunk_size)
+                if not chunk:
+                    return
+                data = data[pos:] + chunk
+                offset += pos
+                pos = 0
+                self.view = memoryview(data)
+                continue
+            
+            self.valid_end = offset + pos
+            yield snapshot
+    
+    def _decode_snapshot(self, data, pos):
+        base, step = self.header[3], self.header[4]
+        
+        gap, pos = _read_varint(data, pos)
+        spot_delta, pos = _read_varint(data, pos)
+        (atm_offset,) = struct.unpack_from("<h", data, pos)
+        pos += 2
+        count, pos = _read_varint(data, pos)
+        
+        view = self.view
+        if self.header[1] == 1:
+            repeated = False
+        else:
+            count, repeated = count >> 1, count & 1
+        if repeated:
+            if self.last_keys is None:
+                raise ValueError(f"Corrupt snapshot record before byte {pos}")
+            keys = self.last_keys
+        else:
+            if pos + count * 2 > len(data):
+                raise IndexError("truncated record")
+            keys = view[pos:pos + count * 2].cast('h').tolist()
+            pos += count * 2
+        
+        end = pos + count * 4
+        if end > len(data):
+            raise IndexError("truncated record")
+        deltas = view[pos:end].cast('i').tolist()
+        pos = end
+        
+        # Volume/OI varints, read in one pass over the bytes (at most 10 each)
+        counters = []
+        append = counters.append
+        remaining = count * 2
+        value = shift = 0
+        for byte in data[pos:pos + remaining * 10] if remaining else ():
+            pos += 1
+            if byte < 0x80:
+                value |= byte << shift
+                append((value >> 1) ^ -(value & 1))
+                remaining -= 1
+                if not remaining:
+                    break
+                value = shift = 0
+            else:
+                value |= (byte & 0x7F) << shift
+                shift += 7
+        if remaining:
+            raise IndexError("truncated record")
+        
+        # The record is complete; only now update the delta state
+        self.last_ts += gap
+        self.last_spot += _unzigzag(spot_delta)
+        timestamp = (EPOCH + timedelta(milliseconds=self.last_ts)).isoformat()
+        
+        if keys == self.last_keys:
+            last_ltp, last_volume, last_oi = self.last_columns
+            ltp = list(map(add, last_ltp, deltas))
+            volume = list(map(add, last_volume, counters[0::2]))
+            oi = list(map(add, last_oi, counters[1::2]))
+            strikes, types = self.last_labels
+        else:
+            previous = self.previous
+            if self.last_keys:
+                previous.update(zip(self.last_keys, zip(*self.last_columns)))
+            
+            ltp, volume, oi = [], [], []
+            for key, delta, volume_delta, oi_delta in zip(keys, deltas, counters[0::2], counters[1::2]):
+                last = previous.get(key, (0, 0, 0))
+                ltp.append(last[0] + delta)
+                volume.append(last[1] + volume_delta)
+                oi.append(last[2] + oi_delta)
+            
+            for key in keys:
+                if key not in self.labels:
+                    self._label(key)
+            strikes = array('i', [self.labels[key][0] for key in keys])
+            types = [self.labels[key][1] for key in keys]
+        
+        self.last_keys = keys
+        self.last_columns = (ltp, volume, oi)
+        self.last_labels = (strikes, types)
+        
+        snapshot = ChainSnapshot(self.last_spot / 100, base + atm_offset * step, self.expiry, timestamp, timestamp)
+        snapshot.strikes = array('i', strikes)
+        snapshot.types = list(types)
+        snapshot.ltps = array('d', [price / 100 for price in ltp])
+        snapshot.volumes = array('q', volume)
+        snapshot.ois = array('q', oi)
+        return snapshot, pos
+
+
+class CodecWriter:
+    """Collector writer storing each trading day as CODEC_DIR/YYYY-MM-DD.snap"""
+    
+    def __init__(self, directory=CODEC_DIR):
+        self.directory = directory
+        self.location = f"{directory}/"
+        os.makedirs(directory, exist_ok=True)
+        
+        self.day = None
+        self.file = None
+        self.encoder = None
+    
+    def _open_day(self, day):
+        self.close()
+        path = os.path.join(self.directory, f"{day}.snap")
+        self.encoder = SnapshotEncoder(None)
+        
+        # Resuming a day: replay it to rebuild the delta state, dropping a partial record.
+        # A day started in an older version gets a new header before the next record.
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                decoder = SnapshotDecoder(f)
+                for _ in decoder:
+                    pass
+            if decoder.header and decoder.header[1] == VERSION:
+                self.encoder.header = decoder.header
+                self.encoder.last_ts = decoder.last_ts
+                self.encoder.last_spot = decoder.last_spot
+                self.encoder.last_keys = decoder.last_keys
+                self.encoder.previous = decoder.delta_state()
+            with open(path, 'r+b') as f:
+                f.truncate(decoder.valid_end)
+        
+        self.file = open(path, 'ab')
+        self.encoder.f = self.file
+        self.day = day
+    
+    def append(self, snapshot):
+        day = (snapshot.get('collected_at') or snapshot['timestamp'])[:10]
+        if day != self.day:
+            self._open_day(day)
+        self.encoder.write(snapshot)
+        self.file.flush()
+    
+    def close(self):
+        if self.file:
+            self.file.close()
+        self.file = None
+        self.day = None
+
+
+def is_codec_store(path):
+    return os.path.isdir(path) and any(name.endswith(".snap") for name in os.listdir(path))
+
+
+def read_codec(path):
+    """Yield snapshots from a .snap file or every day in a codec directory"""
+    if os.path.isdir(path):
+        files = [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".snap")]
+    else:
+        files = [path]
+    
+    for file_path in files:
+        with open(file_path, 'rb') as f:
+            yield from SnapshotDecoder(f)
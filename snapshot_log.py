@@ -0,0 +1,274 @@
+import os
+import json
+import time
+from datetime import datetime
+from tick_store import TickSeries, is_tick_store
+from tick_query import TickQuery
+from snapshot_codec import read_codec, is_codec_store
+from option_model import ChainSnapshot
+
+SNAPSHOT_DIR = "snapshots"
+
+# fsync after this many snapshots or this many seconds, whichever comes first
+FSYNC_EVERY = 10
+FSYNC_INTERVAL = 30
+
+# Read size when streaming a JSON array file
+JSON_CHUNK_SIZE = 1 << 20
+
+
+def _day_of(snapshot):
+    """Trading day (YYYY-MM-DD) a snapshot belongs to"""
+    collected_at = snapshot.get('collected_at') or snapshot.get('timestamp')
+    return collected_at[:10] if collected_at else datetime.now().strftime("%Y-%m-%d")
+
+
+class SnapshotLog:
+    """
+    Append-only, line-delimited log of option chain snapshots
+
+    One file per trading day (snapshots/YYYY-MM-DD.jsonl) with a companion .idx
+    file holding the byte offset of every record. Appending costs O(snapshot)
+    and nothing is kept in memory, however long the collector runs.
+    """
+    
+    def __init__(self, directory=SNAPSHOT_DIR, fsync_every=FSYNC_EVERY, fsync_interval=FSYNC_INTERVAL):
+        self.directory = directory
+        self.location = f"{directory}/"
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        os.makedirs(directory, exist_ok=True)
+        
+        self.day = None
+        self.log = None
+        self.index = None
+        self.count = 0  # Snapshots in the current day's file
+        self.pending = 0  # Snapshots written since the last fsync
+        self.last_sync = time.monotonic()
+    
+    def paths(self, day):
+        """(log, index) file paths for a trading day"""
+        base = os.path.join(self.directory, day)
+        return f"{base}.jsonl", f"{base}.idx"
+    
+    def _recover(self, day):
+        """
+        Make a day's log and index consistent before appending to it
+
+        A crash can leave a partial last line or an index missing the last
+        records; the partial line is truncated and the index rebuilt.
+        """
+        log_path, index_path = self.paths(day)
+        if not os.path.exists(log_path):
+            open(index_path, 'w').close()
+            return 0
+        
+        offsets = []
+        valid_end = 0
+        with open(log_path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                offsets.append(valid_end)
+                valid_end += len(line)
+        
+        if os.path.getsize(log_path) != valid_end:
+            print(f"⚠ Truncating partial record in {log_path}")
+            with open(log_path, 'r+b') as f:
+                f.truncate(valid_end)
+        
+        if read_offsets(index_path) != offsets:
+            with open(index_path, 'w') as f:
+                f.writelines(f"{offset}\n" for offset in offsets)
+        
+        return len(offsets)
+    
+    def _open_day(self, day):
+        """Rotate to a trading day's files"""
+        self.close()
+        
+        self.count = self._recover(day)
+        log_path, index_path = self.paths(day)
+        self.log = open(log_path, 'ab')
+        self.index = open(index_path, 'a')
+        self.day = day
+        
+        if self.count:
+            print(f"✓ Resuming {log_path} ({self.count} snapshots)")
+    
+    def append(self, snapshot):
+        """Append one snapshot to its trading day's log"""
+        day = _day_of(snapshot)
+        if day != self.day:
+            self._open_day(day)
+        
+        if isinstance(snapshot, ChainSnapshot):
+            record = snapshot.to_json().encode('utf-8') + b'\n'
+        else:
+            record = json.dumps(snapshot, separators=(',', ':')).encode('utf-8') + b'\n'
+        offset = self.log.tell()
+        
+        # Record before index: a crash in between only leaves the index short
+        self.log.write(record)
+        self.log.flush()
+        self.index.write(f"{offset}\n")
+        self.index.flush()
+        
+        self.count += 1
+        self.pending += 1
+        if self.pending >= self.fsync_every or time.monotonic() - self.last_sync >= self.fsync_interval:
+            self.sync()
+    
+    def sync(self):
+        """fsync everything written since the last sync"""
+        if self.log and self.pending:
+            os.fsync(self.log.fileno())
+            os.fsync(self.index.fileno())
+        self.pending = 0
+        self.last_sync = time.monotonic()
+    
+    def close(self):
+        if self.log:
+            self.sync()
+            self.log.close()
+            self.index.close()
+        self.log = None
+        self.index = None
+        self.day = None
+
+
+def read_offsets(index_path):
+    """Byte offsets of every record listed in an index file"""
+    if not os.path.exists(index_path):
+        return []
+    with open(index_path, 'r') as f:
+        return [int(line) for line in f if line.strip()]
+
+
+def list_days(directory=SNAPSHOT_DIR):
+    """Trading days with a snapshot log, oldest first"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name[:-len(".jsonl")] for name in os.listdir(directory) if name.endswith(".jsonl"))
+
+
+def count_snapshots(directory=SNAPSHOT_DIR, days=None):
+    """Number of snapshots logged, read from the indexes without parsing records"""
+    return sum(len(read_offsets(os.path.join(directory, f"{day}.idx"))) for day in (days or list_days(directory)))
+
+
+def read_snapshots(directory=SNAPSHOT_DIR, days=None):
+    """
+    Yield logged snapshots in order, one at a time
+
+    Args:
+        directory: Snapshot log directory
+        days: Trading days (YYYY-MM-DD) to read, default all
+    """
+    for day in (days or list_days(directory)):
+        with open(os.path.join(directory, f"{day}.jsonl"), 'rb') as f:
+            for line in f:
+                # A partial last line is a write still in progress
+                if not line.endswith(b'\n'):
+                    break
+                yield json.loads(line)
+
+
+def read_snapshot(day, position, directory=SNAPSHOT_DIR):
+    """Read a single snapshot by its position in the day, using the index"""
+    offsets = read_offsets(os.path.join(directory, f"{day}.idx"))
+    with open(os.path.join(directory, f"{day}.jsonl"), 'rb') as f:
+        f.seek(offsets[position])
+        return json.loads(f.readline())
+
+
+def _iter_json_lines(path):
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _iter_json_array(path, chunk_size=JSON_CHUNK_SIZE):
+    """Yield the elements of a JSON array file one at a time, reading it in chunks"""
+    decoder = json.JSONDecoder()
+    
+    with open(path, 'r') as f:
+        buffer = ""
+        pos = 0
+        started = False
+        eof = False
+        
+        while True:
+            # Skip whitespace and separators, reading more when the buffer runs out
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buffer):
+                if eof:
+                    raise ValueError(f"Unexpected end of {path}")
+                buffer = f.read(chunk_size)
+                pos = 0
+                eof = not buffer
+                continue
+            
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError(f"{path} is not a JSON array")
+                started = True
+                pos += 1
+                continue
+            
+            if buffer[pos] == "]":
+                return
+            
+            try:
+                element, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Element continues past the buffer: read another chunk
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            
+            yield element
+            pos = end
+
+
+def iter_snapshots(path):
+    """
+    Yield snapshots one at a time from any collected format, oldest first
+
+    Handles tick stores, binary snapshots (.snap file or directory), tick
+    databases (.db), snapshot log directories, .jsonl files and JSON array
+    files, so memory use doesn't grow with the size of the history.
+    """
+    if is_tick_store(path):
+        series = TickSeries(path)
+        yield from series
+        series.close()
+    elif path.endswith(".snap") or is_codec_store(path):
+        yield from read_codec(path)
+    elif path.endswith(".db"):
+        query = TickQuery(path)
+        yield from query.snapshots()
+        query.close()
+    elif os.path.isdir(path):
+        yield from read_snapshots(path)
+    elif path.endswith(".jsonl"):
+        yield from _iter_json_lines(path)
+    else:
+        yield from _iter_json_array(path)
+
+
+def load_snapshots(path):
+    """
+    Load every snapshot from any collected format (see iter_snapshots)
+
+    A tick store is returned as a lazy, memory-mapped sequence instead of a list.
+    """
+    if is_tick_store(path):
+        return TickSeries(path)
+    
+    return list(iter_snapshots(path))
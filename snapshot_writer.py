@@ -0,0 +1,123 @@
+import queue
+import threading
+import time
+
+# Snapshots waiting to be written before the collector feels backpressure
+QUEUE_SIZE = 100
+
+# Max snapshots written per batch
+BATCH_SIZE = 20
+
+# How long the collector waits for queue space before dropping a snapshot
+PUT_TIMEOUT = 5.0
+
+_STOP = object()
+
+
+class BackgroundWriter:
+    """
+    Persists snapshots on a writer thread, fed through a bounded queue
+
+    The collector only enqueues, so its cadence doesn't depend on disk or
+    database latency. The writer drains the queue in batches and hands every
+    snapshot to each underlying writer (anything with append() and close()).
+    When the queue is full the collector waits up to PUT_TIMEOUT, then drops
+    the snapshot; waits and drops are tracked in stats().
+    """
+    
+    def __init__(self, writers, max_queue=QUEUE_SIZE, batch_size=BATCH_SIZE, put_timeout=PUT_TIMEOUT):
+        self.writers = writers
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.lock = threading.Lock()
+        
+        # Backpressure and throughput metrics
+        self.queued = 0
+        self.dropped = 0
+        self.put_wait = 0.0  # Seconds the collector spent waiting for queue space
+        self.high_water = 0  # Largest queue depth seen
+        self.written = 0
+        self.batches = 0
+        self.write_time = 0.0
+        self.errors = 0
+        
+        self.thread = threading.Thread(target=self._run, name="snapshot-writer", daemon=True)
+        self.thread.start()
+    
+    def put(self, snapshot):
+        """Queue a snapshot for writing; returns False if it was dropped"""
+        started = time.monotonic()
+        try:
+            self.queue.put(snapshot, timeout=self.put_timeout)
+            accepted = True
+        except queue.Full:
+            accepted = False
+        waited = time.monotonic() - started
+        
+        with self.lock:
+            self.put_wait += waited
+            if accepted:
+                self.queued += 1
+                self.high_water = max(self.high_water, self.queue.qsize())
+            else:
+                self.dropped += 1
+        
+        if not accepted:
+            print(f"⚠ Writer queue full, dropped snapshot (waited {waited:.1f}s)")
+        return accepted
+    
+    def _next_batch(self):
+        """Block for one item, then take whatever else is queued (up to batch_size)"""
+        batch = [self.queue.get()]
+        while len(batch) < self.batch_size and batch[-1] is not _STOP:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            stopping = batch[-1] is _STOP
+            snapshots = batch[:-1] if stopping else batch
+            
+            started = time.monotonic()
+            for writer in self.writers:
+                for snapshot in snapshots:
+                    try:
+                        writer.append(snapshot)
+                    except Exception as e:
+                        with self.lock:
+                            self.errors += 1
+                        print(f"❌ Error writing snapshot to {writer.location}: {str(e)}")
+            
+            with self.lock:
+                self.written += len(snapshots)
+                self.batches += 1 if snapshots else 0
+                self.write_time += time.monotonic() - started
+            
+            if stopping:
+                return
+    
+    def close(self):
+        """Write everything still queued, then close the underlying writers"""
+        self.queue.put(_STOP)
+        self.thread.join()
+        for writer in self.writers:
+            writer.close()
+    
+    def stats(self):
+        with self.lock:
+            return {
+                'queued': self.queued,
+                'written': self.written,
+                'dropped': self.dropped,
+                'errors': self.errors,
+                'batches': self.batches,
+                'high_water': self.high_water,
+                'queue_size': self.queue.maxsize,
+                'put_wait_seconds': round(self.put_wait, 3),
+                'write_seconds': round(self.write_time, 3),
+            }
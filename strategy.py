@@ -1,5 +1,94 @@
 from datetime import datetime
-from collections import defaultdict
+from option_model import ChainSnapshot
+from data_provider import SystemClock
+
+
+
+class StrategyParams:
+    """
+    Levels and limits for one StrategyEngine (defaults: the 90→100 breakout)
+
+    Args:
+        name: Label used in notifications when several strategies run together
+        qualify_level: Price the option must touch to qualify
+        qualify_tolerance: Prices within ± this of qualify_level count as a touch
+        entry_trigger: Qualified options at or above this price trigger entry
+        target: Exit price for profit
+        stop_loss: Exit price for loss
+        lot_qty: Quantity per trade
+        max_consecutive: Max consecutive same-side trades
+    """
+    
+    def __init__(self, name="90→100", qualify_level=90, qualify_tolerance=0.5, entry_trigger=100,
+                 target=115, stop_loss=89, lot_qty=25, max_consecutive=3):
+        self.name = name
+        self.qualify_level = qualify_level
+        self.qualify_tolerance = qualify_tolerance
+        self.entry_trigger = entry_trigger
+        self.target = target
+        self.stop_loss = stop_loss
+        self.lot_qty = lot_qty
+        self.max_consecutive = max_consecutive
+    
+    @property
+    def qualify_low(self):
+        return self.qualify_level - self.qualify_tolerance
+    
+    @property
+    def qualify_high(self):
+        return self.qualify_level + self.qualify_tolerance
+    
+    def to_dict(self):
+        return dict(vars(self))
+
+
+class OptionState:
+    """Per-option qualification state: the previous price and whether ₹90 was touched"""
+    
+    __slots__ = ('prev_price', 'qualified')
+    
+    def __init__(self, qualified=False):
+        self.prev_price = None
+        self.qualified = qualified
+
+
+class ChainDiff:
+    """
+    What changed between two consecutive snapshots of the chain
+
+    changed: options whose LTP moved, in chain order
+    added: options that entered the window (new strikes, or the first snapshot)
+    removed: (strike, type) of options that left the window
+    unchanged: number of options with the same LTP as last time
+    snapshot: the ChainSnapshot (or chain dict) that was diffed
+    Positions are kept; changed/added build Option records only when read.
+    """
+    
+    __slots__ = ('snapshot', 'changed_index', 'added_index', 'removed', 'unchanged')
+    
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.changed_index = []
+        self.added_index = []
+        self.removed = []
+        self.unchanged = 0
+    
+    def _option(self, i):
+        if isinstance(self.snapshot, ChainSnapshot):
+            return self.snapshot.option(i)
+        return self.snapshot['options'][i]
+    
+    @property
+    def changed(self):
+        return [self._option(i) for i in self.changed_index]
+    
+    @property
+    def added(self):
+        return [self._option(i) for i in self.added_index]
+    
+    def __bool__(self):
+        return bool(self.changed_index or self.added_index or self.removed)
+
 
 class StrategyEngine:
     """
@@ -9,16 +98,23 @@ class StrategyEngine:
     3. Target: ₹115 | Stop Loss: ₹89
     4. Max 3 consecutive same-side trades
     5. Only 1 position at a time
+    All levels and limits come from StrategyParams, so variants can run side by side.
+    With a StateCheckpoint, state is saved after every change and restored on
+    startup; qualification, entries and trade counts reset each trading day.
+    Time comes from the injected clock, so replays and backtests stamp
+    entries, exits and alerts with the recorded time.
     """
     
-    def __init__(self, telegram_bot):
+    def __init__(self, telegram_bot, params=None, checkpoint=None, clock=None):
         self.telegram = telegram_bot
+        self.params = params or StrategyParams()
+        self.clock = clock or SystemClock()
         
         # Track qualified options (touched 90)
         self.qualified_options = set()
         
-        # Track price history for qualification check
-        self.price_history = defaultdict(list)
+        # Qualification state for options currently in the chain
+        self.option_states = {}
         
         # Current open position
         self.open_position = None
@@ -28,31 +124,59 @@ class StrategyEngine:
         
         # Track entered options to avoid re-entry
         self.entered_options = set()
+        
+        # Last LTP per (strike, type), to diff each snapshot against the previous one
+        self.last_prices = {}
+        
+        # Options with an unchanged price that could still act: qualified, at or
+        # above the trigger, not entered yet (they enter once the position closes)
+        self.pending_entries = set()
+        
+        # Diff of the last snapshot, and callbacks notified with each diff
+        self.last_diff = None
+        self.diff_listeners = []
+        
+        # Callbacks notified with every closed trade (trade logs, backtests)
+        self.trade_listeners = []
+        
+        # Trading day (YYYY-MM-DD) the state belongs to
+        self.trading_day = None
+        
+        # Where state is saved (StateCheckpoint or None), and whether it changed since the last save
+        self.checkpoint = checkpoint
+        self.state_changed = False
+        if checkpoint:
+            self.restore_state(checkpoint.load())
     
     def _get_option_key(self, strike, option_type):
         """Generate unique key for option"""
         return f"{strike}_{option_type}"
     
     def _check_qualification(self, option_key, current_price):
-        """Check if option has touched ₹90"""
-        # Add current price to history
-        self.price_history[option_key].append(current_price)
-        
-        # Keep only last 100 prices to avoid memory issues
-        if len(self.price_history[option_key]) > 100:
-            self.price_history[option_key] = self.price_history[option_key][-100:]
+        """
+        Check if option has touched ₹90
+
+        A touch is a price inside the band or a move across it since the
+        previous price (e.g. 92 → 88), so jumps between samples still qualify.
+        """
+        state = self.option_states.get(option_key)
+        if state is None:
+            state = OptionState(option_key in self.qualified_options)
+            self.option_states[option_key] = state
         
-        # Check if price has touched 90 (with ±0.5 tolerance)
-        for price in self.price_history[option_key]:
-            if 89.5 <= price <= 90.5:
-                if option_key not in self.qualified_options:
-                    self.qualified_options.add(option_key)
-                    print(f"✅ QUALIFIED: {option_key} touched ₹90")
-                return True
+        if not state.qualified:
+            previous = current_price if state.prev_price is None else state.prev_price
+            if (min(previous, current_price) <= self.params.qualify_high
+                    and max(previous, current_price) >= self.params.qualify_low):
+                state.qualified = True
+                self.qualified_options.add(option_key)
+                self.state_changed = True
+                print(f"✅ QUALIFIED: {option_key} touched ₹{self.params.qualify_level:g}")
         
-        return option_key in self.qualified_options
+        state.prev_price = current_price
+        return state.qualified
     
-    def _check_entry_trigger(self, option, option_key):
+    def _check_entry_trigger(self, option_key, current_price):
         """Check if qualified option breaks ₹100"""
         if option_key not in self.qualified_options:
             return False
@@ -60,17 +184,15 @@ class StrategyEngine:
         if option_key in self.entered_options:
             return False
         
-        current_price = option['ltp']
-        
         # Entry trigger: breaks 100
-        if current_price >= 100:
+        if current_price >= self.params.entry_trigger:
             return True
         
         return False
     
     def _check_max_consecutive_trades(self, option_type):
         """Check if max consecutive same-side trades reached"""
-        return self.consecutive_trades[option_type] >= 3
+        return self.consecutive_trades[option_type] >= self.params.max_consecutive
     
     def _enter_position(self, option):
         """Enter a new position"""
@@ -78,16 +200,16 @@ class StrategyEngine:
         
         # Check max consecutive trades
         if self._check_max_consecutive_trades(option['type']):
-            print(f"⚠️ Max 3 consecutive {option['type']} trades reached. Skipping entry.")
+            print(f"⚠️ Max {self.params.max_consecutive} consecutive {option['type']} trades reached. Skipping entry.")
             return
         
         self.open_position = {
             'strike': option['strike'],
             'type': option['type'],
             'entry_price': option['ltp'],
-            'target': 115,
-            'stop_loss': 89,
-            'entry_time': datetime.now(),
+            'target': self.params.target,
+            'stop_loss': self.params.stop_loss,
+            'entry_time': self.clock.now(),
             'option_key': option_key
         }
         
@@ -99,14 +221,17 @@ class StrategyEngine:
 Type: {option['type']}
 Strike: {option['strike']} {option['type']}
 Entry Price: ₹{option['ltp']:.2f}
-Target: ₹115
-Stop Loss: ₹89
+Target: ₹{self.params.target:g}
+Stop Loss: ₹{self.params.stop_loss:g}
 
-Qualified: Touched ₹90
-Time: {datetime.now().strftime('%I:%M:%S %p')}
+Qualified: Touched ₹{self.params.qualify_level:g}
+Time: {self.clock.now().strftime('%I:%M:%S %p')}
 """
         self.telegram.send_message(message)
         print(f"\n🚀 ENTRY: {option['strike']} {option['type']} @ ₹{option['ltp']:.2f}")
+        
+        self.state_changed = True
+        self._save_state()
     
     def _exit_position(self, current_price, exit_type):
         """Exit current position"""
@@ -115,7 +240,7 @@ Time: {datetime.now().strftime('%I:%M:%S %p')}
         
         entry_price = self.open_position['entry_price']
         pnl_per_qty = current_price - entry_price
-        total_pnl = pnl_per_qty * 25  # 25 qty per lot
+        total_pnl = pnl_per_qty * self.params.lot_qty
         
         # Update consecutive trade counter
         option_type = self.open_position['type']
@@ -134,28 +259,48 @@ Strike: {self.open_position['strike']} {self.open_position['type']}
 Entry: ₹{entry_price:.2f}
 Exit: ₹{current_price:.2f}
 P&L: ₹{pnl_per_qty:.2f} per qty
-Total P&L: ₹{total_pnl:.2f} (25 qty)
+Total P&L: ₹{total_pnl:.2f} ({self.params.lot_qty} qty)
 
-Consecutive {option_type} trades: {self.consecutive_trades[option_type]}/3
+Consecutive {option_type} trades: {self.consecutive_trades[option_type]}/{self.params.max_consecutive}
 
-Time: {datetime.now().strftime('%I:%M:%S %p')}
+Time: {self.clock.now().strftime('%I:%M:%S %p')}
 """
         self.telegram.send_message(message)
         print(f"\n{emoji} {exit_type}: {self.open_position['strike']} {self.open_position['type']} @ ₹{current_price:.2f} | P&L: ₹{total_pnl:.2f}")
         
+        if self.trade_listeners:
+            trade = {
+                'strategy': self.params.name,
+                'strike': self.open_position['strike'],
+                'type': option_type,
+                'entry_time': self.open_position['entry_time'].isoformat(),
+                'entry_price': entry_price,
+                'exit_time': self.clock.now().isoformat(),
+                'exit_price': current_price,
+                'exit_type': exit_type,
+                'qty': self.params.lot_qty,
+                'pnl': total_pnl
+            }
+            for callback in self.trade_listeners:
+                try:
+                    callback(trade)
+                except Exception as e:
+                    print(f"❌ Trade listener failed: {str(e)}")
+        
         # Clear position
         self.open_position = None
+        
+        self.state_changed = True
+        self._save_state()
     
-    def _monitor_position(self, option):
+    def _monitor_position(self, strike, option_type, current_price):
         """Monitor open position for target/stop loss"""
         if not self.open_position:
             return
         
         # Check if this is the same option as open position
-        if (option['strike'] == self.open_position['strike'] and 
-            option['type'] == self.open_position['type']):
-            
-            current_price = option['ltp']
+        if (strike == self.open_position['strike'] and 
+            option_type == self.open_position['type']):
             
             # Check target
             if current_price >= self.open_position['target']:
@@ -165,27 +310,210 @@ Time: {datetime.now().strftime('%I:%M:%S %p')}
             elif current_price <= self.open_position['stop_loss']:
                 self._exit_position(current_price, 'STOP LOSS')
     
-    def process_options(self, option_data):
-        """Process option chain data and execute strategy"""
-        if not option_data or 'options' not in option_data:
-            return
+    def _prev_prices(self):
+        """Previous price per option key, for the qualification cross check"""
+        return {key: state.prev_price for key, state in self.option_states.items() if state.prev_price is not None}
+    
+    def to_state(self):
+        """Everything needed to resume after a restart, as a JSON-serializable dict"""
+        position = None
+        if self.open_position:
+            position = dict(self.open_position, entry_time=self.open_position['entry_time'].isoformat())
         
-        options = option_data['options']
+        return {
+            'name': self.params.name,
+            'trading_day': self.trading_day,
+            'qualified_options': sorted(self.qualified_options),
+            'entered_options': sorted(self.entered_options),
+            'open_position': position,
+            'consecutive_trades': dict(self.consecutive_trades),
+            'prev_prices': self._prev_prices(),
+            'saved_at': self.clock.now().isoformat()
+        }
+    
+    def restore_state(self, state):
+        """
+        Resume from a to_state() dict (e.g. after a restart)
+
+        Prices are re-evaluated in full on the next snapshot. If that snapshot
+        is from a later day, the state is reset as on any new trading day.
+
+        Returns:
+            True if state was restored
+        """
+        if not state:
+            return False
         
-        for option in options:
-            if option['ltp'] == 0:  # Skip options with no price
-                continue
-            
-            option_key = self._get_option_key(option['strike'], option['type'])
+        try:
+            position = state.get('open_position')
+            if position:
+                position = dict(position, entry_time=datetime.fromisoformat(position['entry_time']))
             
-            # Step 1: Check qualification (touched 90)
-            is_qualified = self._check_qualification(option_key, option['ltp'])
-            
-            # Step 2: Monitor open position (if any)
-            if self.open_position:
-                self._monitor_position(option)
+            self.qualified_options = set(state['qualified_options'])
+            self.entered_options = set(state['entered_options'])
+            self.open_position = position
+            self.consecutive_trades = {'CE': 0, 'PE': 0, **state['consecutive_trades']}
+            self.option_states = {}
+            for key, price in state.get('prev_prices', {}).items():
+                self.option_states[key] = OptionState(key in self.qualified_options)
+                self.option_states[key].prev_price = price
+            self.trading_day = state['trading_day']
+        except Exception as e:
+            print(f"⚠ Ignoring saved strategy state: {str(e)}")
+            return False
+        
+        print(f"♻️ Restored {self.params.name} state from {state.get('saved_at')}: "
+              f"{len(self.qualified_options)} qualified, {len(self.entered_options)} entered, "
+              f"position: {position['option_key'] if position else 'none'}")
+        return True
+    
+    def _save_state(self):
+        """Write the checkpoint if anything changed since the last save"""
+        if self.checkpoint and self.state_changed:
+            self.checkpoint.save(self.to_state())
+        self.state_changed = False
+    
+    def _snapshot_day(self, option_data):
+        """Trading day of a snapshot: its timestamp's date, or today without one"""
+        timestamp = option_data.get('timestamp')
+        if timestamp:
+            return str(timestamp)[:10]
+        return self.clock.now().date().isoformat()
+    
+    def _start_day(self, day):
+        """Reset per-day state when the trading day changes (an open position carries over)"""
+        if self.trading_day is not None:
+            print(f"🌅 New trading day {day}: resetting {self.params.name} strategy state")
+            self.qualified_options = set()
+            self.option_states = {}
+            self.entered_options = {self.open_position['option_key']} if self.open_position else set()
+            self.consecutive_trades = {'CE': 0, 'PE': 0}
+            self.pending_entries = set()
+            self.last_prices = {}
+        
+        self.trading_day = day
+        self.state_changed = True
+    
+    def add_trade_listener(self, callback):
+        """Call callback(trade) with a dict for every closed trade (entry/exit time and price, exit type, P&L)"""
+        self.trade_listeners.append(callback)
+    
+    def add_diff_listener(self, callback):
+        """Call callback(diff) with the ChainDiff of every processed snapshot (storage, notifiers)"""
+        self.diff_listeners.append(callback)
+    
+    def _diff(self, snapshot, partial=False):
+        """
+        Diff the snapshot against the previous one
+
+        Returns the ChainDiff and the options to evaluate as (position, strike,
+        type, ltp), in chain order: changed and added ones, plus unchanged ones
+        that can still act (pending entries and the open position).
+        """
+        if isinstance(snapshot, ChainSnapshot):
+            # Straight from the arrays, no per-option objects
+            rows = zip(snapshot.strikes, snapshot.types, snapshot.ltps)
+        else:
+            rows = ((option['strike'], option['type'], option['ltp']) for option in snapshot['options'])
+        
+        diff = ChainDiff(snapshot)
+        previous = self.last_prices
+        # A partial snapshot only updates the options it carries
+        current = previous if partial else {}
+        work = []
+        
+        watch = self.pending_entries
+        if self.open_position:
+            watch = watch | {(self.open_position['strike'], self.open_position['type'])}
+        
+        for i, (strike, option_type, ltp) in enumerate(rows):
+            key = (strike, option_type)
+            last = previous.get(key) if partial else previous.pop(key, None)
+            current[key] = ltp
             
-            # Step 3: Check entry trigger (only if no open position)
-            if not self.open_position and is_qualified:
-                if self._check_entry_trigger(option, option_key):
-                    self._enter_position(option)
+            if last is None:
+                diff.added_index.append(i)
+                work.append((i, strike, option_type, ltp))
+            elif last != ltp:
+                diff.changed_index.append(i)
+                work.append((i, strike, option_type, ltp))
+            else:
+                diff.unchanged += 1
+                if key in watch:
+                    work.append((i, strike, option_type, ltp))
+        
+        # Whatever is left wasn't in this snapshot
+        if not partial:
+            diff.removed = list(previous)
+            self.last_prices = current
+        return diff, work
+    
+    def _process_option(self, diff, i, strike, option_type, ltp):
+        """Run qualification, position monitoring and the entry check for one option"""
+        if ltp == 0:  # Skip options with no price
+            return
+        
+        option_key = self._get_option_key(strike, option_type)
+        
+        # Step 1: Check qualification (touched 90)
+        is_qualified = self._check_qualification(option_key, ltp)
+        
+        # Step 2: Monitor open position (if any)
+        if self.open_position:
+            self._monitor_position(strike, option_type, ltp)
+        
+        # Step 3: Check entry trigger (only if no open position)
+        if not self.open_position and is_qualified:
+            if self._check_entry_trigger(option_key, ltp):
+                self._enter_position(diff._option(i))
+        
+        # Keep evaluating it on unchanged prices while it could still enter
+        key = (strike, option_type)
+        if is_qualified and ltp >= self.params.entry_trigger and option_key not in self.entered_options:
+            self.pending_entries.add(key)
+        else:
+            self.pending_entries.discard(key)
+    
+    def process_options(self, option_data, partial=False):
+        """
+        Process option chain data and execute strategy
+
+        Only options whose price moved (or that entered the window) are
+        evaluated, plus pending entries and the open position; an unchanged
+        price can't change anything else. Signals are the same as evaluating
+        every option.
+
+        Args:
+            option_data: ChainSnapshot (or a chain dict)
+            partial: The snapshot carries only some options (e.g. one streamed
+                tick); options missing from it keep their state
+        """
+        if not option_data or 'options' not in option_data:
+            return
+        
+        day = self._snapshot_day(option_data)
+        if day != self.trading_day:
+            self._start_day(day)
+        
+        diff, work = self._diff(option_data, partial)
+        
+        for i, strike, option_type, ltp in work:
+            self._process_option(diff, i, strike, option_type, ltp)
+        
+        # Free state for options that dropped out of the strike ladder
+        # (qualification itself is kept in qualified_options)
+        for strike, option_type in diff.removed:
+            self.option_states.pop(self._get_option_key(strike, option_type), None)
+            self.pending_entries.discard((strike, option_type))
+        
+        # One checkpoint write per snapshot that changed state
+        self._save_state()
+        
+        self.last_diff = diff
+        for callback in self.diff_listeners:
+            try:
+                callback(diff)
+            except Exception as e:
+                print(f"❌ Diff listener failed: {str(e)}")
+        
+        return diff
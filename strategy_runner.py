@@ -0,0 +1,92 @@
+import json
+from strategy import StrategyEngine, StrategyParams
+from telegram_bot import TelegramBot, PrefixedNotifier
+from strategy_state import StateCheckpoint, checkpoint_path
+
+
+class StrategyRunner:
+    """
+    Runs several strategy engines on one data feed
+
+    Each snapshot is fetched and parsed once by the provider, then handed to
+    every engine in turn. Engines keep independent state (qualification,
+    positions, consecutive-trade counts) and their own notifier, so adding a
+    variant costs a little CPU per snapshot and no extra API calls. Drop-in
+    for a single StrategyEngine wherever process_options is called.
+    """
+    
+    def __init__(self, engines):
+        self.engines = list(engines)
+    
+    def process_options(self, option_data, partial=False):
+        """Fan one snapshot out to every engine"""
+        for engine in self.engines:
+            try:
+                engine.process_options(option_data, partial)
+            except Exception as e:
+                # One faulty variant must not stop the others
+                print(f"❌ Strategy {engine.params.name} failed: {str(e)}")
+
+
+def load_params(config_file):
+    """
+    Read strategy variants from a JSON file
+
+    The file holds a list of objects with StrategyParams fields, e.g.
+        [{"name": "90→100"}, {"name": "80→95", "qualify_level": 80, "entry_trigger": 95, "target": 110, "stop_loss": 79}]
+    An optional "telegram_chat_id" sends that variant's alerts to its own chat.
+
+    Returns:
+        List of (StrategyParams, chat_id or None)
+    """
+    with open(config_file, 'r') as f:
+        variants = json.load(f)
+    
+    loaded = []
+    for variant in variants:
+        variant = dict(variant)
+        chat_id = variant.pop('telegram_chat_id', None)
+        loaded.append((StrategyParams(**variant), chat_id))
+    return loaded
+
+
+def _checkpoint(params, state_dir):
+    if not state_dir:
+        return None
+    return StateCheckpoint(checkpoint_path(params.name, state_dir))
+
+
+def create_strategy(telegram, config_file=None, engine_class=StrategyEngine, state_dir=None, clock=None):
+    """
+    Build what the scanner feeds: one default engine, or a runner over the configured variants
+
+    With several variants, alerts are prefixed with the variant name; a
+    variant with its own chat id gets its own TelegramBot. With state_dir,
+    each engine checkpoints its state to state_dir/<name>.json and resumes
+    from it on startup. clock is handed to every engine (replays).
+    """
+    if not config_file:
+        params = StrategyParams()
+        return engine_class(telegram, params, _checkpoint(params, state_dir), clock)
+    
+    variants = load_params(config_file)
+    names = [params.name for params, _ in variants]
+    # Unique as state file names too ('90→100' and '90 100' both checkpoint to 90_100.json)
+    by_path = {}
+    for name in names:
+        by_path.setdefault(checkpoint_path(name), []).append(name)
+    clashes = [same for same in by_path.values() if len(same) > 1]
+    if clashes:
+        raise ValueError(f"Strategy names must be unique, ignoring symbols and spaces: {clashes}")
+    
+    engines = []
+    for params, chat_id in variants:
+        notifier = telegram
+        if chat_id and isinstance(telegram, TelegramBot):
+            notifier = TelegramBot(telegram.bot_token, chat_id)
+        if len(variants) > 1:
+            notifier = PrefixedNotifier(notifier, params.name)
+        engines.append(engine_class(notifier, params, _checkpoint(params, state_dir), clock))
+    
+    print(f"🧪 Running {len(engines)} strategies on one feed: {', '.join(names)}")
+    return StrategyRunner(engines)
@@ -0,0 +1,51 @@
+import json
+import os
+import re
+
+STATE_DIR = "strategy_state"
+
+
+def checkpoint_path(name, directory=STATE_DIR):
+    """State file for the strategy variant called `name` (e.g. '90→100' -> strategy_state/90_100.json)"""
+    slug = re.sub(r'[^A-Za-z0-9_-]+', '_', name).strip('_') or 'strategy'
+    return os.path.join(directory, f"{slug}.json")
+
+
+class StateCheckpoint:
+    """
+    A StrategyEngine's state on disk, for a warm restart
+
+    The engine saves after every state change (qualification, entry, exit,
+    new trading day) and loads it once on startup. Each save writes a temp
+    file and renames it over the old one, so a crash mid-write leaves the
+    previous checkpoint intact. The file is a few hundred bytes of JSON.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    
+    def save(self, state):
+        """Atomically replace the checkpoint with `state` (a JSON-serializable dict)"""
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, separators=(',', ':'), ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            return True
+        except Exception as e:
+            print(f"⚠ Could not save strategy state: {str(e)}")
+            return False
+    
+    def load(self):
+        """The saved state, or None if there is none (or it can't be read)"""
+        try:
+            if not os.path.exists(self.path):
+                return None
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"⚠ Could not read strategy state: {str(e)}")
+            return None
@@ -0,0 +1,80 @@
+from datetime import datetime, time as dt_time
+
+STRIKE_STEP = 50
+
+# Strikes on each side of the opening ATM held by the ladder
+LADDER_WIDTH = 40
+
+# Contracts expire at market close on expiry day
+EXPIRY_CUTOFF = dt_time(15, 30)
+
+
+def nearest_expiry(instruments, underlying="NIFTY", now=None):
+    """
+    Get the nearest listed expiry ("%d-%b-%Y") from the instrument master
+
+    Uses the actual listed expiries, so holiday-shifted expiries are handled.
+    Returns None if the master has no expiries for the underlying.
+    """
+    now = now or datetime.now()
+    
+    for expiry_date in instruments.get_expiries(underlying):
+        if expiry_date < now.date():
+            continue
+        if expiry_date == now.date() and now.time() >= EXPIRY_CUTOFF:
+            continue
+        return expiry_date.strftime("%d-%b-%Y")
+    
+    return None
+
+
+class StrikeLadder:
+    """
+    Per-session strike ladder for one expiry
+
+    Built once for a wide band around the opening spot with symbols and tokens
+    resolved up front, so following ATM during the day is just a slice.
+    """
+    
+    def __init__(self, instruments, spot_price, expiry, width=LADDER_WIDTH, underlying="NIFTY"):
+        self.expiry = expiry
+        self.expiry_date = datetime.strptime(expiry, "%d-%b-%Y").date()
+        self.underlying = underlying
+        self.built_on = datetime.now().date()
+        
+        center = round(spot_price / STRIKE_STEP) * STRIKE_STEP
+        self.strikes = [center + (i * STRIKE_STEP) for i in range(-width, width + 1)]
+        
+        # Flat list ordered by strike then CE/PE: (strike, type, token, symbol)
+        # Unlisted contracts keep their slot with token None
+        self.entries = []
+        for strike in self.strikes:
+            for option_type in ("CE", "PE"):
+                contract = instruments.lookup(underlying, expiry, strike, option_type)
+                if contract:
+                    self.entries.append((strike, option_type, contract['token'], contract['symbol']))
+                else:
+                    self.entries.append((strike, option_type, None, None))
+        
+        self.listed = sum(1 for entry in self.entries if entry[2])
+        print(f"✓ Strike ladder: {self.strikes[0]}-{self.strikes[-1]} for {expiry} ({self.listed} contracts)")
+    
+    def covers(self, atm_strike, strikes_each_side=5):
+        """Check if ATM ± strikes_each_side is inside the ladder"""
+        low = atm_strike - (strikes_each_side * STRIKE_STEP)
+        high = atm_strike + (strikes_each_side * STRIKE_STEP)
+        return self.strikes[0] <= low and high <= self.strikes[-1]
+    
+    def is_current(self, now=None):
+        """Check the ladder was built today, has contracts and its expiry hasn't passed"""
+        now = now or datetime.now()
+        if self.built_on != now.date() or not self.listed:
+            return False
+        
+        return self.expiry_date > now.date() or (self.expiry_date == now.date() and now.time() < EXPIRY_CUTOFF)
+    
+    def window(self, atm_strike, strikes_each_side=5):
+        """Get listed (strike, type, token, symbol) entries for ATM ± strikes_each_side"""
+        first = (atm_strike - self.strikes[0]) // STRIKE_STEP - strikes_each_side
+        last = first + (2 * strikes_each_side) + 1
+        return [entry for entry in self.entries[2 * first:2 * last] if entry[2]]
@@ -0,0 +1,247 @@
+import os
+import gc
+import csv
+import time
+import argparse
+import itertools
+import multiprocessing
+from datetime import datetime
+from event_backtest import EventBacktest, load_history
+from snapshot_log import SNAPSHOT_DIR
+from strategy import StrategyParams
+
+# Swept StrategyParams fields and their command-line defaults (the live strategy)
+SWEEP_FIELDS = {
+    'qualify_level': "90",
+    'qualify_tolerance': "0.5",
+    'entry_trigger': "100",
+    'target': "115",
+    'stop_loss': "89",
+    'max_consecutive': "3"
+}
+
+# Swept fields that only take whole numbers
+INTEGER_FIELDS = ('max_consecutive',)
+
+RESULT_COLUMNS = ['rank', 'name'] + list(SWEEP_FIELDS) + [
+    'trades', 'win_rate', 'net_pnl', 'profit_factor', 'max_drawdown', 'gross_profit', 'gross_loss'
+]
+
+SORT_KEYS = ('net_pnl', 'profit_factor', 'win_rate', 'max_drawdown')
+
+# Collected history, loaded once in the parent and inherited by forked workers
+_history = None
+
+
+def parse_range(text, integer=False):
+    """
+    Values for one parameter: "90", "85,90,95" or an inclusive range "85:95:2.5"
+
+    With integer, every value must be a whole number ("2:4:1", not "2:3:0.5").
+    """
+    if ":" in text:
+        start, stop, step = (float(part) for part in text.split(":"))
+        if step <= 0:
+            raise ValueError(f"Step must be positive: {text}")
+        count = int(round((stop - start) / step)) + 1
+        values = [round(start + i * step, 6) for i in range(count)]
+    else:
+        values = [float(value) for value in text.split(",") if value.strip()]
+    
+    if integer:
+        if not all(value.is_integer() for value in values):
+            raise ValueError(f"Whole numbers only: {text}")
+        return [int(value) for value in values]
+    return values
+
+
+def build_grid(ranges, lot_qty=25):
+    """
+    StrategyParams for every combination of the ranges ({field: [values]})
+
+    Combinations that can't trade as intended (stop at or above the trigger,
+    target at or below it) are left out.
+    """
+    fields = list(ranges)
+    grid = []
+    for values in itertools.product(*(ranges[field] for field in fields)):
+        point = dict(zip(fields, values))
+        point['max_consecutive'] = int(point['max_consecutive'])
+        if not point['stop_loss'] < point['entry_trigger'] < point['target']:
+            continue
+        
+        name = (f"{point['qualify_level']:g}±{point['qualify_tolerance']:g}→{point['entry_trigger']:g} "
+                f"T{point['target']:g} SL{point['stop_loss']:g} x{point['max_consecutive']}")
+        grid.append(StrategyParams(name=name, lot_qty=lot_qty, **point))
+    return grid
+
+
+def _init_worker(data_file, trading_hours_only):
+    """Pool initializer where workers aren't forked (Windows): load the history per worker"""
+    global _history
+    if _history is None:
+        _history = load_history(data_file, trading_hours_only)
+
+
+def _evaluate(params):
+    """Backtest one parameter set on the shared history"""
+    backtest = EventBacktest([params])
+    run = backtest.run(_history)[0]
+    return params, run.summary()
+
+
+class ParameterSweep:
+    """
+    Backtests a grid of StrategyParams on collected data across a process pool
+
+    The history is loaded once, as compact ChainSnapshots, before the pool
+    starts. Forked workers share it read-only (gc.freeze() keeps the garbage
+    collector from touching, and so copying, its pages). Each worker runs
+    whole backtests (EventBacktest, the real StrategyEngine) for the
+    parameter sets it is handed, so work scales with the number of cores.
+    """
+    
+    def __init__(self, data_file=SNAPSHOT_DIR, workers=None, trading_hours_only=True):
+        self.data_file = data_file
+        self.workers = workers or os.cpu_count() or 1
+        self.trading_hours_only = trading_hours_only
+        self.snapshots = 0
+    
+    def load(self):
+        """Load the history into the module-level copy workers inherit"""
+        global _history
+        started = time.perf_counter()
+        _history = load_history(self.data_file, self.trading_hours_only)
+        self.snapshots = len(_history)
+        print(f"📂 Loaded {self.snapshots} snapshots from {self.data_file} in {time.perf_counter() - started:.1f}s")
+    
+    def run(self, grid):
+        """
+        Backtest every parameter set
+
+        Returns:
+            List of (StrategyParams, summary dict), in grid order
+        """
+        if _history is None:
+            self.load()
+        
+        started = time.perf_counter()
+        results = []
+        
+        if self.workers == 1:
+            for i, params in enumerate(grid, 1):
+                results.append(_evaluate(params))
+                self._progress(i, len(grid), started)
+            return results
+        
+        forked = 'fork' in multiprocessing.get_all_start_methods()
+        if forked:
+            context = multiprocessing.get_context('fork')
+            initargs = (None, None)
+        else:
+            context = multiprocessing.get_context('spawn')
+            initargs = (self.data_file, self.trading_hours_only)
+        
+        # Small chunks keep every core busy until the end of the grid
+        chunksize = max(1, len(grid) // (self.workers * 8))
+        if forked:
+            gc.freeze()
+        try:
+            with context.Pool(self.workers, initializer=_init_worker, initargs=initargs) as pool:
+                for i, result in enumerate(pool.imap(_evaluate, grid, chunksize), 1):
+                    results.append(result)
+                    self._progress(i, len(grid), started)
+        finally:
+            if forked:
+                gc.unfreeze()
+        return results
+    
+    def _progress(self, done, total, started):
+        if done == total or done % max(1, total // 20) == 0:
+            elapsed = time.perf_counter() - started
+            print(f"   {done}/{total} parameter sets ({elapsed:.0f}s, {done / elapsed:.1f}/s)")
+
+
+def rank(results, sort_key='net_pnl'):
+    """Result rows sorted best first (lowest drawdown first when sorting by drawdown)"""
+    rows = []
+    for params, summary in results:
+        row = {'name': params.name, **{field: getattr(params, field) for field in SWEEP_FIELDS}}
+        row.update({column: summary[column] for column in RESULT_COLUMNS if column in summary})
+        rows.append(row)
+    
+    rows.sort(key=lambda row: row[sort_key], reverse=sort_key != 'max_drawdown')
+    for i, row in enumerate(rows, 1):
+        row['rank'] = i
+    return rows
+
+
+def print_table(rows, top=20):
+    """Print the best rows as a table"""
+    print("\n" + "=" * 100)
+    print("🏆 PARAMETER SWEEP RESULTS")
+    print("=" * 100)
+    print(f"{'#':>4}  {'Strategy':<36} {'Trades':>6} {'Win %':>7} {'Net P&L':>12} {'PF':>6} {'Max DD':>11}")
+    for row in rows[:top]:
+        net_pnl = f"₹{row['net_pnl']:,.2f}"
+        max_drawdown = f"₹{row['max_drawdown']:,.2f}"
+        print(f"{row['rank']:>4}  {row['name']:<36} {row['trades']:>6} {row['win_rate']:>6.1f}% "
+              f"{net_pnl:>12} {row['profit_factor']:>6.2f} {max_drawdown:>11}")
+    if len(rows) > top:
+        print(f"... {len(rows) - top} more in the results file")
+    print("=" * 100)
+
+
+def save_table(rows, filename=None):
+    """Write every ranked row to CSV; returns the file name"""
+    filename = filename or f"sweep_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"💾 Results saved to: {filename}")
+    return filename
+
+
+def main():
+    """Sweep strategy levels over collected data, e.g. --target 110:125:5 --stop-loss 85,87,89"""
+    parser = argparse.ArgumentParser(description="Backtest a grid of strategy parameters on collected data")
+    parser.add_argument("data", nargs="?", default=SNAPSHOT_DIR,
+                        help=f"snapshot log, tick store, .snap, .db or JSON file (default {SNAPSHOT_DIR})")
+    for field, default in SWEEP_FIELDS.items():
+        parser.add_argument(f"--{field.replace('_', '-')}", default=default,
+                            help=f"value, list (a,b,c) or range (start:stop:step); default {default}")
+    parser.add_argument("--lot-qty", type=int, default=25, help="quantity per trade (default 25)")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--sort", choices=SORT_KEYS, default='net_pnl', help="ranking column (default net_pnl)")
+    parser.add_argument("--top", type=int, default=20, help="rows to print (default 20)")
+    parser.add_argument("--all-hours", action="store_true", help="also replay snapshots outside trading hours")
+    parser.add_argument("--output", default=None, help="CSV file (default sweep_results_<time>.csv)")
+    args = parser.parse_args()
+    
+    try:
+        ranges = {field: parse_range(getattr(args, field), field in INTEGER_FIELDS) for field in SWEEP_FIELDS}
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    grid = build_grid(ranges, args.lot_qty)
+    if not grid:
+        print("❌ No valid parameter combinations (need stop loss < entry trigger < target)")
+        return
+    
+    sweep = ParameterSweep(args.data, args.workers, trading_hours_only=not args.all_hours)
+    print(f"🧪 Sweeping {len(grid)} parameter sets on {sweep.workers} workers")
+    sweep.load()
+    
+    started = time.perf_counter()
+    results = sweep.run(grid)
+    elapsed = time.perf_counter() - started
+    print(f"⏱️ {len(grid)} backtests in {elapsed:.1f}s ({len(grid) * sweep.snapshots / elapsed:,.0f} snapshots/sec)")
+    
+    rows = rank(results, args.sort)
+    print_table(rows, args.top)
+    save_table(rows, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -29,3 +29,32 @@ class TelegramBot:
         except Exception as e:
             print(f"Error sending Telegram message: {str(e)}")
             return False
+
+
+class NullNotifier:
+    """Drop-in for TelegramBot that sends nothing (replays, load tests)"""
+    
+    def send_message(self, message):
+        return True
+
+
+class RecordingNotifier:
+    """Drop-in for TelegramBot that keeps every message instead of sending it (backtests)"""
+    
+    def __init__(self):
+        self.messages = []
+    
+    def send_message(self, message):
+        self.messages.append(message)
+        return True
+
+
+class PrefixedNotifier:
+    """Wraps a notifier so every message is tagged with a strategy name"""
+    
+    def __init__(self, notifier, prefix):
+        self.notifier = notifier
+        self.prefix = prefix
+    
+    def send_message(self, message):
+        return self.notifier.send_message(f"[{self.prefix}]\n{message}")
@@ -0,0 +1,135 @@
+import time
+import sqlite3
+from datetime import datetime
+from option_model import ChainSnapshot
+
+TICK_DB_FILE = "ticks.db"
+
+# Commit after this many snapshots or this many seconds, whichever comes first
+BATCH_SIZE = 10
+FLUSH_INTERVAL = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    ts TEXT NOT NULL,
+    spot REAL,
+    atm INTEGER,
+    expiry TEXT
+);
+CREATE TABLE IF NOT EXISTS ticks (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots(id),
+    ts TEXT NOT NULL,
+    expiry TEXT NOT NULL,
+    strike INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    ltp REAL NOT NULL,
+    volume INTEGER,
+    oi INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_ticks_contract ON ticks (expiry, strike, type, ts);
+CREATE INDEX IF NOT EXISTS idx_ticks_snapshot ON ticks (snapshot_id);
+CREATE INDEX IF NOT EXISTS idx_snapshots_ts ON snapshots (ts);
+"""
+
+
+def expiry_to_iso(expiry):
+    """'17-Oct-2026' -> '2026-10-17', so expiries sort and compare as text"""
+    return datetime.strptime(expiry, "%d-%b-%Y").strftime("%Y-%m-%d") if expiry else None
+
+
+def iso_to_expiry(expiry_iso):
+    """'2026-10-17' -> '17-Oct-2026' (the format used in option chains)"""
+    return datetime.strptime(expiry_iso, "%Y-%m-%d").strftime("%d-%b-%Y") if expiry_iso else None
+
+
+def connect(db_file=TICK_DB_FILE, readonly=False):
+    """Open the tick database in WAL mode (readers never block the collector)"""
+    if readonly:
+        conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    else:
+        # Written from the collector's writer thread, one thread at a time
+        conn = sqlite3.connect(db_file, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+    return conn
+
+
+class TickDatabase:
+    """
+    SQLite writer for collected option chain snapshots
+
+    Snapshots are buffered and inserted in batches (one transaction and one
+    executemany per batch). Query the data with tick_query.TickQuery.
+    """
+    
+    def __init__(self, db_file=TICK_DB_FILE, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.db_file = db_file
+        self.location = db_file
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.conn = connect(db_file)
+        
+        self.pending = []
+        self.last_flush = time.monotonic()
+    
+    def append(self, snapshot):
+        """Buffer one snapshot, writing the batch when it's full or old enough"""
+        self.pending.append(snapshot)
+        if len(self.pending) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+    
+    def _option_rows(self, snapshot):
+        """(expiry, strike, type, ltp, volume, oi) for every option of a snapshot"""
+        expiry = expiry_to_iso(snapshot.get('expiry'))
+        if isinstance(snapshot, ChainSnapshot):
+            return [(expiry, *row) for row in snapshot.rows()]
+        
+        return [
+            (
+                expiry_to_iso(option.get('expiry') or snapshot.get('expiry')),
+                int(option['strike']),
+                option['type'],
+                option['ltp'],
+                option.get('volume'),
+                option.get('oi')
+            )
+            for option in snapshot['options']
+        ]
+    
+    def flush(self):
+        """Insert every buffered snapshot in one transaction"""
+        if self.pending:
+            with self.conn:
+                ticks = []
+                for snapshot in self.pending:
+                    ts = snapshot.get('collected_at') or snapshot['timestamp']
+                    
+                    # One unusable snapshot is skipped, not the whole batch
+                    try:
+                        rows = self._option_rows(snapshot)
+                    except Exception as e:
+                        print(f"⚠ Skipping snapshot {ts} in {self.db_file}: {str(e)}")
+                        continue
+                    if any(row[0] is None for row in rows):
+                        print(f"⚠ Skipping snapshot {ts} in {self.db_file}: options without an expiry")
+                        continue
+                    
+                    snapshot_id = self.conn.execute(
+                        "INSERT INTO snapshots (ts, spot, atm, expiry) VALUES (?, ?, ?, ?)",
+                        (ts, snapshot.get('spot_price'), snapshot.get('atm_strike'), expiry_to_iso(snapshot.get('expiry')))
+                    ).lastrowid
+                    ticks.extend((snapshot_id, ts, *row) for row in rows)
+                
+                self.conn.executemany(
+                    "INSERT INTO ticks (snapshot_id, ts, expiry, strike, type, ltp, volume, oi) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    ticks
+                )
+        
+        self.pending = []
+        self.last_flush = time.monotonic()
+    
+    def close(self):
+        self.flush()
+        self.conn.close()
@@ -0,0 +1,115 @@
+from array import array
+from tick_db import TICK_DB_FILE, connect, expiry_to_iso, iso_to_expiry
+
+
+class TickQuery:
+    """
+    Read-only queries over the tick database
+
+    Every query is served from the (expiry, strike, type, ts) index and returns
+    a generator or typed arrays, so only the requested slice is loaded. E.g.
+    all 23500 CE prints between 10:00 and 11:00 over the last 20 expiries:
+
+        query = TickQuery()
+        for row in query.contract_ticks(23500, "CE", last_expiries=20, start_time="10:00", end_time="11:00"):
+            ...
+    """
+    
+    def __init__(self, db_file=TICK_DB_FILE):
+        self.conn = connect(db_file, readonly=True)
+    
+    def expiries(self, last=None):
+        """Collected expiries ('YYYY-MM-DD'), oldest first; last=N for the N most recent"""
+        rows = self.conn.execute("SELECT DISTINCT expiry FROM ticks ORDER BY expiry DESC").fetchall()
+        expiries = [row[0] for row in rows]
+        if last:
+            expiries = expiries[:last]
+        return list(reversed(expiries))
+    
+    def contract_ticks(self, strike, option_type, expiry=None, last_expiries=None,
+                       start_time=None, end_time=None, start=None, end=None):
+        """
+        Yield (ts, expiry, ltp, volume, oi) for one strike/type, oldest first
+
+        Args:
+            expiry: Single expiry ('17-Oct-2026' or '2026-10-17'), default all
+            last_expiries: Limit to the N most recent expiries
+            start_time / end_time: Time of day bounds ('HH:MM'), inclusive
+            start / end: Timestamp bounds (ISO strings), inclusive
+        """
+        if expiry:
+            expiries = [expiry if expiry[:4].isdigit() else expiry_to_iso(expiry)]
+        else:
+            expiries = self.expiries(last=last_expiries)
+        
+        sql = "SELECT ts, expiry, ltp, volume, oi FROM ticks WHERE expiry = ? AND strike = ? AND type = ?"
+        filters = []
+        if start:
+            sql += " AND ts >= ?"
+            filters.append(start)
+        if end:
+            sql += " AND ts <= ?"
+            filters.append(end)
+        if start_time:
+            sql += " AND substr(ts, 12, 5) >= ?"
+            filters.append(start_time)
+        if end_time:
+            sql += " AND substr(ts, 12, 5) <= ?"
+            filters.append(end_time)
+        sql += " ORDER BY ts"
+        
+        # One indexed range scan per expiry
+        for expiry_iso in expiries:
+            yield from self.conn.execute(sql, (expiry_iso, int(strike), option_type, *filters))
+    
+    def price_series(self, strike, option_type, **filters):
+        """
+        Get (timestamps, ltp, volume, oi) for one strike/type as typed arrays
+
+        Takes the same filters as contract_ticks().
+        """
+        timestamps = []
+        ltp = array('d')
+        volume = array('q')
+        oi = array('q')
+        
+        for ts, _, price, traded, interest in self.contract_ticks(strike, option_type, **filters):
+            timestamps.append(ts)
+            ltp.append(price)
+            volume.append(traded or 0)
+            oi.append(interest or 0)
+        
+        return timestamps, ltp, volume, oi
+    
+    def snapshots(self, start=None, end=None):
+        """Yield snapshots as the usual option chain dicts, oldest first"""
+        sql = "SELECT id, ts, spot, atm, expiry FROM snapshots"
+        bounds = []
+        if start:
+            bounds.append(("ts >= ?", start))
+        if end:
+            bounds.append(("ts <= ?", end))
+        if bounds:
+            sql += " WHERE " + " AND ".join(condition for condition, _ in bounds)
+        sql += " ORDER BY ts, id"
+        
+        for snapshot_id, ts, spot, atm, expiry in self.conn.execute(sql, [value for _, value in bounds]):
+            options = [
+                {'strike': strike, 'type': option_type, 'ltp': ltp, 'volume': volume, 'oi': oi, 'expiry': iso_to_expiry(option_expiry)}
+                for strike, option_type, ltp, volume, oi, option_expiry in self.conn.execute(
+                    "SELECT strike, type, ltp, volume, oi, expiry FROM ticks WHERE snapshot_id = ?",
+                    (snapshot_id,)
+                )
+            ]
+            yield {
+                'spot_price': spot,
+                'atm_strike': atm,
+                'expiry': iso_to_expiry(expiry),
+                'options': options,
+                'timestamp': ts,
+                'collected_at': ts
+            }
+    
+    def close(self):
+        self.conn.close()
+
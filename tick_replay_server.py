@@ -0,0 +1,211 @@
+import sys
+import json
+import base64
+import struct
+import asyncio
+import hashlib
+import argparse
+import threading
+from tick_stream import pack_tick, load_recorded_ticks
+
+# RFC 6455 handshake GUID and the frame opcodes the feed uses
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+SUBSCRIBE_ACTION = 1
+
+
+def _frame(opcode, payload=b""):
+    """One unmasked server-to-client frame"""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def _read_frame(reader):
+    """(opcode, payload) of the next client frame (clients always mask)"""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", await reader.readexactly(8))[0]
+    
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+    return first & 0x0F, payload
+
+
+class TickReplayServer:
+    """
+    Local stand-in for the SmartAPI WebSocket feed that replays recorded ticks
+
+    Speaks just enough WebSocket (handshake, binary frames, ping/pong, close)
+    for SmartWebSocketV2, so TickStreamer(ws_url=server.url) runs unchanged
+    against it. Each connection waits for the client's first subscribe
+    request, then gets every tick as a binary feed packet (pack_tick), in
+    recorded order. Subscribe/unsubscribe requests are kept in `requests`
+    and the live subscription per mode in `subscribed`, to check what the
+    streamer asked for. Runs on its own thread: start() / stop().
+    """
+    
+    def __init__(self, ticks, host="localhost", port=0, interval=0):
+        self.frames = [pack_tick(tick) for tick in ticks]
+        self.host = host
+        self.port = port
+        self.interval = interval  # Seconds between ticks
+        
+        self.requests = []
+        self.subscribed = {}  # mode -> set of tokens
+        self.headers = []  # Handshake headers of every connection
+        self.connections = 0
+        
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._tasks = set()
+        self._ready = threading.Event()
+    
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+    
+    def start(self):
+        """Start serving on a background thread; returns the URL"""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+        return self.url
+    
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        self._server = self._loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+        self._loop.close()
+    
+    def stop(self):
+        """Close every connection and stop the server"""
+        if self._loop and self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(5)
+            self._thread.join(5)
+    
+    async def _shutdown(self):
+        self._server.close()
+        await self._server.wait_closed()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._loop.call_soon(self._loop.stop)
+    
+    async def _handshake(self, reader, writer):
+        """Answer the HTTP upgrade request; returns its headers"""
+        request = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+        headers = {}
+        for line in request.split("\r\n")[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        
+        accept = base64.b64encode(hashlib.sha1((headers['sec-websocket-key'] + WS_GUID).encode()).digest()).decode()
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode()
+        )
+        await writer.drain()
+        return headers
+    
+    def _on_request(self, request):
+        """Track a subscribe/unsubscribe request"""
+        self.requests.append(request)
+        mode = request['params']['mode']
+        tokens = {token for entry in request['params']['tokenList'] for token in entry['tokens']}
+        if request['action'] == SUBSCRIBE_ACTION:
+            self.subscribed.setdefault(mode, set()).update(tokens)
+        else:
+            self.subscribed.get(mode, set()).difference_update(tokens)
+    
+    async def _read_client(self, reader, writer, subscribed):
+        """Handle client frames until it closes the connection"""
+        while True:
+            opcode, payload = await _read_frame(reader)
+            if opcode == OP_TEXT:
+                try:
+                    request = json.loads(payload)
+                except ValueError:
+                    continue  # Text heartbeat
+                self._on_request(request)
+                if request.get('action') == SUBSCRIBE_ACTION:
+                    subscribed.set()
+            elif opcode == OP_PING:
+                writer.write(_frame(OP_PONG, payload))
+                await writer.drain()
+            elif opcode == OP_CLOSE:
+                writer.write(_frame(OP_CLOSE, payload[:2]))
+                await writer.drain()
+                return
+    
+    async def _handle(self, reader, writer):
+        """Replay every tick to one connection"""
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        client = None
+        try:
+            self.headers.append(await self._handshake(reader, writer))
+            self.connections += 1
+            
+            subscribed = asyncio.Event()
+            client = asyncio.ensure_future(self._read_client(reader, writer, subscribed))
+            waiting = asyncio.ensure_future(subscribed.wait())
+            await asyncio.wait({client, waiting}, return_when=asyncio.FIRST_COMPLETED)
+            waiting.cancel()
+            if client.done():
+                return  # Closed before subscribing
+            
+            for frame in self.frames:
+                writer.write(_frame(OP_BINARY, frame))
+                await writer.drain()
+                if self.interval:
+                    await asyncio.sleep(self.interval)
+            
+            await client
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if client:
+                client.cancel()
+            writer.close()
+            self._tasks.discard(task)
+
+
+def main():
+    """Serve recorded ticks until interrupted, e.g. for TickStreamer(ws_url="ws://localhost:8765")"""
+    parser = argparse.ArgumentParser(description="Replay ticks recorded by TickStreamer over a local WebSocket")
+    parser.add_argument("ticks", help="ticks recorded with TickStreamer(record_file=...)")
+    parser.add_argument("--port", type=int, default=8765, help="port (default 8765)")
+    parser.add_argument("--interval", type=float, default=0, help="seconds between ticks (default 0)")
+    args = parser.parse_args()
+    
+    server = TickReplayServer(list(load_recorded_ticks(args.ticks)), port=args.port, interval=args.interval)
+    print(f"📡 Replaying {len(server.frames)} ticks on {server.start()} (Ctrl+C to stop)")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
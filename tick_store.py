@@ -0,0 +1,330 @@
+import os
+import sys
+import json
+import mmap
+from array import array
+from datetime import datetime, timedelta
+from option_model import ChainSnapshot
+
+TICK_STORE_DIR = "tick_store"
+
+# Naive timestamps are stored as milliseconds since this epoch (no timezone shift)
+EPOCH = datetime(1970, 1, 1)
+
+OPTION_TYPES = ("CE", "PE")
+
+# One file per column in each day's directory: name -> array typecode
+# Option rows (one per option per snapshot)
+ROW_COLUMNS = {
+    'strike': 'i',   # int32
+    'type': 'b',     # int8, index into OPTION_TYPES
+    'ltp': 'q',      # int64 paise
+    'volume': 'q',   # int64
+    'oi': 'q',       # int64
+}
+
+# Snapshot rows; 'start' and 'count' locate each snapshot's option rows
+SNAPSHOT_COLUMNS = {
+    'ts': 'q',       # int64 ms since EPOCH
+    'spot': 'q',     # int64 paise
+    'atm': 'i',      # int32
+    'expiry': 'i',   # int32 YYYYMMDD
+    'start': 'q',    # int64 first option row
+    'count': 'i',    # int32 option rows
+}
+
+
+def _to_paise(price):
+    return int(round(price * 100))
+
+
+def _to_ms(iso_timestamp):
+    return int((datetime.fromisoformat(iso_timestamp) - EPOCH) / timedelta(milliseconds=1))
+
+
+def _expiry_to_int(expiry):
+    return int(datetime.strptime(expiry, "%d-%b-%Y").strftime("%Y%m%d")) if expiry else 0
+
+
+def _int_to_expiry(value):
+    return datetime.strptime(str(value), "%Y%m%d").strftime("%d-%b-%Y") if value else None
+
+
+def _column_path(day_dir, name, typecode):
+    return os.path.join(day_dir, f"{name}.{typecode}")
+
+
+class TickStoreWriter:
+    """
+    Appends option chain snapshots to per-day columnar partitions
+
+    Each day is a directory of typed column files (tick_store/YYYY-MM-DD/ltp.q
+    ...), written with array.tofile so a snapshot costs one small append per
+    column. Snapshot columns are written last and act as the commit marker.
+    """
+    
+    def __init__(self, directory=TICK_STORE_DIR):
+        self.directory = directory
+        self.location = f"{directory}/"
+        os.makedirs(directory, exist_ok=True)
+        
+        self.day = None
+        self.files = {}
+        self.rows = 0  # Option rows committed in the current day
+        self.count = 0  # Snapshots in the current day
+    
+    def _recover(self, day_dir):
+        """Drop rows written after the last complete snapshot (e.g. after a crash)"""
+        sizes = {}
+        for name, typecode in SNAPSHOT_COLUMNS.items():
+            path = _column_path(day_dir, name, typecode)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            sizes[name] = size // array(typecode).itemsize
+        snapshots = min(sizes.values())
+        
+        rows = 0
+        if snapshots:
+            last = TickDay(day_dir)
+            rows = last.start[snapshots - 1] + last.count[snapshots - 1]
+            last.close()
+        
+        for columns, length in ((SNAPSHOT_COLUMNS, snapshots), (ROW_COLUMNS, rows)):
+            for name, typecode in columns.items():
+                path = _column_path(day_dir, name, typecode)
+                with open(path, 'ab') as f:
+                    f.truncate(length * array(typecode).itemsize)
+        
+        return snapshots, rows
+    
+    def _open_day(self, day):
+        self.close()
+        
+        day_dir = os.path.join(self.directory, day)
+        os.makedirs(day_dir, exist_ok=True)
+        self.count, self.rows = self._recover(day_dir)
+        
+        for columns in (ROW_COLUMNS, SNAPSHOT_COLUMNS):
+            for name, typecode in columns.items():
+                self.files[name] = open(_column_path(day_dir, name, typecode), 'ab')
+        self.day = day
+    
+    def append(self, snapshot):
+        """Append one snapshot to its day's partition"""
+        collected_at = snapshot.get('collected_at') or snapshot['timestamp']
+        day = collected_at[:10]
+        if day != self.day:
+            self._open_day(day)
+        
+        if isinstance(snapshot, ChainSnapshot):
+            # Strike/volume/OI columns are the snapshot's own arrays
+            row_values = {
+                'strike': snapshot.strikes,
+                'type': array('b', [OPTION_TYPES.index(option_type) for option_type in snapshot.types]),
+                'ltp': array('q', [_to_paise(ltp) for ltp in snapshot.ltps]),
+                'volume': snapshot.volumes,
+                'oi': snapshot.ois,
+            }
+        else:
+            options = snapshot['options']
+            row_values = {
+                'strike': array('i', [int(option['strike']) for option in options]),
+                'type': array('b', [OPTION_TYPES.index(option['type']) for option in options]),
+                'ltp': array('q', [_to_paise(option['ltp']) for option in options]),
+                'volume': array('q', [int(option.get('volume') or 0) for option in options]),
+                'oi': array('q', [int(option.get('oi') or 0) for option in options]),
+            }
+        count = len(row_values['type'])
+        snapshot_values = {
+            'ts': array('q', [_to_ms(collected_at)]),
+            'spot': array('q', [_to_paise(snapshot['spot_price'])]),
+            'atm': array('i', [int(snapshot['atm_strike'])]),
+            'expiry': array('i', [_expiry_to_int(snapshot.get('expiry'))]),
+            'start': array('q', [self.rows]),
+            'count': array('i', [count]),
+        }
+        
+        for values in (row_values, snapshot_values):
+            for name, column in values.items():
+                column.tofile(self.files[name])
+                self.files[name].flush()
+        
+        self.rows += count
+        self.count += 1
+    
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        self.files = {}
+        self.day = None
+
+
+class TickDay:
+    """
+    Read-only, memory-mapped view of one day's columns
+
+    Columns are memoryviews over the mapped files, so opening a day costs a few
+    syscalls and values are only turned into Python objects when indexed.
+    """
+    
+    def __init__(self, day_dir):
+        self.day_dir = day_dir
+        self.maps = []
+        
+        for columns in (ROW_COLUMNS, SNAPSHOT_COLUMNS):
+            for name, typecode in columns.items():
+                setattr(self, name, self._map(_column_path(day_dir, name, typecode), typecode))
+        
+        # Only snapshots present in every snapshot column are complete
+        self.length = min(len(getattr(self, name)) for name in SNAPSHOT_COLUMNS)
+    
+    def _map(self, path, typecode):
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return memoryview(array(typecode))
+        
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.maps.append(mapped)
+        
+        # Ignore a partially written trailing value
+        itemsize = array(typecode).itemsize
+        usable = len(mapped) - (len(mapped) % itemsize)
+        return memoryview(mapped)[:usable].cast(typecode)
+    
+    def __len__(self):
+        return self.length
+    
+    def snapshot(self, position):
+        """Materialize one snapshot as the usual option chain dict"""
+        collected_at = (EPOCH + timedelta(milliseconds=self.ts[position])).isoformat()
+        expiry = _int_to_expiry(self.expiry[position])
+        start = self.start[position]
+        
+        options = []
+        for row in range(start, start + self.count[position]):
+            options.append({
+                'strike': self.strike[row],
+                'type': OPTION_TYPES[self.type[row]],
+                'ltp': self.ltp[row] / 100,
+                'volume': self.volume[row],
+                'oi': self.oi[row],
+                'expiry': expiry
+            })
+        
+        return {
+            'spot_price': self.spot[position] / 100,
+            'atm_strike': self.atm[position],
+            'expiry': expiry,
+            'options': options,
+            'timestamp': collected_at,
+            'collected_at': collected_at
+        }
+    
+    def close(self):
+        # Views must be released before their maps can close
+        for columns in (ROW_COLUMNS, SNAPSHOT_COLUMNS):
+            for name in columns:
+                getattr(self, name).release()
+        for mapped in self.maps:
+            mapped.close()
+        self.maps = []
+
+
+def list_days(directory=TICK_STORE_DIR):
+    """Trading days stored, oldest first"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        name for name in os.listdir(directory)
+        if os.path.exists(_column_path(os.path.join(directory, name), 'ts', SNAPSHOT_COLUMNS['ts']))
+    )
+
+
+def is_tick_store(path):
+    return bool(list_days(path))
+
+
+class TickSeries:
+    """
+    Lazy sequence of snapshots across days of a tick store
+
+    Supports len() and indexing like a list of snapshot dicts, but only maps the
+    column files; each snapshot is decoded when it's accessed.
+    """
+    
+    def __init__(self, directory=TICK_STORE_DIR, days=None):
+        self.directory = directory
+        self.days = [TickDay(os.path.join(directory, day)) for day in (days or list_days(directory))]
+        
+        # Global position of each day's first snapshot
+        self.offsets = []
+        total = 0
+        for day in self.days:
+            self.offsets.append(total)
+            total += len(day)
+        self.length = total
+        
+        # Consecutive-snapshot scans touch each position a few times
+        self.cache = {}
+    
+    def __len__(self):
+        return self.length
+    
+    def __getitem__(self, position):
+        if position < 0:
+            position += self.length
+        if not 0 <= position < self.length:
+            raise IndexError("snapshot index out of range")
+        
+        if position not in self.cache:
+            if len(self.cache) >= 4:
+                self.cache.pop(next(iter(self.cache)))
+            
+            day_index = len(self.offsets) - 1
+            while self.offsets[day_index] > position:
+                day_index -= 1
+            self.cache[position] = self.days[day_index].snapshot(position - self.offsets[day_index])
+        
+        return self.cache[position]
+    
+    def __iter__(self):
+        for day in self.days:
+            for position in range(len(day)):
+                yield day.snapshot(position)
+    
+    def close(self):
+        for day in self.days:
+            day.close()
+
+
+def convert(source, directory=TICK_STORE_DIR):
+    """Convert a legacy JSON file or snapshot log directory into the tick store"""
+    from snapshot_log import read_snapshots
+    
+    if os.path.isdir(source):
+        snapshots = read_snapshots(source)
+    else:
+        with open(source, 'r') as f:
+            snapshots = json.load(f)
+    
+    writer = TickStoreWriter(directory)
+    converted = 0
+    for snapshot in snapshots:
+        writer.append(snapshot)
+        converted += 1
+    writer.close()
+    
+    print(f"✓ Converted {converted} snapshots from {source} into {directory}/")
+    return converted
+
+
+def main():
+    """Convert collected data: python tick_store.py <json file or snapshot dir> [tick store dir]"""
+    if len(sys.argv) < 2:
+        print("Usage: python tick_store.py <options_historical_data.json | snapshots/> [tick_store/]")
+        return
+    
+    convert(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else TICK_STORE_DIR)
+
+
+if __name__ == "__main__":
+    main()
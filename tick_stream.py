@@ -0,0 +1,271 @@
+import json
+import struct
+import time
+from datetime import datetime
+from SmartApi.smartWebSocketV2 import SmartWebSocketV2
+from angel_api import NIFTY_TOKEN
+from option_model import ChainSnapshot
+
+# Only move the ladder once spot is this far from the current ATM strike,
+# so a spot hovering on a strike boundary doesn't churn subscriptions
+ATM_SHIFT_BUFFER = 35
+
+# Ladder subscription mode: SNAP_QUOTE is the only mode whose packets carry open interest
+LADDER_MODE = SmartWebSocketV2.SNAP_QUOTE
+
+# Reconnect backoff (seconds)
+INITIAL_BACKOFF = 1
+MAX_BACKOFF = 60
+
+
+class TickStreamer:
+    """
+    Streams live ticks for the current strike ladder into StrategyEngine
+
+    Uses the SmartAPI WebSocket feed (authenticated with the feed token from
+    login) instead of polling. The Nifty index is subscribed alongside the
+    options so the ladder is re-subscribed whenever ATM shifts.
+    """
+    
+    def __init__(self, angel, strategy, strikes_each_side=5, ws_url=None, active=None, record_file=None):
+        self.angel = angel
+        self.strategy = strategy
+        self.strikes_each_side = strikes_each_side
+        self.ws_url = ws_url  # Override for a local stand-in server
+        self.active = active  # Optional callable, ticks are ignored while it returns False
+        self.record_file = record_file
+        
+        self.sws = None
+        self.running = False
+        self.backoff = INITIAL_BACKOFF
+        
+        # Current ladder
+        self.atm_strike = None
+        self.expiry = None
+        self.contracts = {}  # token -> (strike, type, symbol)
+        self.subscribed = set()
+        
+        self.ticks_processed = 0
+        self._recorder = None
+    
+    def _create_socket(self):
+        """Create a SmartAPI WebSocket client wired to this streamer"""
+        sws = SmartWebSocketV2(
+            self.angel.auth_token,
+            self.angel.api_key,
+            self.angel.client_id,
+            self.angel.feed_token
+        )
+        
+        if self.ws_url:
+            sws.ROOT_URI = self.ws_url
+        
+        # Reconnects and subscriptions are managed here, not by the client
+        sws.MAX_RETRY_ATTEMPT = 0
+        sws.input_request_dict = {}
+        
+        sws.on_open = self._on_open
+        sws.on_data = self._on_data
+        sws.on_error = self._on_error
+        sws.on_close = self._on_close
+        return sws
+    
+    def _shift_ladder(self, atm_strike):
+        """Move the subscription to a new ATM strike"""
+        self.atm_strike = atm_strike
+        
+        # Slice of the session's precomputed strike ladder
+        ladder = self.angel.get_ladder(atm_strike, self.strikes_each_side)
+        self.expiry = ladder.expiry
+        self.contracts = {
+            token: (strike, option_type, symbol)
+            for strike, option_type, token, symbol in ladder.window(atm_strike, self.strikes_each_side)
+        }
+        
+        new_tokens = set(self.contracts)
+        removed = self.subscribed - new_tokens
+        added = new_tokens - self.subscribed
+        
+        if self.sws and removed:
+            self.sws.unsubscribe("ladder", LADDER_MODE, [
+                {"exchangeType": SmartWebSocketV2.NSE_FO, "tokens": sorted(removed)}
+            ])
+        if self.sws and added:
+            self.sws.subscribe("ladder", LADDER_MODE, [
+                {"exchangeType": SmartWebSocketV2.NSE_FO, "tokens": sorted(added)}
+            ])
+        
+        self.subscribed = new_tokens
+        print(f"✓ Streaming ATM {atm_strike} ± {self.strikes_each_side} ({len(new_tokens)} options)")
+    
+    def _on_open(self, wsapp):
+        """Subscribe the index and the current ladder on every (re)connect"""
+        print("✓ WebSocket connected")
+        self.backoff = INITIAL_BACKOFF
+        
+        self.sws.subscribe("spot", SmartWebSocketV2.LTP_MODE, [
+            {"exchangeType": SmartWebSocketV2.NSE_CM, "tokens": [NIFTY_TOKEN]}
+        ])
+        
+        if self.subscribed:
+            self.sws.subscribe("ladder", LADDER_MODE, [
+                {"exchangeType": SmartWebSocketV2.NSE_FO, "tokens": sorted(self.subscribed)}
+            ])
+    
+    def _on_spot(self, spot_price):
+        """Re-subscribe when spot has moved far enough to shift ATM"""
+        if self.atm_strike is not None and abs(spot_price - self.atm_strike) <= ATM_SHIFT_BUFFER:
+            return
+        
+        atm_strike = self.angel.get_atm_strike(spot_price)
+        if atm_strike != self.atm_strike:
+            self._shift_ladder(atm_strike)
+    
+    def _on_data(self, wsapp, tick):
+        """Push each tick straight into the strategy engine"""
+        if not isinstance(tick, dict):
+            return
+        
+        try:
+            if self._recorder:
+                self._recorder.write(json.dumps(tick, default=str) + "\n")
+            
+            token = tick.get('token')
+            ltp = tick.get('last_traded_price', 0) / 100  # Feed prices are in paise
+            
+            if token == NIFTY_TOKEN:
+                self._on_spot(ltp)
+                return
+            
+            contract = self.contracts.get(token)
+            if not contract or ltp <= 0:
+                return
+            
+            if self.active and not self.active():
+                return
+            
+            strike, option_type, symbol = contract
+            chain = ChainSnapshot(None, self.atm_strike, self.expiry, datetime.now().isoformat())
+            chain.append(strike, option_type, ltp, tick.get('volume_trade_for_the_day', 0), tick.get('open_interest', 0), symbol)
+            # One tick carries one option; the rest of the ladder keeps its state
+            self.strategy.process_options(chain, partial=True)
+            self.ticks_processed += 1
+            
+        except Exception as e:
+            print(f"❌ Error processing tick: {str(e)}")
+    
+    def _on_error(self, wsapp, error=None):
+        print(f"⚠ WebSocket error: {error}")
+    
+    def _on_close(self, wsapp, *args):
+        print("⚠ WebSocket closed")
+    
+    def run(self):
+        """Stream until stop() is called, reconnecting with exponential backoff"""
+        self.running = True
+        
+        if self.record_file:
+            self._recorder = open(self.record_file, 'a')
+        
+        # Seed the ladder from a REST spot quote so options are subscribed on first connect
+        spot_price = self.angel.get_nifty_spot_price()
+        if spot_price:
+            self._on_spot(spot_price)
+        
+        try:
+            while self.running:
+                self.sws = self._create_socket()
+                
+                try:
+                    self.sws.connect()  # Blocks until the connection drops
+                except Exception as e:
+                    print(f"❌ WebSocket connection failed: {str(e)}")
+                
+                if not self.running:
+                    break
+                
+                print(f"⏳ Reconnecting in {self.backoff} seconds...")
+                time.sleep(self.backoff)
+                self.backoff = min(self.backoff * 2, MAX_BACKOFF)
+        finally:
+            if self._recorder:
+                self._recorder.close()
+                self._recorder = None
+    
+    def stop(self):
+        """Stop streaming and close the connection"""
+        self.running = False
+        if self.sws:
+            try:
+                self.sws.close_connection()
+            except Exception:
+                pass
+
+
+def pack_tick(tick):
+    """
+    Encode a recorded tick into the SmartAPI binary feed format
+
+    Lets a local stand-in WebSocket server (tick_replay_server.py) replay
+    ticks recorded with TickStreamer(record_file=...). LTP, QUOTE and
+    SNAP_QUOTE packets are supported; fields missing from the tick are 0.
+    """
+    mode = tick.get('subscription_mode', SmartWebSocketV2.LTP_MODE)
+    token = tick['token'].encode().ljust(25, b'\x00')
+    
+    packet = struct.pack(
+        "<BB25sqqq",
+        mode,
+        tick.get('exchange_type', SmartWebSocketV2.NSE_FO),
+        token,
+        tick.get('sequence_number', 0),
+        tick.get('exchange_timestamp', 0),
+        tick['last_traded_price']
+    )
+    
+    if mode in (SmartWebSocketV2.QUOTE, SmartWebSocketV2.SNAP_QUOTE):
+        packet += struct.pack(
+            "<qqqddqqqq",
+            tick.get('last_traded_quantity', 0),
+            tick.get('average_traded_price', 0),
+            tick.get('volume_trade_for_the_day', 0),
+            tick.get('total_buy_quantity', 0.0),
+            tick.get('total_sell_quantity', 0.0),
+            tick.get('open_price_of_the_day', 0),
+            tick.get('high_price_of_the_day', 0),
+            tick.get('low_price_of_the_day', 0),
+            tick.get('closed_price', 0)
+        )
+    
+    if mode == SmartWebSocketV2.SNAP_QUOTE:
+        packet += struct.pack(
+            "<qqq",
+            tick.get('last_traded_timestamp', 0),
+            tick.get('open_interest', 0),
+            tick.get('open_interest_change_percentage', 0)
+        )
+        
+        # Best five: ten 20-byte entries, each with its buy/sell flag as recorded
+        depth = tick.get('best_5_buy_data', []) + tick.get('best_5_sell_data', [])
+        for entry in depth[:10]:
+            packet += struct.pack("<HqqH", entry['flag'], entry['quantity'], entry['price'], entry['no of orders'])
+        packet += bytes(20 * (10 - min(len(depth), 10)))
+        
+        packet += struct.pack(
+            "<qqqq",
+            tick.get('upper_circuit_limit', 0),
+            tick.get('lower_circuit_limit', 0),
+            tick.get('52_week_high_price', 0),
+            tick.get('52_week_low_price', 0)
+        )
+    
+    return packet
+
+
+def load_recorded_ticks(path):
+    """Read ticks recorded by TickStreamer (one JSON object per line)"""
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
@@ -0,0 +1,180 @@
+from strategy import StrategyEngine
+from option_model import ChainSnapshot
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+class VectorStrategyEngine(StrategyEngine):
+    """
+    StrategyEngine evaluated on whole-chain arrays instead of per-option dicts
+
+    The snapshot arrives as parallel arrays (strike, side, ltp). Qualification
+    for every option is one set of array operations; entry and exit checks are
+    masks, and only the few indices they select are handled in Python, in chain
+    order, so signals match StrategyEngine.process_options exactly:
+      - an exit at index m lets entries trigger from the options after m
+      - after an entry, the rest of the chain is only monitored
+      - options already entered never re-trigger; a max-consecutive skip
+        still prints and moves on to the next candidate
+    Per-option state lives in arrays aligned with the chain, carried over by
+    key when the ladder changes. Strike/side pairs must be unique, i.e. one
+    engine per expiry, as with StrategyEngine.
+    """
+    
+    def __init__(self, telegram_bot, params=None, checkpoint=None, clock=None):
+        if not NUMPY_AVAILABLE:
+            raise ImportError("numpy is required for VectorStrategyEngine (pip install numpy)")
+        
+        self._reset_arrays()
+        super().__init__(telegram_bot, params, checkpoint, clock)
+    
+    def _reset_arrays(self):
+        """Drop the aligned arrays; the next snapshot rebuilds them from the sets"""
+        # Chain layout of the previous snapshot and per-option state aligned with it
+        self._strikes = None
+        self._sides = None
+        self._keys = []
+        self._prev = np.empty(0)
+        self._qualified = np.zeros(0, dtype=bool)
+        self._entered = np.zeros(0, dtype=bool)
+    
+    def _start_day(self, day):
+        super()._start_day(day)
+        self._reset_arrays()
+    
+    def _prev_prices(self):
+        prices = {key: price for key, price in zip(self._keys, self._prev.tolist()) if price == price}
+        # Restored prices for options that haven't been seen since
+        prices.update((key, state.prev_price) for key, state in self.option_states.items() if key not in prices)
+        return prices
+    
+    def _align(self, strikes, sides):
+        """Re-map per-option state when the chain's layout differs from the last snapshot"""
+        if (self._strikes is not None and strikes.shape == self._strikes.shape
+                and np.array_equal(strikes, self._strikes) and np.array_equal(sides, self._sides)):
+            return
+        
+        keys = [self._get_option_key(strike, side) for strike, side in zip(strikes.tolist(), sides.tolist())]
+        positions = {key: i for i, key in enumerate(keys)}
+        if len(positions) != len(keys):
+            raise ValueError("Duplicate strike/side in snapshot; use one engine per expiry")
+        
+        # Options still in the chain keep their previous price; the rest are dropped.
+        # New ones pick up a price restored from a checkpoint, if any
+        previous = {key: i for i, key in enumerate(self._keys)}
+        prev = np.full(len(keys), np.nan)
+        for i, key in enumerate(keys):
+            j = previous.get(key)
+            if j is not None:
+                prev[i] = self._prev[j]
+            else:
+                state = self.option_states.pop(key, None)
+                if state is not None and state.prev_price is not None:
+                    prev[i] = state.prev_price
+        
+        self._strikes = strikes.copy()
+        self._sides = sides.copy()
+        self._keys = keys
+        self._prev = prev
+        self._qualified = np.fromiter((key in self.qualified_options for key in keys), dtype=bool, count=len(keys))
+        self._entered = np.fromiter((key in self.entered_options for key in keys), dtype=bool, count=len(keys))
+    
+    def process_arrays(self, strikes, sides, ltps):
+        """
+        Process one snapshot given as parallel arrays
+
+        Args:
+            strikes: Strike prices
+            sides: Option types ('CE' / 'PE')
+            ltps: Last traded prices (0 = no price, skipped)
+        """
+        strikes = np.asarray(strikes)
+        sides = np.asarray(sides)
+        ltps = np.asarray(ltps, dtype=float)
+        self._align(strikes, sides)
+        
+        valid = ltps != 0
+        
+        # Qualification: a price in the band, or a move across it since the previous price
+        prev = self._prev
+        params = self.params
+        touched = valid & (np.fmin(prev, ltps) <= params.qualify_high) & (np.fmax(prev, ltps) >= params.qualify_low)
+        newly = touched & ~self._qualified
+        if newly.any():
+            for i in np.flatnonzero(newly):
+                self.qualified_options.add(self._keys[i])
+                print(f"✅ QUALIFIED: {self._keys[i]} touched ₹{params.qualify_level:g}")
+            self._qualified |= touched
+            self.state_changed = True
+        self._prev = np.where(valid, ltps, prev)
+        
+        # Exits and entries, in chain order
+        cursor = 0
+        while True:
+            if self.open_position:
+                position = self.open_position
+                hits = np.flatnonzero(
+                    valid[cursor:]
+                    & (strikes[cursor:] == position['strike'])
+                    & (sides[cursor:] == position['type'])
+                    & ((ltps[cursor:] >= position['target']) | (ltps[cursor:] <= position['stop_loss']))
+                )
+                if not hits.size:
+                    return
+                
+                exit_index = cursor + hits[0]
+                price = ltps[exit_index].item()
+                self._exit_position(price, 'TARGET' if price >= position['target'] else 'STOP LOSS')
+                
+                # The exited option is in entered_options, so entries resume after it
+                cursor = exit_index + 1
+            else:
+                candidates = cursor + np.flatnonzero(
+                    valid[cursor:] & self._qualified[cursor:] & ~self._entered[cursor:] & (ltps[cursor:] >= params.entry_trigger)
+                )
+                for index in candidates:
+                    self._enter_position({
+                        'strike': strikes[index].item(),
+                        'type': sides[index].item(),
+                        'ltp': ltps[index].item()
+                    })
+                    if self.open_position:
+                        self._entered[index] = True
+                        cursor = index + 1
+                        break
+                else:
+                    return
+    
+    def process_options(self, option_data, partial=False):
+        """Process a ChainSnapshot (or chain dict) through the array path"""
+        if partial:
+            # Array state is aligned with whole chains; streamed ticks need StrategyEngine
+            raise ValueError("VectorStrategyEngine needs whole-chain snapshots")
+        
+        if not option_data or 'options' not in option_data:
+            return
+        
+        day = self._snapshot_day(option_data)
+        if day != self.trading_day:
+            self._start_day(day)
+        
+        if isinstance(option_data, ChainSnapshot):
+            # The snapshot's arrays are used as-is (no per-option objects)
+            self.process_arrays(
+                np.frombuffer(option_data.strikes, dtype=np.int32),
+                np.array(option_data.types),
+                np.frombuffer(option_data.ltps, dtype=np.float64)
+            )
+        else:
+            options = option_data['options']
+            self.process_arrays(
+                np.array([option['strike'] for option in options]),
+                np.array([option['type'] for option in options]),
+                np.array([option['ltp'] for option in options], dtype=float)
+            )
+        
+        self._save_state()